@@ -0,0 +1,43 @@
+from __future__ import annotations
+import argparse
+import time
+import boto3
+from botocore.config import Config
+from src.coach_feedback.aws import clients
+from src.coach_feedback.aws.config import AWS_REGION, AWS_PROFILE
+
+
+def per_call_client():
+    # the pre-pooling pattern: new Session + client for every request
+    if AWS_PROFILE:
+        sess = boto3.Session(profile_name=AWS_PROFILE, region_name=AWS_REGION)
+    else:
+        sess = boto3.Session(region_name=AWS_REGION)
+    cfg = Config(read_timeout=20, retries={"max_attempts": 0})
+    return sess.client("bedrock-runtime", region_name=AWS_REGION, config=cfg)
+
+
+def pooled_client():
+    return clients.client("bedrock-runtime", timeout_s=20, max_attempts=0)
+
+
+def _bench(fn, n: int) -> float:
+    t0 = time.perf_counter()
+    for _ in range(n):
+        fn()
+    return (time.perf_counter() - t0) / n * 1000.0
+
+
+def main():
+    ap = argparse.ArgumentParser(description="Per-call overhead of obtaining a Bedrock client")
+    ap.add_argument("-n", type=int, default=50)
+    args = ap.parse_args()
+    before = _bench(per_call_client, args.n)
+    pooled_client()  # first call builds the shared client
+    after = _bench(pooled_client, args.n)
+    print(f"per-call Session+client: {before:8.3f} ms/call")
+    print(f"shared pooled client:    {after:8.3f} ms/call  ({before / max(after, 1e-9):.0f}x)")
+
+
+if __name__ == "__main__":
+    main()
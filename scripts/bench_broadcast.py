@@ -0,0 +1,115 @@
+from __future__ import annotations
+import argparse
+import asyncio
+import json
+import random
+import time
+from typing import Dict, List, Set
+from src.coach_feedback.asyncapi.broadcast import Broadcaster
+
+
+def _pct(vals: List[float], q: float) -> float:
+    s = sorted(vals)
+    return s[min(len(s) - 1, int(q * (len(s) - 1)))] * 1000
+
+
+class FakeSocket:
+    """Simulated client: fast ones yield once per frame, slow ones take slow_ms per frame."""
+
+    def __init__(self, delay_s: float, latencies: List[float]):
+        self.delay_s = delay_s
+        self.latencies = latencies
+
+    async def send_text(self, data: str):
+        await asyncio.sleep(self.delay_s)
+        seq = json.loads(data).get("seq") if self.delay_s == 0 else None
+        if seq is not None:
+            self.latencies.append(time.perf_counter() - PUBLISHED[seq])
+
+
+PUBLISHED: Dict[int, float] = {}
+
+
+def _sockets(args, latencies) -> Dict[str, List[FakeSocket]]:
+    rng = random.Random(0)
+    per = args.subscribers // args.sessions
+    return {
+        f"s{i}": [
+            FakeSocket(args.slow_ms / 1000 if rng.random() < args.slow_frac else 0.0, latencies)
+            for _ in range(per)
+        ]
+        for i in range(args.sessions)
+    }
+
+
+async def _run(args, sessions, publish):
+    PUBLISHED.clear()
+    seq = 0
+    tasks = []
+    ids = list(sessions)
+    # each session publishes once per interval; sessions are spread over 10 ms ticks
+    ticks = max(1, int(args.interval_ms // 10))
+    per_tick = -(-len(ids) // ticks)
+    for _ in range(args.events):
+        for t in range(0, len(ids), per_tick):
+            for sid in ids[t : t + per_tick]:
+                PUBLISHED[seq] = time.perf_counter()
+                msg = {"type": "TranscriptChunkAppended", "seq": seq}
+                tasks.append(asyncio.create_task(publish(sid, msg)))
+                seq += 1
+            await asyncio.sleep(args.interval_ms / ticks / 1000)
+    await asyncio.gather(*tasks)
+
+
+async def legacy(args) -> List[float]:
+    """The previous _broadcast: json.dumps and an awaited send per subscriber, in turn."""
+    latencies: List[float] = []
+    subs: Dict[str, Set[FakeSocket]] = {k: set(v) for k, v in _sockets(args, latencies).items()}
+
+    async def publish(sid, message):
+        for ws in subs.get(sid, set()):
+            await ws.send_text(json.dumps(message, ensure_ascii=False))
+
+    await _run(args, subs, publish)
+    return latencies
+
+
+async def queued(args) -> List[float]:
+    latencies: List[float] = []
+    b = Broadcaster(maxsize=args.queue, policy=args.policy, heartbeat_s=0)
+    socks = _sockets(args, latencies)
+    for sid, ws_list in socks.items():
+        for ws in ws_list:
+            b.subscribe(sid, ws.send_text)
+    await _run(args, socks, b.publish)
+    expected = sum(1 for v in socks.values() for ws in v if ws.delay_s == 0) * args.events
+    while len(latencies) < expected:
+        await asyncio.sleep(0.01)
+    return latencies
+
+
+def main():
+    ap = argparse.ArgumentParser(
+        description="WebSocket fan-out: sequential sends vs per-subscriber queues"
+    )
+    ap.add_argument("--subscribers", type=int, default=10_000)
+    ap.add_argument("--sessions", type=int, default=1_000)
+    ap.add_argument("--events", type=int, default=5, help="events per session")
+    ap.add_argument("--interval-ms", type=float, default=1000.0, help="per-session event period")
+    ap.add_argument("--slow-frac", type=float, default=0.01, help="share of slow clients")
+    ap.add_argument("--slow-ms", type=float, default=200.0)
+    ap.add_argument("--queue", type=int, default=64)
+    ap.add_argument("--policy", default="drop_oldest")
+    args = ap.parse_args()
+    for label, fn in (("sequential", legacy), ("queued", queued)):
+        t0 = time.perf_counter()
+        lat = asyncio.run(fn(args))
+        wall = time.perf_counter() - t0
+        print(
+            f"{label:>10}: p50 {_pct(lat, 0.5):7.2f} ms  p99 {_pct(lat, 0.99):7.2f} ms"
+            f"  ({len(lat)} fast-client deliveries, {wall:.2f} s)"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,55 @@
+from __future__ import annotations
+import argparse
+import pathlib
+import re
+import time
+from src.coach_feedback.classifier import classify_transcript, load_step_yaml
+from src.coach_feedback.schema import TranscriptChunk
+
+STEPS_YAML = pathlib.Path(__file__).parents[1] / "src" / "coach_feedback" / "steps.yaml"
+LINES = [
+    "지난 시간에 질문 뒤 2초를 기다리니 더 많은 학생이 손을 들었어요.",
+    "좋아요. 다음엔 일관되게 적용해볼까요?",
+    "Let's plan when and where you will practice the wait time.",
+    "I noticed the students seemed more engaged because of the think time.",
+    "네. 도입 질문마다 체크리스트로 표시해 보겠습니다.",
+]
+
+
+def per_cue_regex(chunks, path):
+    # the previous implementation: reload YAML, one re.search per (chunk, cue)
+    steps = load_step_yaml(path)
+    out = []
+    for ch in chunks:
+        text = ch.text.lower()
+        matched = []
+        for sid, meta in steps.items():
+            for cue in meta.get("cues", []):
+                if re.search(r"\b" + re.escape(cue.lower()) + r"\b", text):
+                    matched.append(sid)
+                    break
+        out.append(matched)
+    return out
+
+
+def main():
+    ap = argparse.ArgumentParser(description="Heuristic classifier throughput")
+    ap.add_argument("-n", type=int, default=10_000)
+    args = ap.parse_args()
+    chunks = [
+        TranscriptChunk(id=f"c{i}", speaker="teacher", text=LINES[i % len(LINES)])
+        for i in range(args.n)
+    ]
+    path = str(STEPS_YAML)
+    classify_transcript(chunks[:1], path)  # compile once, as a long-lived process would
+    for label, fn in (("per-cue re.search", per_cue_regex), ("compiled matcher", None)):
+        t0 = time.perf_counter()
+        if fn:
+            fn(chunks, path)
+        else:
+            classify_transcript(chunks, path)
+        print(f"{label:>18}: {time.perf_counter() - t0:7.3f} s for {args.n} chunks")
+
+
+if __name__ == "__main__":
+    main()
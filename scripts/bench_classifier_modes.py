@@ -0,0 +1,80 @@
+from __future__ import annotations
+import argparse
+import json
+import re
+import threading
+import time
+from src.coach_feedback.aws import bedrock_client as bc
+from src.coach_feedback.llm.tokens import estimate_tokens
+
+SAMPLE = [
+    "지난 시간에 질문 뒤 2초를 기다리니 더 많은 학생이 손을 들었어요.",
+    "좋아요. 다음에도 일관되게 적용해볼까요?",
+    "네. 도입 질문마다 체크리스트로 표시해 보겠습니다.",
+    "Let's plan when and where you will try the wait time next week.",
+]
+
+
+class Counter:
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.requests = 0
+        self.input_tokens = 0
+
+    def add(self, prompt: str):
+        with self.lock:
+            self.requests += 1
+            self.input_tokens += estimate_tokens(prompt)
+
+
+def _fake_invoker(counter: Counter, latency_s: float):
+    def invoke(prompt, system=None, max_tokens=0, temperature=0, timeout_s=0):
+        counter.add(prompt)
+        time.sleep(latency_s)
+        if system == "Classify coaching steps":
+            n = len(re.findall(r"^\[\d+\]", prompt, re.M))
+            scores = {str(s): 0.1 * (s % 10) for s in range(1, 13)}
+            return json.dumps({"results": [{"index": i, "scores": scores} for i in range(n)]})
+        return json.dumps({"score": 0.5})
+
+    return invoke
+
+
+def _counting(counter: Counter, real):
+    def invoke(prompt, *a, **k):
+        counter.add(prompt)
+        return real(prompt, *a, **k)
+
+    return invoke
+
+
+def main():
+    ap = argparse.ArgumentParser(description="Compare per_step vs batched step classification")
+    ap.add_argument("--chunks", type=int, default=200)
+    ap.add_argument("--latency-ms", type=float, default=400.0, help="simulated Bedrock latency")
+    ap.add_argument("--calls-per-sec", type=float, default=1000.0)
+    ap.add_argument("--live", action="store_true", help="call Bedrock instead of the simulator")
+    args = ap.parse_args()
+
+    texts = [SAMPLE[i % len(SAMPLE)] for i in range(args.chunks)]
+    real = bc._invoke_claude_cfg
+    print(f"{'mode':>9} {'requests':>9} {'input_tok':>10} {'wall_s':>8}")
+    for mode in ("per_step", "batched"):
+        counter = Counter()
+        bc._invoke_claude_cfg = (
+            _counting(counter, real)
+            if args.live
+            else _fake_invoker(counter, args.latency_ms / 1000.0)
+        )
+        t0 = time.perf_counter()
+        if mode == "per_step":
+            bc.score_chunks_steps(texts, calls_per_sec=args.calls_per_sec, initial_stagger_ms=0)
+        else:
+            bc.score_chunks_steps_batched(texts, calls_per_sec=args.calls_per_sec)
+        wall = time.perf_counter() - t0
+        print(f"{mode:>9} {counter.requests:>9} {counter.input_tokens:>10} {wall:>8.2f}")
+    bc._invoke_claude_cfg = real
+
+
+if __name__ == "__main__":
+    main()
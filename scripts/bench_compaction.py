@@ -0,0 +1,60 @@
+from __future__ import annotations
+import argparse
+import time
+from src.coach_feedback.aws import bedrock_client as bc
+from src.coach_feedback.llm.tokens import estimate_tokens
+
+LINES = [
+    ("teacher", "지난 시간에 질문 뒤 2초를 기다리니 더 많은 학생이 손을 들었어요."),
+    ("teacher", "그래서 오늘도 해 봤는데요."),
+    ("coach", "좋아요. 다음에도 일관되게 적용해볼까요?"),
+    ("teacher", "네. 도입 질문마다 체크리스트로 표시해 보겠습니다."),
+    ("coach", "Let's plan when and where you will try the wait time next week."),
+    ("coach", "오늘 날씨가 좋네요."),
+]
+
+
+def _transcript(n: int):
+    return [
+        {
+            "id": f"seg{i + 1}",
+            "speaker": LINES[i % len(LINES)][0],
+            "text": LINES[i % len(LINES)][1],
+            "ts": f"2024-05-01T10:{i // 60 % 60:02d}:{i % 60:02d}Z",
+        }
+        for i in range(n)
+    ]
+
+
+def _fake_invoker(ms_per_1k_tokens: float):
+    def invoke(prompt, system=None, max_tokens=0, temperature=0, timeout_s=0):
+        time.sleep(0.3 + estimate_tokens(prompt) / 1000 * ms_per_1k_tokens / 1000)
+        return '{"praise": "ok"}'
+
+    return invoke
+
+
+def main():
+    ap = argparse.ArgumentParser(description="Feedback prompt size/latency: JSON vs compacted")
+    ap.add_argument("--segments", type=int, nargs="+", default=[50, 500, 2000])
+    ap.add_argument("--ms-per-1k-tokens", type=float, default=150.0, help="simulated prefill")
+    ap.add_argument("--live", action="store_true", help="call Bedrock instead of the simulator")
+    args = ap.parse_args()
+    real = bc._invoke_claude
+    if not args.live:
+        bc._invoke_claude = _fake_invoker(args.ms_per_1k_tokens)
+    print(f"{'segments':>8} {'mode':>8} {'prompt_tok':>10} {'gen_s':>7}")
+    for n in args.segments:
+        transcript = _transcript(n)
+        for compact in (False, True):
+            prompt = bc.build_feedback_prompt(transcript, 7, compact=compact)
+            t0 = time.perf_counter()
+            bc._invoke_claude(prompt, system="Generate instructional coaching feedback")
+            wall = time.perf_counter() - t0
+            mode = "compact" if compact else "json"
+            print(f"{n:>8} {mode:>8} {estimate_tokens(prompt):>10} {wall:>7.2f}")
+    bc._invoke_claude = real
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,65 @@
+from __future__ import annotations
+import argparse
+import time
+from concurrent.futures import ThreadPoolExecutor
+from src.coach_feedback.aws import ddb_io
+
+
+class SlowClient:
+    """Stands in for DynamoDB: fixed round-trip per request, whatever its size."""
+
+    def __init__(self, rtt_s: float):
+        self.rtt_s = rtt_s
+
+    def put_item(self, TableName, Item):
+        time.sleep(self.rtt_s)
+
+    def batch_write_item(self, RequestItems):
+        time.sleep(self.rtt_s)
+        return {"UnprocessedItems": {}}
+
+
+def _payload(i: int):
+    return {
+        "session_id": f"s{i}",
+        "ts": i,
+        "step_focus": 3,
+        "feedback": {"praise": "좋았습니다", "confidence": 0.72},
+        "transcript": [
+            {"id": f"seg{j}", "speaker": "teacher", "text": "질문 후 기다림"} for j in range(40)
+        ],
+    }
+
+
+def main():
+    ap = argparse.ArgumentParser(description="DynamoDB persistence: put_item vs batched writer")
+    ap.add_argument("--sessions", type=int, default=2000)
+    ap.add_argument("--rtt-ms", type=float, default=15.0)
+    ap.add_argument("--threads", type=int, default=8, help="concurrent persisting callers")
+    args = ap.parse_args()
+    client = SlowClient(args.rtt_ms / 1000.0)
+
+    t0 = time.perf_counter()
+    with ThreadPoolExecutor(args.threads) as ex:
+        list(
+            ex.map(
+                lambda i: client.put_item("t", ddb_io.serialize_item(_payload(i))),
+                range(args.sessions),
+            )
+        )
+    single = time.perf_counter() - t0
+
+    writer = ddb_io.BatchWriter(table="t", flush_s=0.05, client=lambda: client)
+    t0 = time.perf_counter()
+    with ThreadPoolExecutor(args.threads) as ex:
+        futs = list(ex.map(lambda i: writer.put(_payload(i)), range(args.sessions)))
+    for f in futs:
+        f.result()
+    batched = time.perf_counter() - t0
+
+    for label, wall in (("put_item", single), ("batch_write", batched)):
+        print(f"{label:>12}: {args.sessions / wall * 60:10.0f} sessions/min ({wall:.2f} s)")
+
+
+if __name__ == "__main__":
+    main()
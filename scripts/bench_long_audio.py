@@ -0,0 +1,51 @@
+from __future__ import annotations
+import argparse
+import os
+import time
+import numpy as np
+from faster_whisper import decode_audio
+from src.coach_feedback.audio.long_audio import SAMPLE_RATE, transcribe_long_audio
+from src.coach_feedback.audio.model_cache import get_model
+
+
+def _recording(src: np.ndarray, minutes: int) -> np.ndarray:
+    n = minutes * 60 * SAMPLE_RATE
+    return np.tile(src, n // len(src) + 1)[:n]
+
+
+def _single_stream(audio: np.ndarray, model_size: str) -> float:
+    model = get_model(model_size)
+    t0 = time.perf_counter()
+    segments_gen, _ = model.transcribe(audio, vad_filter=True)
+    for _ in segments_gen:
+        pass
+    return time.perf_counter() - t0
+
+
+def main():
+    ap = argparse.ArgumentParser(description="Wall-clock scaling of long-audio transcription")
+    ap.add_argument("--audio", required=True, help="speech sample, tiled to each duration")
+    ap.add_argument("--minutes", type=int, nargs="+", default=[10, 30, 60])
+    default_workers = sorted({1, 2, 4, os.cpu_count() or 1})
+    ap.add_argument("--workers", type=int, nargs="+", default=default_workers)
+    ap.add_argument("--model", default="small")
+    args = ap.parse_args()
+
+    src = decode_audio(args.audio, sampling_rate=SAMPLE_RATE)
+    print(f"{'minutes':>7} {'workers':>7} {'wall_s':>9} {'speedup':>8} {'x_realtime':>10}")
+    for minutes in args.minutes:
+        audio = _recording(src, minutes)
+        base = _single_stream(audio, args.model)
+        print(f"{minutes:>7} {'single':>7} {base:>9.1f} {1.0:>8.2f} {minutes * 60 / base:>10.1f}")
+        for w in args.workers:
+            transcribe_long_audio(audio[: SAMPLE_RATE * 5], workers=w, model_size=args.model)
+            t0 = time.perf_counter()
+            transcribe_long_audio(audio, workers=w, model_size=args.model)
+            wall = time.perf_counter() - t0
+            print(
+                f"{minutes:>7} {w:>7} {wall:>9.1f} {base / wall:>8.2f} {minutes * 60 / wall:>10.1f}"
+            )
+
+
+if __name__ == "__main__":
+    main()
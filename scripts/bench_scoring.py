@@ -0,0 +1,56 @@
+from __future__ import annotations
+import argparse
+import time
+import numpy as np
+from src.coach_feedback.scoring import (
+    primary_step,
+    primary_steps_batch,
+    scores_to_matrix,
+    secondary_steps,
+)
+
+
+def dict_vote(per_chunk):
+    # the previous implementation: Python dict votes over per-chunk score dicts
+    votes = {}
+    for scores in per_chunk:
+        sid = max(scores, key=lambda k: scores[k]) if scores else 11
+        votes[sid] = votes.get(sid, 0.0) + 1.0
+    return max(votes, key=lambda k: votes[k]) if votes else 11
+
+
+def main():
+    ap = argparse.ArgumentParser(description="Primary-step aggregation: dict loop vs NumPy")
+    ap.add_argument("--sessions", type=int, default=1000)
+    ap.add_argument("--chunks", type=int, default=200)
+    args = ap.parse_args()
+    rng = np.random.default_rng(0)
+    mats = [rng.random((args.chunks, 12), dtype=np.float32) for _ in range(args.sessions)]
+    dicts = [[{j + 1: float(v) for j, v in enumerate(row)} for row in m] for m in mats]
+    t0 = time.perf_counter()
+    for d in dicts:
+        dict_vote(d)
+    t_dict = time.perf_counter() - t0
+    t0 = time.perf_counter()
+    for m in mats:
+        p = primary_step(m, method="vote")
+        secondary_steps(m, p)
+    t_np = time.perf_counter() - t0
+    stacked = np.concatenate(mats)
+    index = np.repeat(np.arange(args.sessions), args.chunks)
+    t0 = time.perf_counter()
+    primary_steps_batch(stacked, index, args.sessions)
+    t_batch = time.perf_counter() - t0
+    t0 = time.perf_counter()
+    for d in dicts:
+        scores_to_matrix(d)
+    t_conv = time.perf_counter() - t0
+    n = args.sessions
+    print(f"dict vote     : {t_dict / n * 1e6:8.1f} us/session")
+    print(f"numpy primary : {t_np / n * 1e6:8.1f} us/session (incl. secondary top-k)")
+    print(f"numpy batched : {t_batch / n * 1e6:8.1f} us/session (all sessions in one call)")
+    print(f"dict->matrix  : {t_conv / n * 1e6:8.1f} us/session (once, at the scorer boundary)")
+
+
+if __name__ == "__main__":
+    main()
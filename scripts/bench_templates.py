@@ -0,0 +1,35 @@
+from __future__ import annotations
+import argparse
+import time
+from jinja2 import Template
+from src.coach_feedback.aws.bedrock_client import STEP_NAMES, build_step_classifier_prompt
+from src.coach_feedback.templates_loader import load_template
+
+TEXT = "지난 시간에 질문 뒤 2초를 기다리니 더 많은 학생이 손을 들었어요."
+
+
+def parse_per_call(step_id: int) -> str:
+    # the previous path: read + parse + compile on every render
+    tpl = load_template("step_classifier.j2")
+    return Template(tpl).render(step_name=STEP_NAMES[step_id], step_id=step_id, chunk_text=TEXT)
+
+
+def shared_env(step_id: int) -> str:
+    return build_step_classifier_prompt(TEXT, step_id)
+
+
+def main():
+    ap = argparse.ArgumentParser(description="Render classifier prompts with and without the env")
+    ap.add_argument("-n", type=int, default=10_000)
+    args = ap.parse_args()
+    assert parse_per_call(3) == shared_env(3)
+    for label, fn in (("parse per call", parse_per_call), ("shared Environment", shared_env)):
+        t0 = time.perf_counter()
+        for i in range(args.n):
+            fn(i % 12 + 1)
+        wall = time.perf_counter() - t0
+        print(f"{label:>20}: {wall:7.3f} s  ({wall / args.n * 1e6:7.1f} us/prompt)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,59 @@
+from __future__ import annotations
+import argparse
+import json
+import pathlib
+import numpy as np
+from src.coach_feedback.aws import bedrock_client as bc
+from src.coach_feedback.cascade import cascade_score_chunks, default_local_scorer
+from src.coach_feedback.scoring import N_STEPS, primary_step, scores_to_matrix
+
+SAMPLE = pathlib.Path(__file__).parents[1] / "examples" / "labeled_chunks.json"
+
+
+def _tops(scores):
+    m = scores_to_matrix(scores)
+    return np.where(m.max(axis=1) > 0, m.argmax(axis=1) + 1, 0)
+
+
+def main():
+    ap = argparse.ArgumentParser(
+        description="Cascade vs full 12-step Bedrock scoring on a labeled sample"
+    )
+    ap.add_argument("--sample", default=str(SAMPLE), help='JSON list of {"text", "step"}')
+    ap.add_argument("--threshold", type=float, nargs="+", default=[0.5, 0.6, 0.75])
+    ap.add_argument("--top-k", type=int, default=3)
+    args = ap.parse_args()
+
+    rows = json.loads(pathlib.Path(args.sample).read_text(encoding="utf-8"))
+    texts = [r["text"] for r in rows]
+    labels = np.array([r.get("step") or 0 for r in rows])
+    labeled = labels > 0
+
+    # Repeated runs are served by the LLM response cache, so only the first run pays.
+    full = bc.score_chunks_steps(texts)
+    full_tops = _tops(full)
+    full_acc = (full_tops[labeled] == labels[labeled]).mean() if labeled.any() else float("nan")
+    print(f"full: calls={len(texts) * N_STEPS} label_acc={full_acc:.2f}")
+    print(
+        f"{'thresh':>6} {'calls':>6} {'saved':>6} {'local':>6} {'skip':>5} "
+        f"{'agree':>6} {'label_acc':>9} {'primary':>8}"
+    )
+    local = default_local_scorer()
+    for th in args.threshold:
+        scores, st = cascade_score_chunks(texts, threshold=th, top_k=args.top_k, local_scorer=local)
+        tops = _tops(scores)
+        scored = tops > 0
+        agree = (tops[scored] == full_tops[scored]).mean() if scored.any() else float("nan")
+        acc = (tops[labeled] == labels[labeled]).mean() if labeled.any() else float("nan")
+        same_primary = primary_step(scores_to_matrix(scores)) == primary_step(
+            scores_to_matrix(full)
+        )
+        saved = st["calls_saved"] / (len(texts) * N_STEPS)
+        print(
+            f"{th:>6.2f} {st['bedrock_calls']:>6} {saved:>6.0%} "
+            f"{st['local']:>6} {st['skipped']:>5} {agree:>6.2f} {acc:>9.2f} {str(same_primary):>8}"
+        )
+
+
+if __name__ == "__main__":
+    main()
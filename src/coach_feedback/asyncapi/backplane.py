@@ -0,0 +1,259 @@
+from __future__ import annotations
+import abc
+import asyncio
+import json
+import os
+import uuid
+from typing import Any, Awaitable, Callable, Dict, Optional, Set
+from .broadcast import Broadcaster
+
+try:
+    import redis.asyncio as aioredis
+except Exception:
+    aioredis = None
+
+try:
+    import paho.mqtt.client as mqtt
+except Exception:
+    mqtt = None
+
+EVENT_BACKPLANE = os.getenv("EVENT_BACKPLANE", "memory")  # memory | redis | mqtt
+REDIS_URL = os.getenv("REDIS_URL", "redis://localhost:6379/0")
+MQTT_BROKER = os.getenv("MQTT_BROKER", "localhost")
+MQTT_PORT = int(os.getenv("MQTT_PORT", "1883"))
+NODE_ID = os.getenv("NODE_ID") or uuid.uuid4().hex[:12]
+
+Deliver = Callable[[Dict[str, Any]], Awaitable[None]]
+
+
+def topic(session_id: str) -> str:
+    return f"sessions/{session_id}/events"
+
+
+class Backplane(abc.ABC):
+    """Carries session events between server instances.
+
+    publish() sends an envelope {origin, session_id, message} to every node subscribed to
+    the session; a node subscribes only while it has local sockets for that session.
+    """
+
+    def __init__(self):
+        self.deliver: Optional[Deliver] = None
+        self.sessions: Set[str] = set()
+        self.published = 0
+        self.received = 0
+
+    async def start(self, deliver: Deliver):
+        self.deliver = deliver
+
+    async def close(self):
+        pass
+
+    async def subscribe(self, session_id: str):
+        self.sessions.add(session_id)
+
+    async def unsubscribe(self, session_id: str):
+        self.sessions.discard(session_id)
+
+    @abc.abstractmethod
+    async def publish(self, envelope: Dict[str, Any]): ...
+
+    async def _received(self, envelope: Dict[str, Any]):
+        self.received += 1
+        if self.deliver is not None:
+            await self.deliver(envelope)
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "kind": type(self).__name__,
+            "sessions": len(self.sessions),
+            "published": self.published,
+            "received": self.received,
+        }
+
+
+class MemoryHub:
+    """Stand-in broker shared by InMemoryBackplane instances (one per simulated node)."""
+
+    def __init__(self):
+        self.topics: Dict[str, Set["InMemoryBackplane"]] = {}
+
+
+class InMemoryBackplane(Backplane):
+    def __init__(self, hub: Optional[MemoryHub] = None):
+        super().__init__()
+        self.hub = hub or MemoryHub()
+
+    async def subscribe(self, session_id: str):
+        await super().subscribe(session_id)
+        self.hub.topics.setdefault(topic(session_id), set()).add(self)
+
+    async def unsubscribe(self, session_id: str):
+        await super().unsubscribe(session_id)
+        nodes = self.hub.topics.get(topic(session_id))
+        if nodes is not None:
+            nodes.discard(self)
+            if not nodes:
+                del self.hub.topics[topic(session_id)]
+
+    async def publish(self, envelope: Dict[str, Any]):
+        self.published += 1
+        for node in list(self.hub.topics.get(topic(envelope["session_id"]), ())):
+            await node._received(envelope)
+
+
+class RedisBackplane(Backplane):
+    """Redis pub/sub: one channel per session, subscribed while the session has local sockets."""
+
+    def __init__(self, url: str = REDIS_URL):
+        super().__init__()
+        if aioredis is None:
+            raise RuntimeError("redis not installed. Install extra: redis")
+        self.url = url
+        self.redis = None
+        self.pubsub = None
+        self.reader: Optional[asyncio.Task] = None
+
+    async def start(self, deliver: Deliver):
+        await super().start(deliver)
+        self.redis = aioredis.from_url(self.url)
+        self.pubsub = self.redis.pubsub(ignore_subscribe_messages=True)
+
+    async def subscribe(self, session_id: str):
+        await super().subscribe(session_id)
+        await self.pubsub.subscribe(topic(session_id))
+        if self.reader is None or self.reader.done():
+            self.reader = asyncio.get_running_loop().create_task(self._read())
+
+    async def unsubscribe(self, session_id: str):
+        await super().unsubscribe(session_id)
+        await self.pubsub.unsubscribe(topic(session_id))
+
+    async def _read(self):
+        while self.sessions:
+            msg = await self.pubsub.get_message(timeout=1.0)
+            if msg is not None:
+                try:
+                    envelope = json.loads(msg["data"])
+                except (TypeError, ValueError):
+                    continue
+                await self._received(envelope)
+
+    async def publish(self, envelope: Dict[str, Any]):
+        self.published += 1
+        data = json.dumps(envelope, ensure_ascii=False)
+        await self.redis.publish(topic(envelope["session_id"]), data)
+
+    async def close(self):
+        if self.reader is not None:
+            self.reader.cancel()
+        if self.pubsub is not None:
+            await self.pubsub.aclose()
+        if self.redis is not None:
+            await self.redis.aclose()
+
+
+class MqttBackplane(Backplane):
+    """MQTT topics sessions/<id>/events on the broker the mqtt bridge already uses."""
+
+    def __init__(self, broker: str = MQTT_BROKER, port: int = MQTT_PORT):
+        super().__init__()
+        if mqtt is None:
+            raise RuntimeError("paho-mqtt not installed. Install extra: mqtt")
+        self.broker = broker
+        self.port = port
+        self.client = None
+        self.loop: Optional[asyncio.AbstractEventLoop] = None
+
+    async def start(self, deliver: Deliver):
+        await super().start(deliver)
+        self.loop = asyncio.get_running_loop()
+        self.client = mqtt.Client()
+
+        def on_connect(client, userdata, flags, rc, properties=None):
+            for sid in list(self.sessions):  # resubscribe after a reconnect
+                client.subscribe(topic(sid))
+
+        def on_message(client, userdata, msg):
+            try:
+                envelope = json.loads(msg.payload.decode("utf-8"))
+            except Exception:
+                return
+            asyncio.run_coroutine_threadsafe(self._received(envelope), self.loop)
+
+        self.client.on_connect = on_connect
+        self.client.on_message = on_message
+        self.client.connect(self.broker, self.port, 60)
+        self.client.loop_start()
+
+    async def subscribe(self, session_id: str):
+        await super().subscribe(session_id)
+        self.client.subscribe(topic(session_id))
+
+    async def unsubscribe(self, session_id: str):
+        await super().unsubscribe(session_id)
+        self.client.unsubscribe(topic(session_id))
+
+    async def publish(self, envelope: Dict[str, Any]):
+        self.published += 1
+        data = json.dumps(envelope, ensure_ascii=False)
+        self.client.publish(topic(envelope["session_id"]), data)
+
+    async def close(self):
+        if self.client is not None:
+            self.client.loop_stop()
+            self.client.disconnect()
+
+
+def make_backplane(kind: str = EVENT_BACKPLANE) -> Backplane:
+    if kind == "redis":
+        return RedisBackplane()
+    if kind == "mqtt":
+        return MqttBackplane()
+    return InMemoryBackplane()
+
+
+class EventBus:
+    """Local fan-out plus the backplane: events reach local sockets directly and other nodes
+    through the backplane; envelopes a node published itself are skipped on the way back.
+
+    A failing backplane only costs the remote copies: the error is counted, never raised to
+    the publisher, whose local delivery has already happened.
+    """
+
+    def __init__(self, local: Broadcaster, backplane: Backplane, node_id: str = NODE_ID):
+        self.local = local
+        self.backplane = backplane
+        self.node_id = node_id
+        self.echoes = 0
+        self.errors = 0
+        local.on_session = self._on_session
+
+    async def start(self):
+        await self.backplane.start(self._deliver)
+
+    async def close(self):
+        await self.backplane.close()
+
+    def _on_session(self, session_id: str, active: bool):
+        sub = self.backplane.subscribe if active else self.backplane.unsubscribe
+        asyncio.get_running_loop().create_task(sub(session_id))
+
+    async def publish(self, session_id: str, message: Dict[str, Any]):
+        await self.local.publish(session_id, message)
+        envelope = {"origin": self.node_id, "session_id": session_id, "message": message}
+        try:
+            await self.backplane.publish(envelope)
+        except Exception:
+            self.errors += 1
+
+    async def _deliver(self, envelope: Dict[str, Any]):
+        if envelope.get("origin") == self.node_id:
+            self.echoes += 1
+            return
+        await self.local.publish(envelope["session_id"], envelope["message"])
+
+    def stats(self) -> Dict[str, Any]:
+        return dict(
+            self.backplane.stats(), node_id=self.node_id, echoes=self.echoes, errors=self.errors
+        )
@@ -0,0 +1,283 @@
+from __future__ import annotations
+import asyncio
+import json
+import os
+import time
+from collections import deque
+from typing import Any, Awaitable, Callable, Deque, Dict, Optional, Set, Tuple
+from .replay import ReplayBuffer
+
+WS_SEND_QUEUE = int(os.getenv("WS_SEND_QUEUE", "64"))
+WS_SLOW_POLICY = os.getenv("WS_SLOW_POLICY", "drop_oldest")  # drop_oldest | coalesce | disconnect
+WS_HEARTBEAT_S = float(os.getenv("WS_HEARTBEAT_S", "20"))
+WS_SEND_TIMEOUT_S = float(os.getenv("WS_SEND_TIMEOUT_S", "30"))
+# Reaping clients that send nothing is opt-in: the documented client only listens, so by
+# default liveness rests on the protocol-level WebSocket ping and the send timeout.
+WS_HEARTBEAT_MISSES = int(os.getenv("WS_HEARTBEAT_MISSES", "0"))  # 0 = never reap silent clients
+
+POLICIES = ("drop_oldest", "coalesce", "disconnect")
+PING = json.dumps({"type": "Ping"})
+
+Send = Callable[[str], Awaitable[None]]
+Close = Callable[[int], Awaitable[None]]
+
+
+def coalesce_key(message: Dict[str, Any]) -> Optional[Tuple]:
+    """Events where only the latest one matters; others (e.g. transcript chunks) never merge."""
+    if message.get("type") == "JobProgress":
+        return ("JobProgress", message.get("job_id"))
+    if message.get("type") == "Ping":
+        return ("Ping",)
+    return None
+
+
+class Subscriber:
+    """One connection: a bounded send queue drained by its own writer task, so a slow
+    client only ever delays itself."""
+
+    def __init__(
+        self,
+        session_id: str,
+        send: Send,
+        close: Optional[Close] = None,
+        maxsize: int = WS_SEND_QUEUE,
+        policy: str = WS_SLOW_POLICY,
+        on_delivered: Optional[Callable[[float], None]] = None,
+    ):
+        if policy not in POLICIES:
+            raise ValueError(f"unknown slow-consumer policy: {policy}")
+        self.session_id = session_id
+        self.send = send
+        self.close_fn = close
+        self.maxsize = maxsize
+        self.policy = policy
+        self.on_delivered = on_delivered
+        self.queue: Deque[Tuple[str, Optional[Tuple], float]] = deque()
+        self.waiter: Optional[asyncio.Future] = None  # set only while the writer is idle
+        self.sending_since: Optional[float] = None
+        self.last_seen = time.monotonic()  # last Pong (or any other frame) from the client
+        self.closed = False
+        self.dropped = 0
+        self.coalesced = 0
+        self.task: Optional[asyncio.Task] = None
+
+    def start(self, on_exit: Callable[["Subscriber"], None]):
+        self.task = asyncio.get_running_loop().create_task(self._writer(on_exit))
+
+    def offer(self, data: str, key: Optional[Tuple] = None) -> bool:
+        """Queue a serialized frame without blocking; False only when this call disconnects
+        the subscriber (or it is already closed)."""
+        if self.closed:
+            return False
+        if key is not None and self.policy == "coalesce":
+            for i, (_, k, ts) in enumerate(self.queue):
+                if k == key:
+                    self.queue[i] = (data, key, ts)
+                    self.coalesced += 1
+                    return True
+        if len(self.queue) >= self.maxsize:
+            if self.policy == "disconnect":
+                self._stop()
+                asyncio.get_running_loop().create_task(self._close_socket(1013))
+                return False
+            self.queue.popleft()
+            self.dropped += 1
+        self.queue.append((data, key, time.perf_counter()))
+        if self.waiter is not None and not self.waiter.done():
+            self.waiter.set_result(None)
+        return True
+
+    async def _writer(self, on_exit: Callable[["Subscriber"], None]):
+        try:
+            loop = asyncio.get_running_loop()
+            while not self.closed:
+                if not self.queue:
+                    self.waiter = loop.create_future()
+                    await self.waiter
+                    self.waiter = None
+                    continue
+                data, _, ts = self.queue.popleft()
+                self.sending_since = time.monotonic()
+                await self.send(data)
+                self.sending_since = None
+                if self.on_delivered is not None:
+                    self.on_delivered(time.perf_counter() - ts)
+        except asyncio.CancelledError:
+            pass
+        except Exception:
+            pass  # the socket is gone
+        finally:
+            self.closed = True
+            on_exit(self)
+
+    def stalled(self, timeout_s: float) -> bool:
+        return self.sending_since is not None and time.monotonic() - self.sending_since > timeout_s
+
+    def seen(self):
+        self.last_seen = time.monotonic()
+
+    def silent(self, timeout_s: float) -> bool:
+        return time.monotonic() - self.last_seen > timeout_s
+
+    def _stop(self):
+        self.closed = True
+        if self.task is not None:
+            self.task.cancel()
+
+    async def close(self, code: int = 1000):
+        if self.closed:
+            return
+        self._stop()
+        await self._close_socket(code)
+
+    async def _close_socket(self, code: int):
+        if self.close_fn is not None:
+            try:
+                await self.close_fn(code)
+            except Exception:
+                pass
+
+
+class Broadcaster:
+    """Session fan-out: each event is serialized once and queued to every subscriber.
+
+    A heartbeat task queues a Ping to every connection every heartbeat_s; connections whose
+    send has been stuck for longer than send_timeout_s, or that have not answered (Pong) for
+    heartbeat_misses heartbeats, are closed and removed.
+    """
+
+    def __init__(
+        self,
+        maxsize: int = WS_SEND_QUEUE,
+        policy: str = WS_SLOW_POLICY,
+        heartbeat_s: float = WS_HEARTBEAT_S,
+        send_timeout_s: float = WS_SEND_TIMEOUT_S,
+        heartbeat_misses: int = WS_HEARTBEAT_MISSES,
+        on_delivered: Optional[Callable[[float], None]] = None,
+        replay: Optional[ReplayBuffer] = None,
+    ):
+        self.maxsize = maxsize
+        self.policy = policy
+        self.heartbeat_s = heartbeat_s
+        self.send_timeout_s = send_timeout_s
+        self.heartbeat_misses = heartbeat_misses
+        self.on_delivered = on_delivered
+        self.replay = replay
+        # called with (session_id, True) on its first subscriber and (session_id, False) after
+        # its last one leaves
+        self.on_session: Optional[Callable[[str, bool], None]] = None
+        self.subs: Dict[str, Set[Subscriber]] = {}
+        self.heartbeat: Optional[asyncio.Task] = None
+        self.published = 0
+        self.disconnected = 0
+        self.reaped = 0
+        self.dropped = 0
+        self.coalesced = 0
+
+    def subscribe(
+        self,
+        session_id: str,
+        send: Send,
+        close: Optional[Close] = None,
+        last_seq: Optional[int] = None,
+        epoch: Optional[str] = None,
+    ) -> Subscriber:
+        """With a replay buffer and last_seq (from the given epoch), the events after last_seq
+        are queued first; no event can slip in between the replay and the live stream."""
+        sub = Subscriber(session_id, send, close, self.maxsize, self.policy, self.on_delivered)
+        if self.replay is not None and last_seq is not None:
+            now = time.perf_counter()
+            sub.queue.extend(
+                (data, None, now) for data in self.replay.since(session_id, last_seq, epoch)
+            )
+        subs = self.subs.setdefault(session_id, set())
+        subs.add(sub)
+        if len(subs) == 1 and self.on_session is not None:
+            self.on_session(session_id, True)
+        sub.start(self._remove)
+        self._ensure_heartbeat()
+        return sub
+
+    def _remove(self, sub: Subscriber):
+        self.dropped += sub.dropped
+        self.coalesced += sub.coalesced
+        sub.dropped = sub.coalesced = 0
+        subs = self.subs.get(sub.session_id)
+        if subs is not None and sub in subs:
+            subs.discard(sub)
+            if not subs:
+                del self.subs[sub.session_id]
+                if self.on_session is not None:
+                    self.on_session(sub.session_id, False)
+
+    async def unsubscribe(self, sub: Subscriber):
+        await sub.close()
+        self._remove(sub)
+
+    async def publish(self, session_id: str, message: Dict[str, Any]) -> int:
+        """Queue message to the session's subscribers; returns how many accepted it.
+
+        With a replay buffer the event is numbered and kept even if nobody is listening yet.
+        """
+        if self.replay is not None:
+            _, data = self.replay.record(session_id, message)
+        subs = self.subs.get(session_id)
+        if not subs:
+            return 0
+        if self.replay is None:
+            data = json.dumps(message, ensure_ascii=False)
+        key = coalesce_key(message)
+        sent = 0
+        for sub in list(subs):
+            if sub.offer(data, key):
+                sent += 1
+            elif self.policy == "disconnect":
+                # slow consumer kicked; the client is expected to reconnect
+                self.disconnected += 1
+                self._remove(sub)
+        self.published += 1
+        return sent
+
+    def _ensure_heartbeat(self):
+        if self.heartbeat_s > 0 and (self.heartbeat is None or self.heartbeat.done()):
+            self.heartbeat = asyncio.get_running_loop().create_task(self._heartbeat())
+
+    async def _heartbeat(self):
+        while self.subs:
+            await asyncio.sleep(self.heartbeat_s)
+            await self.reap()
+            if self.replay is not None:
+                self.replay.evict()
+            for subs in list(self.subs.values()):
+                for sub in list(subs):
+                    sub.offer(PING, ("Ping",))
+
+    def _dead(self, sub: Subscriber) -> bool:
+        if sub.stalled(self.send_timeout_s):
+            return True
+        silent_s = self.heartbeat_s * self.heartbeat_misses
+        return silent_s > 0 and sub.silent(silent_s)
+
+    async def reap(self) -> int:
+        dead = [s for subs in self.subs.values() for s in subs if self._dead(s)]
+        for sub in dead:
+            await self.unsubscribe(sub)
+        self.reaped += len(dead)
+        return len(dead)
+
+    def sessions(self) -> Dict[str, int]:
+        return {k: len(v) for k, v in self.subs.items()}
+
+    def stats(self) -> Dict[str, Any]:
+        subs = [s for v in self.subs.values() for s in v]
+        return {
+            "sessions": len(self.subs),
+            "subscribers": len(subs),
+            "queued": sum(len(s.queue) for s in subs),
+            "published": self.published,
+            "dropped": self.dropped + sum(s.dropped for s in subs),
+            "coalesced": self.coalesced + sum(s.coalesced for s in subs),
+            "disconnected": self.disconnected,
+            "reaped": self.reaped,
+            "policy": self.policy,
+        }
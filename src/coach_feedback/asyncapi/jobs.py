@@ -0,0 +1,258 @@
+from __future__ import annotations
+import asyncio
+import os
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Tuple
+from ..schema import GenerationInput, StepEnum, TranscriptChunk
+from ..generator import generate_feedback
+from ..pipeline.voice_feedback import feedback_from_chunks, stream_transcript
+from ..pipeline.voice_feedback_cloud import cloud_feedback_from_chunks_async
+from ..pipeline.persistence import start_audio_upload
+from .. import metrics
+
+JOB_QUEUE_SIZE = int(os.getenv("JOB_QUEUE_SIZE", "16"))
+JOB_ASR_WORKERS = int(os.getenv("JOB_ASR_WORKERS", "1"))  # CPU-bound: one Whisper per worker
+JOB_LLM_WORKERS = int(os.getenv("JOB_LLM_WORKERS", "8"))  # LLM-stage coroutines on the loop
+
+Emit = Callable[[str, Dict[str, Any]], Awaitable[None]]
+
+SAMPLE_CHUNK = TranscriptChunk(
+    id="t1",
+    speaker="teacher",
+    text="지난 시간에 질문 뒤 2초를 기다리니 더 많은 학생이 손을 들었어요.",
+)
+
+
+class QueueFull(Exception):
+    pass
+
+
+class Job:
+    def __init__(self, session_id: str, msg: Dict[str, Any], key: Tuple):
+        self.id = uuid.uuid4().hex[:12]
+        self.session_id = session_id
+        self.key = key
+        self.mode = msg.get("mode", "local")
+        self.audio_ref = msg.get("audio_ref")
+        self.force_step = msg.get("force_step")
+        self.language = msg.get("language", "ko")
+        self.stage = "queued"
+        self.created = time.perf_counter()
+        self.llm_queued = 0.0
+        self.chunks: List[TranscriptChunk] = []
+        self.audio_upload = None
+        self.pipeline_session_id = str(uuid.uuid4())[:8]
+
+
+def dedupe_key(session_id: str, msg: Dict[str, Any]) -> Tuple:
+    return (
+        session_id,
+        msg.get("mode", "local"),
+        msg.get("audio_ref"),
+        msg.get("force_step"),
+        msg.get("language", "ko"),
+    )
+
+
+def asr_stage(job: Job, on_chunk: Callable[[TranscriptChunk], None]):
+    if not job.audio_ref:
+        job.chunks = [SAMPLE_CHUNK]
+        return
+    if job.mode == "cloud":
+        # the upload overlaps ASR and the LLM stage
+        job.audio_upload = start_audio_upload(job.pipeline_session_id, job.audio_ref)
+    job.chunks = list(stream_transcript(job.audio_ref, job.pipeline_session_id, on_chunk))
+
+
+async def llm_stage(job: Job) -> Dict[str, Any]:
+    if job.mode == "cloud":
+        return await cloud_feedback_from_chunks_async(
+            job.pipeline_session_id,
+            job.audio_ref,
+            job.chunks,
+            force_step=job.force_step,
+            language=job.language,
+            audio_upload=job.audio_upload,
+        )
+    return await asyncio.to_thread(_local_feedback, job)
+
+
+def _local_feedback(job: Job) -> Dict[str, Any]:
+    step = StepEnum(job.force_step) if job.force_step else None
+    if job.audio_ref:
+        fb = feedback_from_chunks(job.chunks, step, job.pipeline_session_id)
+    else:
+        gi = GenerationInput(
+            transcript_chunks=job.chunks,
+            step_focus=step or StepEnum.LINK_PRAISE_TO_STUDENT_LEARNING,
+            language=job.language,
+        )
+        fb = generate_feedback(gi)
+    return {
+        "session_id": job.session_id,
+        "step_focus": int(fb.step_focus),
+        "feedback": fb.model_dump(),
+    }
+
+
+class JobScheduler:
+    """RequestFeedback jobs: bounded admission queue -> ASR thread pool -> LLM coroutines.
+
+    ASR is CPU-bound and runs on asr_workers threads; the LLM stage is awaited on the loop by
+    llm_workers worker tasks (Bedrock calls are coroutines, so they hold no threads).
+
+    submit() returns at once (raising QueueFull when queue_size jobs are already waiting);
+    an identical request for a session that is still in flight joins the existing job.
+    Progress and results are sent through emit(session_id, event).
+    """
+
+    def __init__(
+        self,
+        queue_size: int = JOB_QUEUE_SIZE,
+        asr_workers: int = JOB_ASR_WORKERS,
+        llm_workers: int = JOB_LLM_WORKERS,
+        asr: Callable[[Job, Callable], None] = asr_stage,
+        llm: Callable[[Job], Awaitable[Dict[str, Any]]] = llm_stage,
+    ):
+        self.queue_size = queue_size
+        self.asr_workers = asr_workers
+        self.llm_workers = llm_workers
+        self.asr = asr
+        self.llm = llm
+        self.asr_pool = ThreadPoolExecutor(max_workers=asr_workers, thread_name_prefix="job-asr")
+        self.emit: Optional[Emit] = None
+        self.loop: Optional[asyncio.AbstractEventLoop] = None
+        self.asr_q: Optional[asyncio.Queue] = None
+        self.llm_q: Optional[asyncio.Queue] = None
+        self.tasks: List[asyncio.Task] = []
+        self.inflight: Dict[Tuple, Job] = {}
+        self.counts = {"accepted": 0, "deduped": 0, "rejected": 0, "done": 0, "failed": 0}
+
+    def start(self, emit: Emit):
+        loop = asyncio.get_running_loop()
+        if self.loop is loop and self.tasks:
+            return
+        self.emit, self.loop = emit, loop
+        self.asr_q = asyncio.Queue(maxsize=self.queue_size)
+        # the LLM queue only holds jobs already admitted, so it never rejects
+        self.llm_q = asyncio.Queue()
+        self.tasks = [
+            loop.create_task(self._worker(self.asr_q, self._run_asr))
+            for _ in range(self.asr_workers)
+        ] + [
+            loop.create_task(self._worker(self.llm_q, self._run_llm))
+            for _ in range(self.llm_workers)
+        ]
+
+    async def stop(self):
+        for t in self.tasks:
+            t.cancel()
+        await asyncio.gather(*self.tasks, return_exceptions=True)
+        self.tasks = []
+
+    def submit(self, session_id: str, msg: Dict[str, Any]) -> Tuple[Job, bool]:
+        """(job, duplicate) for an accepted request; raises QueueFull under backpressure."""
+        key = dedupe_key(session_id, msg)
+        job = self.inflight.get(key)
+        if job is not None:
+            self.counts["deduped"] += 1
+            return job, True
+        job = Job(session_id, msg, key)
+        try:
+            self.asr_q.put_nowait(job)
+        except asyncio.QueueFull:
+            self.counts["rejected"] += 1
+            metrics.incr("jobs.rejected")
+            raise QueueFull(f"job queue full ({self.queue_size} waiting)")
+        self.inflight[key] = job
+        self.counts["accepted"] += 1
+        return job, False
+
+    async def _progress(self, job: Job, stage: str, **extra):
+        job.stage = stage
+        await self.emit(
+            job.session_id,
+            {"type": "JobProgress", "session_id": job.session_id, "job_id": job.id, "stage": stage}
+            | extra,
+        )
+
+    async def _worker(self, q: asyncio.Queue, run: Callable[[Job], Awaitable[None]]):
+        while True:
+            job = await q.get()
+            try:
+                await run(job)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                try:
+                    await self._finish(job, error=e)
+                except Exception:
+                    pass  # reporting failed too; keep the worker alive for the next job
+
+    async def _run_asr(self, job: Job):
+        metrics.observe("jobs.queue_wait_s", time.perf_counter() - job.created)
+        await self._progress(job, "asr")
+
+        def on_chunk(ch: TranscriptChunk):
+            # called from the ASR thread; hop back to the loop to emit
+            event = {
+                "type": "TranscriptChunkAppended",
+                "session_id": job.session_id,
+                "chunk": ch.model_dump(),
+            }
+            asyncio.run_coroutine_threadsafe(self.emit(job.session_id, event), self.loop)
+
+        t0 = time.perf_counter()
+        await self.loop.run_in_executor(self.asr_pool, self.asr, job, on_chunk)
+        metrics.observe("jobs.asr_s", time.perf_counter() - t0)
+        await self._progress(job, "llm", chunks=len(job.chunks))
+        job.llm_queued = time.perf_counter()
+        await self.llm_q.put(job)
+
+    async def _run_llm(self, job: Job):
+        t0 = time.perf_counter()
+        metrics.observe("jobs.llm_queue_wait_s", t0 - job.llm_queued)
+        payload = await self.llm(job)
+        metrics.observe("jobs.llm_s", time.perf_counter() - t0)
+        await self._finish(job, payload=payload)
+
+    async def _finish(
+        self,
+        job: Job,
+        payload: Optional[Dict[str, Any]] = None,
+        error: Optional[BaseException] = None,
+    ):
+        self.inflight.pop(job.key, None)
+        metrics.observe("jobs.total_s", time.perf_counter() - job.created)
+        if error is not None:
+            self.counts["failed"] += 1
+            await self._progress(job, "failed")
+            await self.emit(
+                job.session_id,
+                {
+                    "type": "Error",
+                    "session_id": job.session_id,
+                    "job_id": job.id,
+                    "error": str(error),
+                },
+            )
+            return
+        self.counts["done"] += 1
+        await self._progress(job, "done")
+        await self.emit(job.session_id, {"type": "FeedbackCreated", "job_id": job.id, **payload})
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "queued": self.asr_q.qsize() if self.asr_q else 0,
+            "llm_queued": self.llm_q.qsize() if self.llm_q else 0,
+            "inflight": len(self.inflight),
+            "queue_size": self.queue_size,
+            "asr_workers": self.asr_workers,
+            "llm_workers": self.llm_workers,
+            **self.counts,
+        }
+
+
+JOBS = JobScheduler()
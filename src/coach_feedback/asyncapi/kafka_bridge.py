@@ -22,9 +22,8 @@ def start_bridge():
         enable_auto_commit=True,
         group_id="coach-feedback-bridge",
     )
-    import requests
+    from .publisher import CLIENT  # one keep-alive pool for the whole loop
 
-    base = os.getenv("ASYNCAPI_SERVER_URL", "http://localhost:8002")
     for msg in consumer:
         payload = msg.value
         if not isinstance(payload, dict):
@@ -33,8 +32,6 @@ def start_bridge():
             continue
         session_id = payload.get("session_id", "unknown")
         try:
-            requests.post(
-                f"{base}/commands/request-feedback/{session_id}", json=payload, timeout=10
-            )
+            CLIENT.post(f"/commands/request-feedback/{session_id}", payload, timeout=10)
         except Exception:
             pass
@@ -11,22 +11,19 @@ BROKER = os.getenv("MQTT_BROKER", "localhost")
 PORT = int(os.getenv("MQTT_PORT", "1883"))
 TOPIC_COMMAND = os.getenv("MQTT_TOPIC_COMMAND", "sessions/+/commands")
 TOPIC_FEEDBACK = os.getenv("MQTT_TOPIC_FEEDBACK", "sessions/{session_id}/feedback")
-HTTP_PUBLISH = os.getenv("ASYNCAPI_SERVER_URL", "http://localhost:8002") + "/publish/{session_id}"
 
 
 def _http_publish(session_id: str, event: dict):
-    import requests
+    from .publisher import CLIENT
 
-    url = HTTP_PUBLISH.format(session_id=session_id)
-    try:
-        requests.post(url, json=event, timeout=5)
-    except Exception:
-        pass
+    CLIENT.submit(session_id, event)
 
 
 def start_bridge():
     if mqtt is None:
         raise RuntimeError("paho-mqtt not installed. Install extra: mqtt")
+    from .publisher import CLIENT
+
     client = mqtt.Client()
 
     def on_connect(client, userdata, flags, rc, properties=None):
@@ -42,15 +39,9 @@ def start_bridge():
         session_id = parts[1] if len(parts) >= 3 else payload.get("session_id")
         if payload.get("type") != "RequestFeedback":
             return
-        # forward to HTTP command endpoint (server will run pipeline and broadcast)
-        import requests
-
-        url = (
-            os.getenv("ASYNCAPI_SERVER_URL", "http://localhost:8002")
-            + f"/commands/request-feedback/{session_id}"
-        )
+        # forward to HTTP command endpoint (server queues the job and broadcasts)
         try:
-            requests.post(url, json=payload, timeout=10)
+            CLIENT.post(f"/commands/request-feedback/{session_id}", payload, timeout=10)
         except Exception:
             pass
 
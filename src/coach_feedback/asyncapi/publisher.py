@@ -1,16 +1,160 @@
 from __future__ import annotations
+import atexit
 import os
+import random
+import threading
+import time
+from collections import deque
+from typing import Any, Deque, Dict, List, Optional
 import requests
+from requests.adapters import HTTPAdapter
 
 ASYNCAPI_SERVER = os.getenv("ASYNCAPI_SERVER_URL", "http://localhost:8002")
+PUBLISH_ASYNC = os.getenv("PUBLISH_ASYNC", "1") == "1"
+PUBLISH_BATCH_MAX = int(os.getenv("PUBLISH_BATCH_MAX", "100"))
+PUBLISH_FLUSH_S = float(os.getenv("PUBLISH_FLUSH_S", "0.02"))
+PUBLISH_QUEUE_SIZE = int(os.getenv("PUBLISH_QUEUE_SIZE", "10000"))
+PUBLISH_BACKOFF_MAX_S = float(os.getenv("PUBLISH_BACKOFF_MAX_S", "5"))
+PUBLISH_MAX_RETRIES = int(os.getenv("PUBLISH_MAX_RETRIES", "8"))
 
 
-def publish_event(session_id: str, event_type: str, payload: dict) -> bool:
-    url = f"{ASYNCAPI_SERVER}/publish/{session_id}"
+class PublisherClient:
+    """HTTP client for the event server over one keep-alive connection pool.
+
+    publish() posts a single event and waits; submit() only queues it. A background sender
+    posts queued events in batches to the bulk /publish endpoint and retries with backoff
+    while the server is unreachable, up to max_retries times; a batch the server rejects
+    with a 4xx is never retried. The queue is bounded: when full the oldest event is dropped.
+    """
+
+    def __init__(
+        self,
+        base_url: str = ASYNCAPI_SERVER,
+        batch_max: int = PUBLISH_BATCH_MAX,
+        flush_s: float = PUBLISH_FLUSH_S,
+        queue_size: int = PUBLISH_QUEUE_SIZE,
+        backoff_max_s: float = PUBLISH_BACKOFF_MAX_S,
+        max_retries: int = PUBLISH_MAX_RETRIES,
+        timeout: float = 5.0,
+        pool_size: int = 16,
+    ):
+        self.base_url = base_url.rstrip("/")
+        self.batch_max = batch_max
+        self.flush_s = flush_s
+        self.queue_size = queue_size
+        self.backoff_max_s = backoff_max_s
+        self.max_retries = max_retries
+        self.timeout = timeout
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=pool_size)
+        self.session.mount("http://", adapter)
+        self.session.mount("https://", adapter)
+        self.cond = threading.Condition()
+        self.queue: Deque[Dict[str, Any]] = deque()
+        self.inflight = 0
+        self.thread: Optional[threading.Thread] = None
+        self.sent = 0
+        self.batches = 0
+        self.retries = 0
+        self.dropped = 0
+        self.rejected = 0
+
+    def post(self, path: str, json: Any, timeout: Optional[float] = None) -> requests.Response:
+        return self.session.post(self.base_url + path, json=json, timeout=timeout or self.timeout)
+
+    def publish(self, session_id: str, message: Dict[str, Any]) -> bool:
+        try:
+            self.post(f"/publish/{session_id}", message).raise_for_status()
+            return True
+        except Exception:
+            return False
+
+    def submit(self, session_id: str, message: Dict[str, Any]):
+        with self.cond:
+            if len(self.queue) >= self.queue_size:
+                self.queue.popleft()
+                self.dropped += 1
+            self.queue.append({"session_id": session_id, "message": message})
+            if len(self.queue) >= self.batch_max:
+                self.cond.notify()
+            if self.thread is None or not self.thread.is_alive():
+                self.thread = threading.Thread(target=self._run, daemon=True)
+                self.thread.start()
+
+    def _take(self) -> List[Dict[str, Any]]:
+        n = min(len(self.queue), self.batch_max)
+        batch = [self.queue.popleft() for _ in range(n)]
+        self.inflight = len(batch)
+        return batch
+
+    def _run(self):
+        while True:
+            with self.cond:
+                self.cond.wait_for(lambda: len(self.queue) >= self.batch_max, timeout=self.flush_s)
+                batch = self._take()
+            if batch:
+                self._send(batch)
+
+    def _send(self, batch: List[Dict[str, Any]]):
+        attempt = 0
+        while True:
+            try:
+                resp = self.post("/publish", {"events": batch})
+                if 400 <= resp.status_code < 500:
+                    outcome = "rejected"  # malformed batch: resending cannot help
+                    break
+                resp.raise_for_status()
+                outcome = "sent"
+                break
+            except Exception:
+                if attempt >= self.max_retries:
+                    outcome = "dropped"
+                    break
+                attempt += 1
+                with self.cond:
+                    self.retries += 1
+                delay = min(self.backoff_max_s, 0.05 * 2**attempt)
+                time.sleep(delay * (0.5 + random.random()))
+        with self.cond:
+            if outcome == "sent":
+                self.sent += len(batch)
+                self.batches += 1
+            elif outcome == "rejected":
+                self.rejected += len(batch)
+            else:
+                self.dropped += len(batch)
+            self.inflight = 0
+            self.cond.notify_all()
+
+    def flush(self, timeout: float = 5.0) -> bool:
+        """Wait until every queued event has been posted; False on timeout."""
+        with self.cond:
+            self.cond.notify()
+            return self.cond.wait_for(lambda: not self.queue and not self.inflight, timeout)
+
+    def stats(self) -> Dict[str, Any]:
+        with self.cond:
+            return {
+                "queued": len(self.queue) + self.inflight,
+                "sent": self.sent,
+                "batches": self.batches,
+                "retries": self.retries,
+                "dropped": self.dropped,
+                "rejected": self.rejected,
+            }
+
+
+CLIENT = PublisherClient()
+atexit.register(lambda: CLIENT.flush(timeout=2.0))
+
+
+def publish_event(
+    session_id: str, event_type: str, payload: dict, fire_and_forget: bool = False
+) -> bool:
+    """With fire_and_forget the event is queued for the background sender and True returned
+    at once; otherwise it is posted now and the result returned."""
     msg = {"type": event_type, **payload}
-    try:
-        resp = requests.post(url, json=msg, timeout=5)
-        resp.raise_for_status()
+    if fire_and_forget:
+        CLIENT.submit(session_id, msg)
         return True
-    except Exception:
-        return False
+    return CLIENT.publish(session_id, msg)
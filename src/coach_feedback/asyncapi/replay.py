@@ -0,0 +1,105 @@
+from __future__ import annotations
+import json
+import os
+import time
+import uuid
+from collections import OrderedDict, deque
+from typing import Any, Deque, Dict, List, Optional, Tuple
+
+REPLAY_MAX_EVENTS = int(os.getenv("REPLAY_MAX_EVENTS", "256"))  # per session
+REPLAY_MAX_SESSIONS = int(os.getenv("REPLAY_MAX_SESSIONS", "10000"))
+REPLAY_TTL_S = float(os.getenv("REPLAY_TTL_S", "3600"))
+
+
+class _History:
+    def __init__(self, max_events: int):
+        self.events: Deque[Tuple[int, str]] = deque(maxlen=max_events)
+        self.next_seq = 1
+        self.touched = time.monotonic()
+
+
+class ReplayBuffer:
+    """Recent serialized events per session, numbered 1, 2, ... so a client can resume.
+
+    Numbers are only meaningful within one buffer, so every frame also carries the buffer's
+    epoch; a resume against another epoch (a restart, another node) or a seq this buffer never
+    issued starts over with a ReplayGap marked reset.
+
+    Sessions are kept in least-recently-active order; idle ones are evicted after ttl_s and
+    the oldest beyond max_sessions, so memory stays bounded.
+    """
+
+    def __init__(
+        self,
+        max_events: int = REPLAY_MAX_EVENTS,
+        max_sessions: int = REPLAY_MAX_SESSIONS,
+        ttl_s: float = REPLAY_TTL_S,
+    ):
+        self.max_events = max_events
+        self.max_sessions = max_sessions
+        self.ttl_s = ttl_s
+        self.epoch = uuid.uuid4().hex[:12]
+        self.sessions: "OrderedDict[str, _History]" = OrderedDict()
+        self.evicted = 0
+
+    def _history(self, session_id: str) -> _History:
+        h = self.sessions.get(session_id)
+        if h is None:
+            h = self.sessions[session_id] = _History(self.max_events)
+        h.touched = time.monotonic()
+        self.sessions.move_to_end(session_id)
+        return h
+
+    def record(self, session_id: str, message: Dict[str, Any]) -> Tuple[int, str]:
+        """Stamp message with the session's next seq and the epoch; returns (seq, frame)."""
+        h = self._history(session_id)
+        seq = h.next_seq
+        h.next_seq += 1
+        data = json.dumps({**message, "seq": seq, "epoch": self.epoch}, ensure_ascii=False)
+        h.events.append((seq, data))
+        self.evict()
+        return seq, data
+
+    def since(self, session_id: str, last_seq: int, epoch: Optional[str] = None) -> List[str]:
+        """Frames after last_seq, led by a ReplayGap frame if some were already dropped or the
+        client's position is not one this buffer issued (then every buffered frame follows)."""
+        h = self.sessions.get(session_id)
+        events = h.events if h is not None else ()
+        next_seq = h.next_seq if h is not None else 1
+        reset = (epoch is not None and epoch != self.epoch) or last_seq >= next_seq
+        if reset:
+            last_seq = 0
+        frames = [data for seq, data in events if seq > last_seq]
+        first = events[0][0] if events else next_seq
+        gap: Dict[str, Any] = {"type": "ReplayGap", "session_id": session_id, "epoch": self.epoch}
+        if first > last_seq + 1:
+            gap |= {"from_seq": last_seq + 1, "to_seq": first - 1}
+        elif not reset:
+            return frames
+        if reset:
+            gap["reset"] = True
+        frames.insert(0, json.dumps(gap))
+        return frames
+
+    def last_seq(self, session_id: str) -> int:
+        h = self.sessions.get(session_id)
+        return h.next_seq - 1 if h else 0
+
+    def evict(self, now: float | None = None) -> int:
+        now = time.monotonic() if now is None else now
+        n = 0
+        while self.sessions:
+            sid, h = next(iter(self.sessions.items()))
+            if len(self.sessions) <= self.max_sessions and now - h.touched < self.ttl_s:
+                break
+            del self.sessions[sid]
+            n += 1
+        self.evicted += n
+        return n
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "sessions": len(self.sessions),
+            "events": sum(len(h.events) for h in self.sessions.values()),
+            "evicted": self.evicted,
+        }
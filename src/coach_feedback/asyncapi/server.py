@@ -1,55 +1,120 @@
 from __future__ import annotations
 import json
 import asyncio
-from typing import Dict, Set, Any
+import os
+import uuid
+from contextlib import asynccontextmanager
+from typing import Any, Dict, Optional
 from fastapi import FastAPI, WebSocket, WebSocketDisconnect, Body
 from fastapi.responses import JSONResponse
 from jsonschema import validate, ValidationError
-from ..schema import StepEnum, TranscriptChunk
-from ..generator import generate_feedback
-from ..pipeline.voice_feedback import run_pipeline_on_audio
-from ..pipeline.voice_feedback_cloud import run_cloud_pipeline
+from ..pipeline import persistence
+from ..aws import ddb_io, s3_io
+from ..aws.bedrock_client import BEDROCK_LIMITER
+from ..audio import model_cache, transcript_cache
+from .. import metrics
+from ..llm import cache as llm_cache
 from .schemas import RequestFeedbackSchema
+from .backplane import EventBus, make_backplane
+from .broadcast import Broadcaster
+from .replay import ReplayBuffer
+from . import jobs
 
-app = FastAPI(title="Coach Feedback Event Server")
 
-# session_id -> set of websockets
-SUBS: Dict[str, Set[WebSocket]] = {}
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Optional eager Whisper load (WHISPER_WARMUP="small:cpu:int8,...") so the first
+    # RequestFeedback does not pay the model load.
+    if model_cache.WARMUP_MODELS:
+        await asyncio.to_thread(model_cache.warm_up)
+    await BUS.start()
+    jobs.JOBS.start(_broadcast)
+    persistence.WRITE_BEHIND.start()
+    yield
+    await jobs.JOBS.stop()
+    await BUS.close()
+    await asyncio.to_thread(ddb_io.WRITER.flush)
+
+
+PRESIGN_EXPIRES_S = int(os.getenv("PRESIGN_EXPIRES_S", "900"))
+
+app = FastAPI(title="Coach Feedback Event Server", lifespan=lifespan)
+
+BROADCAST = Broadcaster(
+    on_delivered=lambda s: metrics.observe("ws.delivery_s", s), replay=ReplayBuffer()
+)
+# other server instances see the same session events through the backplane (EVENT_BACKPLANE)
+BUS = EventBus(BROADCAST, make_backplane())
 
 
 async def _broadcast(session_id: str, message: dict):
-    dead = set()
-    for ws in SUBS.get(session_id, set()):
-        try:
-            await ws.send_text(json.dumps(message, ensure_ascii=False))
-        except Exception:
-            dead.add(ws)
-    if dead:
-        SUBS[session_id] -= dead
+    await BUS.publish(session_id, message)
 
 
 @app.websocket("/ws/sessions/{session_id}")
-async def ws_session(websocket: WebSocket, session_id: str):
+async def ws_session(
+    websocket: WebSocket,
+    session_id: str,
+    last_seq: Optional[int] = None,
+    epoch: Optional[str] = None,
+):
     await websocket.accept()
-    SUBS.setdefault(session_id, set()).add(websocket)
+    # all frames to this socket, replies included, go through its send queue and writer task;
+    # ?last_seq=N&epoch=E first replays the session's buffered events numbered above N (0 = all)
+    sub = BROADCAST.subscribe(session_id, websocket.send_text, websocket.close, last_seq, epoch)
+
+    def reply(msg: dict):
+        sub.offer(json.dumps(msg, ensure_ascii=False))
+
     try:
         while True:
             raw = await websocket.receive_text()
+            sub.seen()  # any frame, Pong included, shows the client is alive
             # Optionally handle incoming commands over WS
             try:
                 msg = json.loads(raw)
             except Exception:
-                await websocket.send_text(json.dumps({"type": "Error", "error": "Invalid JSON"}))
+                reply({"type": "Error", "error": "Invalid JSON"})
                 continue
             # Handle command
             if isinstance(msg, dict) and msg.get("type") == "RequestFeedback":
-                await handle_request_feedback(session_id, msg)
+                # ack right away; the job runs off this receive loop
+                reply(await handle_request_feedback(session_id, msg))
+            elif isinstance(msg, dict) and msg.get("type") == "Pong":
+                continue
             else:
-                await websocket.send_text(
-                    json.dumps({"type": "Ack", "receivedType": msg.get("type")})
-                )
+                reply({"type": "Ack", "receivedType": msg.get("type")})
     except WebSocketDisconnect:
-        SUBS.get(session_id, set()).discard(websocket)
+        pass
+    finally:
+        await BROADCAST.unsubscribe(sub)
+
+
+def _bulk_event_error(ev: Any) -> Optional[str]:
+    if not isinstance(ev, dict):
+        return "event must be an object"
+    if not isinstance(ev.get("session_id"), str) or not ev["session_id"]:
+        return "session_id must be a non-empty string"
+    if not isinstance(ev.get("message"), dict):
+        return "message must be an object"
+    return None
+
+
+@app.post("/publish")
+async def publish_bulk(body: Dict[str, Any] = Body(...)):
+    # batched form used by PublisherClient: {"events": [{"session_id": ..., "message": {...}}]}
+    # all-or-nothing: the whole batch is checked before anything is delivered, so a client
+    # never re-broadcasts part of a batch when it gets an error back
+    events = body.get("events")
+    if not isinstance(events, list):
+        return JSONResponse({"ok": False, "error": "events must be a list"}, status_code=422)
+    for i, ev in enumerate(events):
+        err = _bulk_event_error(ev)
+        if err is not None:
+            return JSONResponse({"ok": False, "error": f"events[{i}]: {err}"}, status_code=422)
+    for ev in events:
+        await _broadcast(ev["session_id"], ev["message"])
+    return JSONResponse({"ok": True, "published": len(events)})
 
 
 @app.post("/publish/{session_id}")
@@ -59,83 +124,87 @@ async def publish(session_id: str, message: Dict[str, Any] = Body(...)):
     return JSONResponse({"ok": True})
 
 
+@app.post("/uploads/presign")
+async def presign_upload(body: Dict[str, Any] = Body(...)):
+    # clients PUT the recording straight to S3, then send the returned audio_ref
+    # in RequestFeedback instead of streaming audio through this server
+    filename = os.path.basename(body.get("filename") or "audio.wav")
+    key = f"uploads/{uuid.uuid4().hex}/{filename}"
+    try:
+        expires_in = int(body.get("expires_in", PRESIGN_EXPIRES_S))
+    except (TypeError, ValueError):
+        return JSONResponse({"error": "expires_in must be an integer"}, status_code=400)
+    if expires_in <= 0:
+        return JSONResponse({"error": "expires_in must be positive"}, status_code=400)
+    expires_in = min(expires_in, PRESIGN_EXPIRES_S)  # never longer than the configured lifetime
+    try:
+        url = await asyncio.to_thread(
+            s3_io.presign_put, key, content_type=body.get("content_type"), expires_s=expires_in
+        )
+    except RuntimeError as e:
+        return JSONResponse({"error": str(e)}, status_code=503)
+    return {"url": url, "key": key, "audio_ref": s3_io.s3_uri(key), "expires_in": expires_in}
+
+
 # Convenience endpoints
 @app.get("/healthz")
 async def healthz():
-    return {"ok": True, "sessions": {k: len(v) for k, v in SUBS.items()}}
-
-
-async def handle_request_feedback(session_id: str, msg: dict):
-    # Validate payload
+    return {
+        "ok": True,
+        "sessions": BROADCAST.sessions(),
+        "broadcast": BROADCAST.stats(),
+        "backplane": BUS.stats(),
+        "replay": BROADCAST.replay.stats(),
+        "whisper": model_cache.REGISTRY.stats(),
+        "transcript_cache": transcript_cache.CACHE.stats(),
+        "bedrock_limiter": BEDROCK_LIMITER.stats(),
+        "llm_cache": llm_cache.CACHE.stats(),
+        "write_behind": persistence.WRITE_BEHIND.stats(),
+        "ddb_writer": ddb_io.WRITER.stats(),
+        "jobs": jobs.JOBS.stats(),
+        "metrics": metrics.snapshot(),
+    }
+
+
+async def handle_request_feedback(session_id: str, msg: dict) -> dict:
+    """Validate and enqueue; returns the Accepted/Busy/Error reply for the requester only.
+
+    The pipeline runs on the job scheduler's ASR/LLM pools; progress, transcript chunks and
+    FeedbackCreated are broadcast to the session as the job advances.
+    """
     try:
         validate(instance=msg, schema=RequestFeedbackSchema)
     except ValidationError as e:
-        await _broadcast(session_id, {"type": "Error", "error": f"ValidationError: {e.message}"})
-        return
-
-    mode = msg.get("mode", "local")
-    force_step = msg.get("force_step")
-    language = msg.get("language", "ko")
+        return {"type": "Error", "error": f"ValidationError: {e.message}"}
+    if msg.get("mode", "local") == "cloud" and not msg.get("audio_ref"):
+        return {"type": "Error", "error": "audio_ref required for cloud mode"}
     audio_ref = msg.get("audio_ref")
+    if s3_io.is_s3_uri(audio_ref) and not s3_io.readable_bucket(s3_io.parse_s3_uri(audio_ref)[0]):
+        return {"type": "Error", "error": "audio_ref bucket not allowed"}
 
-    async def run():
-        try:
-            if mode == "cloud":
-                if not audio_ref:
-                    # cloud without audio: return error
-                    return {"error": "audio_ref required for cloud mode"}
-                # If audio_ref is s3://..., we assume pipeline can fetch via boto3 in future; here expect local path or s3 handled in pipeline
-                result = run_cloud_pipeline(audio_ref, force_step=force_step, language=language)
-                payload = result
-            else:
-                # local mode: if no audio, create minimal feedback from sample transcript
-                if audio_ref:
-                    fb = run_pipeline_on_audio(
-                        audio_ref, preferred_step=StepEnum(force_step) if force_step else None
-                    )
-                    payload = {
-                        "session_id": session_id,
-                        "step_focus": int(fb.step_focus),
-                        "feedback": fb.model_dump(),
-                    }
-                else:
-                    # fallback: synthesize from sample transcript through generator
-                    chunks = [
-                        TranscriptChunk(
-                            id="t1",
-                            speaker="teacher",
-                            text="지난 시간에 질문 뒤 2초를 기다리니 더 많은 학생이 손을 들었어요.",
-                        )
-                    ]
-                    from ..schema import GenerationInput
-
-                    gi = GenerationInput(
-                        transcript_chunks=chunks,
-                        step_focus=StepEnum.LINK_PRAISE_TO_STUDENT_LEARNING,
-                        language=language,
-                    )
-                    fb = generate_feedback(gi)
-                    payload = {
-                        "session_id": session_id,
-                        "step_focus": int(fb.step_focus),
-                        "feedback": fb.model_dump(),
-                    }
-            return payload
-        except Exception as e:
-            return {"error": str(e)}
-
-    # run in thread to avoid blocking WS loop
-    payload = await asyncio.to_thread(lambda: asyncio.run(run()))
-    if isinstance(payload, dict) and payload.get("error"):
-        await _broadcast(session_id, {"type": "Error", "error": payload.get("error")})
-        return
-
-    # Emit FeedbackCreated
-    await _broadcast(session_id, {"type": "FeedbackCreated", **payload})
+    jobs.JOBS.start(_broadcast)
+    try:
+        job, duplicate = jobs.JOBS.submit(session_id, msg)
+    except jobs.QueueFull as e:
+        return {"type": "Busy", "session_id": session_id, "error": str(e), "retry_after": 1}
+    if not duplicate:
+        await _broadcast(
+            session_id,
+            {"type": "JobProgress", "session_id": session_id, "job_id": job.id, "stage": "queued"},
+        )
+    return {
+        "type": "Accepted",
+        "session_id": session_id,
+        "job_id": job.id,
+        "stage": job.stage,
+        "duplicate": duplicate,
+    }
 
 
 @app.post("/commands/request-feedback/{session_id}")
 async def http_request_feedback(session_id: str, message: dict = Body(...)):
     message.setdefault("type", "RequestFeedback")
-    await handle_request_feedback(session_id, message)
-    return JSONResponse({"ok": True})
+    reply = await handle_request_feedback(session_id, message)
+    status = {"Accepted": 202, "Busy": 429}.get(reply["type"], 400)
+    headers = {"Retry-After": str(reply["retry_after"])} if status == 429 else None
+    return JSONResponse(reply, status_code=status, headers=headers)
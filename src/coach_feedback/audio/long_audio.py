@@ -0,0 +1,151 @@
+from __future__ import annotations
+import multiprocessing as mp
+import os
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from typing import Iterator, List, Optional, Tuple, Union
+import numpy as np
+from .model_cache import get_model
+
+SAMPLE_RATE = 16000
+LONG_AUDIO_WORKERS = int(os.getenv("WHISPER_WORKERS", "1"))
+WINDOW_S = float(os.getenv("WHISPER_WINDOW_S", "300"))
+OVERLAP_S = float(os.getenv("WHISPER_OVERLAP_S", "2.0"))
+
+# (start_sample, end_sample, own_start_s, own_end_s): the window that is decoded and the
+# sub-range whose segments it is responsible for after stitching.
+Window = Tuple[int, int, float, float]
+
+
+def plan_windows(
+    speech: List[dict],
+    total_samples: int,
+    window_s: float = WINDOW_S,
+    overlap_s: float = OVERLAP_S,
+    sr: int = SAMPLE_RATE,
+) -> List[Window]:
+    """Cut at the silence gap nearest to each window_s boundary and pad cuts by overlap_s."""
+    target = int(window_s * sr)
+    pad = int(overlap_s * sr)
+    gaps = [
+        (a["end"] + b["start"]) // 2 for a, b in zip(speech, speech[1:]) if b["start"] > a["end"]
+    ]
+    cuts: List[int] = []
+    pos = 0
+    while total_samples - pos > target:
+        ideal = pos + target
+        candidates = [g for g in gaps if pos + target // 2 < g <= ideal]
+        cut = candidates[-1] if candidates else ideal
+        cuts.append(cut)
+        pos = cut
+    bounds = [0, *cuts, total_samples]
+    windows: List[Window] = []
+    for lo, hi in zip(bounds, bounds[1:]):
+        windows.append((max(0, lo - pad), min(total_samples, hi + pad), lo / sr, hi / sr))
+    return windows
+
+
+def stitch_window(segments: List[dict], window: Window, prev: Optional[dict]) -> List[dict]:
+    """Keep the segments whose midpoint falls inside the window's own range."""
+    _, _, own_start, own_end = window
+    kept = []
+    for seg in segments:
+        mid = (seg["start"] + seg["end"]) / 2
+        if not (own_start <= mid < own_end):
+            continue
+        last = kept[-1] if kept else prev
+        if last and seg["text"] == last["text"] and seg["start"] < last["end"]:
+            continue
+        kept.append(seg)
+    return kept
+
+
+def _init_worker(model_size: str, device: str, compute_type: str, threads: int):
+    os.environ.setdefault("OMP_NUM_THREADS", str(threads))
+    get_model(model_size, device=device, compute_type=compute_type)
+
+
+def _transcribe_window(
+    audio: np.ndarray,
+    offset_s: float,
+    model_size: str,
+    device: str,
+    compute_type: str,
+    language: Optional[str] = None,
+) -> List[dict]:
+    model = get_model(model_size, device=device, compute_type=compute_type)
+    segments_gen, _ = model.transcribe(audio, vad_filter=True, language=language)
+    return [
+        {
+            "start": offset_s + float(seg.start),
+            "end": offset_s + float(seg.end),
+            "text": seg.text.strip(),
+        }
+        for seg in segments_gen
+    ]
+
+
+_pools: dict = {}
+_pools_lock = threading.Lock()
+
+
+def _pool(workers: int, model_size: str, device: str, compute_type: str) -> ProcessPoolExecutor:
+    # Pools are kept for the life of the process so each worker loads its model once.
+    key = (workers, model_size, device, compute_type)
+    with _pools_lock:
+        pool = _pools.get(key)
+        if pool is None:
+            threads = max(1, (os.cpu_count() or 1) // workers)
+            pool = ProcessPoolExecutor(
+                max_workers=workers,
+                mp_context=mp.get_context("spawn"),
+                initializer=_init_worker,
+                initargs=(model_size, device, compute_type, threads),
+            )
+            _pools[key] = pool
+        return pool
+
+
+def iter_long_segments(
+    audio: Union[str, np.ndarray],
+    workers: Optional[int] = None,
+    model_size: str = "small",
+    device: str = "cpu",
+    compute_type: str = "int8",
+    window_s: float = WINDOW_S,
+    overlap_s: float = OVERLAP_S,
+    language: Optional[str] = None,
+) -> Iterator[dict]:
+    """Transcribe VAD-split windows in a process pool; yields stitched segments in order."""
+    from faster_whisper import decode_audio
+    from faster_whisper.vad import VadOptions, get_speech_timestamps
+
+    if isinstance(audio, str):
+        audio = decode_audio(audio, sampling_rate=SAMPLE_RATE)
+    speech = get_speech_timestamps(audio, VadOptions(min_silence_duration_ms=500))
+    windows = plan_windows(speech, len(audio), window_s=window_s, overlap_s=overlap_s)
+    pool = _pool(workers or LONG_AUDIO_WORKERS, model_size, device, compute_type)
+    futs = [
+        pool.submit(
+            _transcribe_window,
+            audio[lo:hi],
+            lo / SAMPLE_RATE,
+            model_size,
+            device,
+            compute_type,
+            language,
+        )
+        for lo, hi, _, _ in windows
+    ]
+    prev = None
+    for fut, window in zip(futs, windows):
+        for seg in stitch_window(fut.result(), window, prev):
+            prev = seg
+            yield seg
+
+
+def transcribe_long_audio(
+    audio: Union[str, np.ndarray], workers: Optional[int] = None, **kwargs
+) -> Tuple[str, List[dict]]:
+    segs = list(iter_long_segments(audio, workers=workers, **kwargs))
+    return " ".join(s["text"] for s in segs).strip(), segs
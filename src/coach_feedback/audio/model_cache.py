@@ -0,0 +1,132 @@
+from __future__ import annotations
+import os
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Optional, Tuple
+
+# Rough resident size (MB) of faster-whisper models at float16; int8 is about half.
+MODEL_SIZE_MB = {
+    "tiny": 75,
+    "base": 145,
+    "small": 480,
+    "medium": 1530,
+    "large": 3100,
+    "large-v1": 3100,
+    "large-v2": 3100,
+    "large-v3": 3100,
+    "distil-large-v3": 1500,
+}
+
+CACHE_MAX_MB = float(os.getenv("WHISPER_CACHE_MAX_MB", "4096"))
+WARMUP_MODELS = os.getenv("WHISPER_WARMUP", "")  # e.g. "small:cpu:int8,base:cpu:int8"
+
+ModelKey = Tuple[str, str, str]
+
+
+def _default_loader(model_size: str, device: str, compute_type: str):
+    from faster_whisper import WhisperModel
+
+    return WhisperModel(model_size, device=device, compute_type=compute_type)
+
+
+def estimate_model_mb(model_size: str, compute_type: str) -> float:
+    base = MODEL_SIZE_MB.get(model_size.split("/")[-1], 1000)
+    return base / 2 if compute_type.startswith("int8") else float(base)
+
+
+class WhisperModelRegistry:
+    """Process-wide LRU of loaded WhisperModels keyed by (model_size, device, compute_type)."""
+
+    def __init__(self, max_mb: float = CACHE_MAX_MB, loader=_default_loader):
+        self.max_mb = max_mb
+        self.loader = loader
+        self.lock = threading.Lock()
+        self.models: "OrderedDict[ModelKey, Any]" = OrderedDict()
+        self.sizes: Dict[ModelKey, float] = {}
+        self.key_locks: Dict[ModelKey, threading.Lock] = {}
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.load_seconds: Dict[ModelKey, float] = {}
+
+    def get(self, model_size: str = "small", device: str = "cpu", compute_type: str = "int8"):
+        key = (model_size, device, compute_type)
+        with self.lock:
+            model = self.models.get(key)
+            if model is not None:
+                self.models.move_to_end(key)
+                self.hits += 1
+                return model
+            key_lock = self.key_locks.setdefault(key, threading.Lock())
+        # Load outside the registry lock so other keys stay available; the per-key
+        # lock makes concurrent callers for the same model wait for a single load.
+        with key_lock:
+            with self.lock:
+                model = self.models.get(key)
+                if model is not None:
+                    self.models.move_to_end(key)
+                    self.hits += 1
+                    return model
+                self.misses += 1
+            t0 = time.perf_counter()
+            model = self.loader(model_size, device, compute_type)
+            elapsed = time.perf_counter() - t0
+            with self.lock:
+                self.models[key] = model
+                self.sizes[key] = estimate_model_mb(model_size, compute_type)
+                self.load_seconds[key] = elapsed
+                self._evict_locked(keep=key)
+            return model
+
+    def _evict_locked(self, keep: ModelKey):
+        while sum(self.sizes.values()) > self.max_mb and len(self.models) > 1:
+            old = next(k for k in self.models if k != keep)
+            self.models.pop(old)
+            self.sizes.pop(old, None)
+            self.evictions += 1
+
+    def warm_up(self, specs: Optional[list[ModelKey]] = None) -> None:
+        for spec in specs or parse_warmup_spec(WARMUP_MODELS):
+            self.get(*spec)
+
+    def clear(self) -> None:
+        with self.lock:
+            self.models.clear()
+            self.sizes.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        with self.lock:
+            total = self.hits + self.misses
+            return {
+                "loaded": [":".join(k) for k in self.models],
+                "resident_mb": sum(self.sizes.values()),
+                "max_mb": self.max_mb,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "hit_rate": (self.hits / total) if total else 0.0,
+                "load_seconds": {":".join(k): v for k, v in self.load_seconds.items()},
+            }
+
+
+def parse_warmup_spec(spec: str) -> list[ModelKey]:
+    out: list[ModelKey] = []
+    for item in filter(None, (s.strip() for s in spec.split(","))):
+        parts = item.split(":")
+        size = parts[0]
+        device = parts[1] if len(parts) > 1 else "cpu"
+        compute_type = parts[2] if len(parts) > 2 else "int8"
+        out.append((size, device, compute_type))
+    return out
+
+
+REGISTRY = WhisperModelRegistry()
+
+
+def get_model(model_size: str = "small", device: str = "cpu", compute_type: str = "int8"):
+    return REGISTRY.get(model_size, device, compute_type)
+
+
+def warm_up(specs: Optional[list[ModelKey]] = None) -> None:
+    REGISTRY.warm_up(specs)
@@ -1,16 +1,78 @@
 from __future__ import annotations
-from typing import List, Tuple
-from faster_whisper import WhisperModel
+from typing import Iterator, List, Optional, Tuple
+from .model_cache import get_model
+from . import long_audio
+from . import transcript_cache
+
+
+def _decode_segments(
+    audio_path: str,
+    model_size: str,
+    device: str,
+    compute_type: str,
+    workers: int,
+    language: Optional[str] = None,
+) -> Iterator[dict]:
+    if workers > 1:
+        yield from long_audio.iter_long_segments(
+            audio_path,
+            workers=workers,
+            model_size=model_size,
+            device=device,
+            compute_type=compute_type,
+            language=language,
+        )
+        return
+    model = get_model(model_size, device=device, compute_type=compute_type)
+    segments_gen, info = model.transcribe(audio_path, vad_filter=True, language=language)
+    for seg in segments_gen:
+        yield {"start": float(seg.start), "end": float(seg.end), "text": seg.text.strip()}
+
+
+def iter_segments(
+    audio_path: str,
+    model_size: str = "small",
+    device: str = "cpu",
+    compute_type: str = "int8",
+    workers: Optional[int] = None,
+    language: Optional[str] = None,
+) -> Iterator[dict]:
+    """Yield segments as faster-whisper decodes them instead of waiting for the whole file.
+
+    language=None lets Whisper detect it from the first 30 s."""
+    workers = workers or long_audio.LONG_AUDIO_WORKERS
+    if not transcript_cache.CACHE_ENABLE:
+        yield from _decode_segments(audio_path, model_size, device, compute_type, workers, language)
+        return
+    cache = transcript_cache.CACHE
+    key = transcript_cache.cache_key(
+        transcript_cache.audio_digest(audio_path),
+        model_size,
+        device,
+        compute_type,
+        language,
+        workers=workers,
+        window_s=long_audio.WINDOW_S,
+        overlap_s=long_audio.OVERLAP_S,
+    )
+    cached = cache.get(key)
+    if cached is not None:
+        yield from cached
+        return
+    segs = []
+    for seg in _decode_segments(audio_path, model_size, device, compute_type, workers, language):
+        segs.append(seg)
+        yield seg
+    cache.put(key, segs)
 
 
 def transcribe_audio(
-    audio_path: str, model_size: str = "small", device: str = "cpu", compute_type: str = "int8"
+    audio_path: str,
+    model_size: str = "small",
+    device: str = "cpu",
+    compute_type: str = "int8",
+    workers: Optional[int] = None,
 ) -> Tuple[str, List[dict]]:
-    model = WhisperModel(model_size, device=device, compute_type=compute_type)
-    segments_gen, info = model.transcribe(audio_path, vad_filter=True)
-    segs, texts = [], []
-    for seg in segments_gen:
-        segs.append({"start": float(seg.start), "end": float(seg.end), "text": seg.text.strip()})
-        texts.append(seg.text.strip())
-    full_text = " ".join(texts).strip()
+    segs = list(iter_segments(audio_path, model_size, device, compute_type, workers=workers))
+    full_text = " ".join(s["text"] for s in segs).strip()
     return full_text, segs
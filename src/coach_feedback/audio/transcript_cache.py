@@ -0,0 +1,167 @@
+from __future__ import annotations
+import hashlib
+import json
+import os
+import threading
+from collections import OrderedDict
+from typing import Any, Dict, List, Optional
+
+CACHE_ENABLE = os.getenv("TRANSCRIPT_CACHE", "1") == "1"
+CACHE_DIR = os.getenv("TRANSCRIPT_CACHE_DIR", "data/cache/transcripts")
+CACHE_MAX_MB = float(os.getenv("TRANSCRIPT_CACHE_MAX_MB", "512"))
+CACHE_S3 = os.getenv("TRANSCRIPT_CACHE_S3", "0") == "1"
+S3_PREFIX = "cache/transcripts/"
+
+
+def audio_digest(path: str, block_size: int = 1 << 20) -> str:
+    h = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(block_size), b""):
+            h.update(block)
+    return h.hexdigest()
+
+
+def cache_key(
+    digest: str,
+    model_size: str,
+    device: str,
+    compute_type: str,
+    language: Optional[str] = None,
+    workers: int = 1,
+    window_s: float = 0.0,
+    overlap_s: float = 0.0,
+) -> str:
+    """Windowed decoding (workers > 1) cuts and stitches differently from one sequential pass,
+    so its entries are keyed by the worker count and window/overlap as well."""
+    params = f"{model_size}|{device}|{compute_type}|vad|{language or 'auto'}"
+    if workers > 1:
+        params += f"|w{workers}|{window_s:g}|{overlap_s:g}"
+    return hashlib.sha256(f"{digest}|{params}".encode("utf-8")).hexdigest()
+
+
+class TranscriptCache:
+    """Content-addressed segment cache on local disk, optionally mirrored to S3.
+
+    Entry sizes are kept in an in-memory LRU index with a running total, built from one scan
+    of the directory on first use, so eviction never walks the tree again.
+    """
+
+    def __init__(self, root: str = CACHE_DIR, max_mb: float = CACHE_MAX_MB, s3: bool = CACHE_S3):
+        self.root = root
+        self.max_bytes = int(max_mb * 1024 * 1024)
+        self.s3 = s3
+        self.lock = threading.Lock()
+        self.hits = 0
+        self.s3_hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.index: Optional["OrderedDict[str, int]"] = None  # path -> size, least recent first
+        self.total = 0
+
+    def _index(self) -> "OrderedDict[str, int]":
+        # caller holds self.lock
+        if self.index is None:
+            entries = []
+            for dirpath, _, files in os.walk(self.root):
+                for name in files:
+                    if name.endswith(".json"):
+                        p = os.path.join(dirpath, name)
+                        try:
+                            st = os.stat(p)
+                        except OSError:
+                            continue
+                        entries.append((st.st_mtime, p, st.st_size))
+            self.index = OrderedDict((p, size) for _, p, size in sorted(entries))
+            self.total = sum(self.index.values())
+        return self.index
+
+    def _touch(self, path: str, size: Optional[int] = None) -> None:
+        with self.lock:
+            index = self._index()
+            if size is not None:
+                self.total += size - index.get(path, 0)
+                index[path] = size
+            if path in index:
+                index.move_to_end(path)
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.root, key[:2], key + ".json")
+
+    def get(self, key: str) -> Optional[List[dict]]:
+        path = self._path(key)
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                segs = json.load(f)["segments"]
+            os.utime(path)  # mtime orders the index rebuilt by the next process
+            self._touch(path)
+            with self.lock:
+                self.hits += 1
+            return segs
+        except (OSError, ValueError, KeyError):
+            pass
+        if self.s3:
+            try:
+                from ..aws.s3_io import get_json
+
+                obj = get_json(S3_PREFIX + key + ".json")
+            except Exception:
+                obj = None
+            if obj is not None:
+                self._write_local(key, obj)
+                with self.lock:
+                    self.s3_hits += 1
+                return obj["segments"]
+        with self.lock:
+            self.misses += 1
+        return None
+
+    def put(self, key: str, segments: List[dict]) -> None:
+        obj = {"segments": segments}
+        self._write_local(key, obj)
+        if self.s3:
+            try:
+                from ..aws.s3_io import upload_json
+
+                upload_json(obj, S3_PREFIX + key + ".json")
+            except Exception:
+                pass
+        self._evict()
+
+    def _write_local(self, key: str, obj: Dict[str, Any]) -> None:
+        path = self._path(key)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        tmp = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump(obj, f, ensure_ascii=False)
+        size = os.path.getsize(tmp)
+        os.replace(tmp, path)
+        self._touch(path, size)
+
+    def _evict(self) -> None:
+        while True:
+            with self.lock:
+                index = self._index()
+                if self.total <= self.max_bytes or not index:
+                    return
+                p, size = index.popitem(last=False)
+                self.total -= size
+            try:
+                os.remove(p)
+            except OSError:
+                continue  # already gone (another process): just forget it
+            with self.lock:
+                self.evictions += 1
+
+    def stats(self) -> Dict[str, Any]:
+        with self.lock:
+            total = self.hits + self.s3_hits + self.misses
+            return {
+                "hits": self.hits,
+                "s3_hits": self.s3_hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "hit_rate": ((self.hits + self.s3_hits) / total) if total else 0.0,
+            }
+
+
+CACHE = TranscriptCache()
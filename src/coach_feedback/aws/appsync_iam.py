@@ -2,21 +2,18 @@ from __future__ import annotations
 from typing import Optional, Dict, Any
 import json
 import requests
-import boto3
 from botocore.awsrequest import AWSRequest
 from botocore.auth import SigV4Auth
 from botocore.credentials import ReadOnlyCredentials
-from .config import AWS_REGION, AWS_PROFILE
+from .config import AWS_REGION
+from . import clients
 
-
-def _session():
-    if AWS_PROFILE:
-        return boto3.Session(profile_name=AWS_PROFILE, region_name=AWS_REGION)
-    return boto3.Session(region_name=AWS_REGION)
+# keep-alive connections to the AppSync endpoint are reused across calls
+_http = requests.Session()
 
 
 def _creds():
-    sess = _session()
+    sess = clients.session()
     creds = sess.get_credentials()
     frozen = creds.get_frozen_credentials()
     return ReadOnlyCredentials(frozen.access_key, frozen.secret_key, frozen.token)
@@ -42,7 +39,6 @@ def post_graphql_iam(
     SigV4Auth(_creds(), "appsync", AWS_REGION).add_auth(req)
     prepared = requests.PreparedRequest()
     prepared.prepare(method=req.method, url=req.url, headers=dict(req.headers.items()), data=body)
-    with requests.Session() as s:
-        resp = s.send(prepared, timeout=20)
-        resp.raise_for_status()
-        return resp.json()
+    resp = _http.send(prepared, timeout=20)
+    resp.raise_for_status()
+    return resp.json()
@@ -0,0 +1,180 @@
+from __future__ import annotations
+import asyncio
+import json
+import random
+import time
+import weakref
+from typing import Any, Dict, List, Optional
+from urllib.parse import quote
+from botocore.auth import SigV4Auth
+from botocore.awsrequest import AWSRequest
+import numpy as np
+from .config import AWS_REGION, BEDROCK_MODEL_ID
+from . import clients
+from .bedrock_client import (
+    FALLBACK_FEEDBACK,
+    _limiter,
+    _claude_body,
+    _cacheable,
+    _claude_text,
+    _parse_score,
+    build_feedback_prompt,
+    build_step_classifier_prompt,
+)
+from ..llm.rate import TokenBucketLimiter, is_throttle
+from ..llm import cache as llm_cache
+from .. import metrics
+
+try:
+    import httpx
+except Exception:
+    httpx = None
+
+MAX_CONNECTIONS = 64
+
+# httpx.AsyncClient is bound to the loop it was first used on, so keep one per loop.
+_http_clients: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, Any]" = (
+    weakref.WeakKeyDictionary()
+)
+
+
+def _http():
+    if httpx is None:
+        raise RuntimeError("httpx not installed. Install extra: async")
+    loop = asyncio.get_running_loop()
+    cli = _http_clients.get(loop)
+    if cli is None:
+        limits = httpx.Limits(
+            max_connections=MAX_CONNECTIONS, max_keepalive_connections=MAX_CONNECTIONS
+        )
+        cli = httpx.AsyncClient(limits=limits)
+        _http_clients[loop] = cli
+    return cli
+
+
+def _signed_request(model_id: str, body: bytes) -> tuple[str, Dict[str, str]]:
+    url = (
+        f"https://bedrock-runtime.{AWS_REGION}.amazonaws.com"
+        f"/model/{quote(model_id, safe='')}/invoke"
+    )
+    headers = {"Content-Type": "application/json", "Accept": "application/json"}
+    req = AWSRequest(method="POST", url=url, data=body, headers=headers)
+    creds = clients.session().get_credentials().get_frozen_credentials()
+    SigV4Auth(creds, "bedrock", AWS_REGION).add_auth(req)
+    return url, dict(req.headers.items())
+
+
+async def _invoke_claude_async(
+    prompt: str,
+    system: Optional[str] = None,
+    max_tokens: int = 400,
+    temperature: float = 0.2,
+    timeout_s: int = 20,
+) -> str:
+    body = json.dumps(_claude_body(prompt, system, max_tokens, temperature)).encode("utf-8")
+    url, headers = _signed_request(BEDROCK_MODEL_ID, body)
+    resp = await _http().post(url, content=body, headers=headers, timeout=timeout_s)
+    resp.raise_for_status()
+    return _claude_text(resp.json())
+
+
+async def _invoke_limited_async(
+    limiter: TokenBucketLimiter,
+    prompt: str,
+    system: Optional[str],
+    max_tokens: int,
+    temperature: float,
+    timeout_s: int,
+) -> str:
+    key = llm_cache.CACHE.key(BEDROCK_MODEL_ID, system, prompt, max_tokens, temperature)
+    if key:
+        hit = await asyncio.to_thread(llm_cache.CACHE.get, key)
+        if hit is not None:
+            return hit
+    await limiter.acquire_async()
+    try:
+        out = await _invoke_claude_async(
+            prompt,
+            system=system,
+            max_tokens=max_tokens,
+            temperature=temperature,
+            timeout_s=timeout_s,
+        )
+    except Exception as e:
+        if is_throttle(e):
+            limiter.on_throttle()
+        raise
+    limiter.on_success()
+    if key and _cacheable(system, out):
+        await asyncio.to_thread(llm_cache.CACHE.put, key, out)
+    return out
+
+
+async def _retry_async(fn, retries: int = 2, base: float = 0.6, cap: float = 2.5):
+    for i in range(retries + 1):
+        try:
+            return await fn()
+        except Exception:
+            if i == retries:
+                raise
+            await asyncio.sleep(min(cap, base * (2**i)) + random.random() * 0.2)
+
+
+async def score_chunks_steps_async(
+    texts: List[str],
+    step_ids: List[int] = list(range(1, 13)),
+    max_concurrency: int = 24,
+    timeout_s: int = 20,
+    retries: int = 2,
+    calls_per_sec: Optional[float] = None,
+    limiter: Optional[TokenBucketLimiter] = None,
+) -> List[Dict[int, float]]:
+    """Async counterpart of score_chunks_steps: one loop, no thread per in-flight call."""
+    limiter = limiter or _limiter(calls_per_sec)
+    sem = asyncio.Semaphore(max_concurrency)
+    results: List[Dict[int, float]] = [dict() for _ in texts]
+
+    async def task(ci: int, sid: int):
+        prompt = build_step_classifier_prompt(texts[ci], sid)
+
+        async def call():
+            return _parse_score(
+                await _invoke_limited_async(
+                    limiter,
+                    prompt,
+                    system="Classify coaching step",
+                    max_tokens=200,
+                    temperature=0.0,
+                    timeout_s=timeout_s,
+                )
+            )
+
+        async with sem:
+            results[ci][sid] = await _retry_async(call, retries=retries)
+
+    await asyncio.gather(*(task(ci, sid) for ci in range(len(texts)) for sid in step_ids))
+    return results
+
+
+async def generate_feedback_cloud_async(
+    transcript: List[Dict[str, Any]],
+    step_focus: int,
+    language: str = "ko",
+    scores: Optional[np.ndarray] = None,
+) -> Dict[str, Any]:
+    prompt = build_feedback_prompt(transcript, step_focus, language=language, scores=scores)
+    t0 = time.perf_counter()
+    out = await _invoke_limited_async(
+        _limiter(None),
+        prompt,
+        system="Generate instructional coaching feedback",
+        max_tokens=600,
+        temperature=0.2,
+        timeout_s=60,
+    )
+    metrics.observe("feedback.generation_s", time.perf_counter() - t0)
+    try:
+        data = json.loads(out)
+    except Exception:
+        data = dict(FALLBACK_FEEDBACK)
+    return data
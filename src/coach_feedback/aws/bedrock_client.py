@@ -1,16 +1,28 @@
 from __future__ import annotations
-from typing import List, Dict, Any, Optional
+from typing import Callable, List, Dict, Any, Optional
 import json
-import boto3
-from botocore.config import Config
 import time
 import random
 from concurrent.futures import ThreadPoolExecutor, as_completed
-from .config import AWS_REGION, AWS_PROFILE, BEDROCK_MODEL_ID
-from jinja2 import Template
-from ..templates_loader import load_template
+import re
+import numpy as np
+from .config import (
+    BEDROCK_MODEL_ID,
+    CLASSIFY_BATCH_CHUNKS,
+    CLASSIFY_MODE,
+    BEDROCK_RATE,
+    BEDROCK_BURST,
+    BEDROCK_MAX_RATE,
+)
+from . import clients
+from ..templates_loader import render_template
 from ..llm.parallel import parallel_scores_per_step
-from ..llm.rate import SimpleRateLimiter
+from ..llm.rate import TokenBucketLimiter, is_throttle
+from ..llm import cache as llm_cache
+from ..llm.tokens import estimate_tokens
+from ..scoring import scores_to_matrix
+from ..compaction import COMPACT_TRANSCRIPT, compact_transcript
+from .. import metrics
 
 STEP_NAMES = {
     1: "Review prior progress",
@@ -28,19 +40,111 @@ STEP_NAMES = {
 }
 
 
-def _session():
-    if AWS_PROFILE:
-        return boto3.Session(profile_name=AWS_PROFILE, region_name=AWS_REGION)
-    return boto3.Session(region_name=AWS_REGION)
+# Process-wide adaptive limiter so concurrent sessions share one view of the Bedrock quota.
+BEDROCK_LIMITER = TokenBucketLimiter(
+    rate=BEDROCK_RATE, burst=BEDROCK_BURST, max_rate=BEDROCK_MAX_RATE
+)
 
 
-def _bedrock_runtime():
-    return _session().client("bedrock-runtime", region_name=AWS_REGION)
+def _limiter(calls_per_sec: Optional[float]) -> TokenBucketLimiter:
+    if calls_per_sec is None:
+        return BEDROCK_LIMITER
+    # an explicit rate is treated as a ceiling: AIMD may only back off from it
+    return TokenBucketLimiter(rate=calls_per_sec, burst=calls_per_sec, max_rate=calls_per_sec)
+
+
+Validate = Callable[[str], bool]
+
+
+def _is_score(out: str) -> bool:
+    try:
+        float(json.loads(out)["score"])
+        return True
+    except Exception:
+        return False
+
+
+def _is_json_object(out: str) -> bool:
+    try:
+        return isinstance(json.loads(out), dict)
+    except Exception:
+        return False
+
+
+# what a response must parse as before it may be cached, by the system prompt that asked
+_RESPONSE_CHECKS: Dict[str, Validate] = {
+    "Classify coaching step": _is_score,
+    "Generate instructional coaching feedback": _is_json_object,
+}
+
+
+def _cacheable(system: Optional[str], out: str, valid: Optional[Validate] = None) -> bool:
+    check = valid or _RESPONSE_CHECKS.get(system or "")
+    return check is None or check(out)
+
+
+def _cached(
+    prompt: str,
+    system: Optional[str],
+    max_tokens: int,
+    temperature: float,
+    fn,
+    valid: Optional[Validate] = None,
+):
+    """Serve from the response cache, else call fn. Only responses that parse (valid, or the
+    check for this system prompt) are stored, so a malformed reply is never replayed."""
+    key = llm_cache.CACHE.key(BEDROCK_MODEL_ID, system, prompt, max_tokens, temperature)
+    if key:
+        hit = llm_cache.CACHE.get(key)
+        if hit is not None:
+            return hit
+    out = fn()
+    if key and _cacheable(system, out, valid):
+        llm_cache.CACHE.put(key, out)
+    return out
+
+
+def _invoke_limited(
+    limiter: TokenBucketLimiter,
+    prompt: str,
+    system: Optional[str],
+    max_tokens: int,
+    temperature: float,
+    timeout_s: int,
+    valid: Optional[Validate] = None,
+) -> str:
+    """Cache lookup first (hits spend no rate-limit tokens), then a paced Bedrock call."""
+
+    def call():
+        limiter.acquire()
+        try:
+            out = _invoke_claude_cfg(
+                prompt,
+                system=system,
+                max_tokens=max_tokens,
+                temperature=temperature,
+                timeout_s=timeout_s,
+            )
+        except Exception as e:
+            if is_throttle(e):
+                limiter.on_throttle()
+            raise
+        limiter.on_success()
+        return out
+
+    return _cached(prompt, system, max_tokens, temperature, call, valid)
+
+
+# Connection pool of the runtime clients; raised to the largest executor size in use.
+_pool = {"size": 12}
+
+
+def _ensure_pool(max_workers: int) -> None:
+    _pool["size"] = max(_pool["size"], max_workers)
 
 
 def render_with_jinja2(tpl_name: str, **ctx) -> str:
-    tpl = load_template(tpl_name)
-    return Template(tpl).render(**ctx)
+    return render_template(tpl_name, **ctx)
 
 
 def build_step_classifier_prompt(chunk_text: str, step_id: int) -> str:
@@ -49,47 +153,96 @@ def build_step_classifier_prompt(chunk_text: str, step_id: int) -> str:
     )
 
 
+def build_step_classifier_batch_prompt(chunk_texts: List[str], step_ids: List[int]) -> str:
+    return render_with_jinja2(
+        "step_classifier_batch.j2",
+        steps=[(sid, STEP_NAMES[sid]) for sid in step_ids],
+        texts=chunk_texts,
+    )
+
+
 def build_feedback_prompt(
-    transcript: List[Dict[str, Any]], step_focus: int, language: str = "ko"
+    transcript: List[Dict[str, Any]],
+    step_focus: int,
+    language: str = "ko",
+    scores: Optional[np.ndarray] = None,
+    compact: bool = COMPACT_TRANSCRIPT,
 ) -> str:
-    return render_with_jinja2(
+    transcript_json = json.dumps(transcript, ensure_ascii=False)
+    transcript_text = ""
+    if compact:
+        transcript_text, _ = compact_transcript(transcript, step_focus, scores=scores)
+    prompt = render_with_jinja2(
         "feedback_generator.j2",
-        transcript_json=json.dumps(transcript, ensure_ascii=False),
+        transcript_json="" if transcript_text else transcript_json,
+        transcript_text=transcript_text,
         step_focus=step_focus,
         language=language,
     )
+    metrics.observe("feedback.transcript_tokens_json", estimate_tokens(transcript_json))
+    metrics.observe("feedback.prompt_tokens", estimate_tokens(prompt))
+    return prompt
 
 
-def _invoke_claude(
-    prompt: str, system: Optional[str] = None, max_tokens: int = 400, temperature: float = 0.2
-) -> str:
-    runtime = _bedrock_runtime()
-    model_id = BEDROCK_MODEL_ID
+def _claude_body(
+    prompt: str, system: Optional[str], max_tokens: int, temperature: float
+) -> Dict[str, Any]:
     messages = []
     if system:
         messages.append({"role": "system", "content": [{"type": "text", "text": system}]})
     messages.append({"role": "user", "content": [{"type": "text", "text": prompt}]})
-    body = {
+    return {
         "anthropic_version": "bedrock-2023-05-31",
         "max_tokens": max_tokens,
         "temperature": temperature,
         "messages": messages,
     }
-    resp = runtime.invoke_model(
-        modelId=model_id,
-        body=json.dumps(body).encode("utf-8"),
-        accept="application/json",
-        contentType="application/json",
-    )
-    payload = json.loads(resp["body"].read().decode("utf-8"))
-    parts = payload.get("content", [])
+
+
+def _claude_text(payload: Dict[str, Any]) -> str:
     text = ""
-    for p in parts:
+    for p in payload.get("content", []):
         if p.get("type") == "text":
             text += p.get("text", "")
     return text
 
 
+def _parse_score(out: str) -> float:
+    try:
+        data = json.loads(out)
+        return float(data.get("score", 0.0))
+    except Exception:
+        return 0.0
+
+
+FALLBACK_FEEDBACK = {
+    "praise": "수업에서 잘한 점을 구체적으로 칭찬합니다.",
+    "improvement": "다음 수업에서 시도할 1가지 개선 행동을 제안합니다.",
+    "why_it_matters": "교육적 근거를 간단히 설명합니다.",
+    "evidence_quote": ["(인용 불가)"],
+    "student_learning_link": "칭찬을 학생 학습과 명시적으로 연결합니다.",
+    "next_step": "다음 액션 스텝을 한 가지 지시합니다.",
+}
+
+
+def _invoke_claude(
+    prompt: str,
+    system: Optional[str] = None,
+    max_tokens: int = 400,
+    temperature: float = 0.2,
+    timeout_s: int = 60,
+    retries: int = 2,
+) -> str:
+    """Cached Bedrock call paced by the shared BEDROCK_LIMITER, retried with backoff; its
+    throttles feed the limiter's AIMD."""
+    return _retry(
+        lambda: _invoke_limited(
+            BEDROCK_LIMITER, prompt, system, max_tokens, temperature, timeout_s
+        ),
+        retries=retries,
+    )
+
+
 def classify_chunk_parallel_scores_concurrent(
     chunk_text: str, step_ids: List[int] = list(range(1, 13))
 ) -> Dict[int, float]:
@@ -98,41 +251,37 @@ def classify_chunk_parallel_scores_concurrent(
         out = _invoke_claude(
             prompt, system="Classify coaching step", max_tokens=200, temperature=0.0
         )
-        try:
-            data = json.loads(out)
-            return float(data.get("score", 0.0))
-        except Exception:
-            return 0.0
+        return _parse_score(out)
 
     return parallel_scores_per_step(step_ids, scorer=scorer, max_workers=min(12, len(step_ids)))
 
 
 def generate_feedback_cloud(
-    transcript: List[Dict[str, Any]], step_focus: int, language: str = "ko"
+    transcript: List[Dict[str, Any]],
+    step_focus: int,
+    language: str = "ko",
+    scores: Optional[np.ndarray] = None,
 ) -> Dict[str, Any]:
-    prompt = build_feedback_prompt(transcript, step_focus, language=language)
+    prompt = build_feedback_prompt(transcript, step_focus, language=language, scores=scores)
+    t0 = time.perf_counter()
     out = _invoke_claude(
         prompt, system="Generate instructional coaching feedback", max_tokens=600, temperature=0.2
     )
+    metrics.observe("feedback.generation_s", time.perf_counter() - t0)
     try:
         data = json.loads(out)
     except Exception:
-        data = {
-            "praise": "수업에서 잘한 점을 구체적으로 칭찬합니다.",
-            "improvement": "다음 수업에서 시도할 1가지 개선 행동을 제안합니다.",
-            "why_it_matters": "교육적 근거를 간단히 설명합니다.",
-            "evidence_quote": ["(인용 불가)"],
-            "student_learning_link": "칭찬을 학생 학습과 명시적으로 연결합니다.",
-            "next_step": "다음 액션 스텝을 한 가지 지시합니다.",
-        }
+        data = dict(FALLBACK_FEEDBACK)
     return data
 
 
-
-
 def _bedrock_runtime_cfg(timeout_s: int = 20, max_attempts: int = 0):
-    cfg = Config(read_timeout=timeout_s, retries={"max_attempts": max_attempts})
-    return _session().client("bedrock-runtime", region_name=AWS_REGION, config=cfg)
+    return clients.client(
+        "bedrock-runtime",
+        timeout_s=timeout_s,
+        max_attempts=max_attempts,
+        max_pool_connections=_pool["size"],
+    )
 
 
 def _invoke_claude_cfg(
@@ -140,29 +289,14 @@ def _invoke_claude_cfg(
 ):
     rt = _bedrock_runtime_cfg(timeout_s=timeout_s, max_attempts=0)
     model_id = BEDROCK_MODEL_ID
-    messages = []
-    if system:
-        messages.append({"role": "system", "content": [{"type": "text", "text": system}]})
-    messages.append({"role": "user", "content": [{"type": "text", "text": prompt}]})
-    body = {
-        "anthropic_version": "bedrock-2023-05-31",
-        "max_tokens": max_tokens,
-        "temperature": temperature,
-        "messages": messages,
-    }
+    body = _claude_body(prompt, system, max_tokens, temperature)
     resp = rt.invoke_model(
         modelId=model_id,
         body=json.dumps(body).encode("utf-8"),
         accept="application/json",
         contentType="application/json",
     )
-    payload = json.loads(resp["body"].read().decode("utf-8"))
-    parts = payload.get("content", [])
-    text = ""
-    for p in parts:
-        if p.get("type") == "text":
-            text += p.get("text", "")
-    return text
+    return _claude_text(json.loads(resp["body"].read().decode("utf-8")))
 
 
 def _retry(fn, retries: int = 2, base: float = 0.6, cap: float = 2.5):
@@ -180,58 +314,171 @@ def _retry(fn, retries: int = 2, base: float = 0.6, cap: float = 2.5):
         raise last_err
 
 
+def _score_single_step(
+    text: str, sid: int, limiter: TokenBucketLimiter, timeout_s: int, retries: int
+) -> float:
+    prompt = build_step_classifier_prompt(text, sid)
+
+    def call():
+        out = _invoke_limited(
+            limiter,
+            prompt,
+            system="Classify coaching step",
+            max_tokens=200,
+            temperature=0.0,
+            timeout_s=timeout_s,
+        )
+        return _parse_score(out)
+
+    return _retry(call, retries=retries)
+
+
 def score_chunks_steps(
     texts: list[str],
     step_ids: list[int] = list(range(1, 13)),
     max_workers: int = 24,
     timeout_s: int = 20,
     retries: int = 2,
-    calls_per_sec: float = 8.0,
-    initial_stagger_ms: int = 50,
+    calls_per_sec: Optional[float] = None,
+    initial_stagger_ms: int = 0,
+    limiter: Optional[TokenBucketLimiter] = None,
 ) -> list[dict[int, float]]:
     """Return per-chunk dict of step->score using multi-chunk×multi-step parallel calls with retry and rate limit."""
-    limiter = SimpleRateLimiter(calls_per_sec)
+    limiter = limiter or _limiter(calls_per_sec)
+    _ensure_pool(max_workers)
     results: list[dict[int, float]] = [dict() for _ in texts]
 
     def task(ci: int, sid: int):
-        prompt = build_step_classifier_prompt(texts[ci], sid)
+        results[ci][sid] = _score_single_step(texts[ci], sid, limiter, timeout_s, retries)
+
+    with ThreadPoolExecutor(max_workers=max_workers) as ex:
+        # bursts are smoothed by the token bucket; optional stagger kept for callers that ask
+        futs = []
+        for ci, _ in enumerate(texts):
+            for sid in step_ids:
+                futs.append(ex.submit(task, ci, sid))
+                if initial_stagger_ms:
+                    time.sleep(initial_stagger_ms / 1000.0)
+        for f in as_completed(futs):
+            _ = f.result()
+    return results
+
+
+def pack_chunks(
+    texts: list[str], token_budget: int = 1500, max_chunks_per_call: int = CLASSIFY_BATCH_CHUNKS
+) -> list[list[int]]:
+    """Group chunk indices so each batched prompt stays under token_budget input tokens."""
+    batches: list[list[int]] = []
+    cur: list[int] = []
+    used = 0
+    for i, t in enumerate(texts):
+        cost = estimate_tokens(t) + 4
+        if cur and (used + cost > token_budget or len(cur) >= max_chunks_per_call):
+            batches.append(cur)
+            cur, used = [], 0
+        cur.append(i)
+        used += cost
+    if cur:
+        batches.append(cur)
+    return batches
+
+
+def parse_batch_scores(out: str, n_texts: int, step_ids: list[int]) -> list[dict[int, float]]:
+    """Parse a batched score response; steps missing or malformed for a text are left out."""
+    parsed: list[dict[int, float]] = [dict() for _ in range(n_texts)]
+    m = re.search(r"\{.*\}", out or "", re.S)
+    if not m:
+        return parsed
+    try:
+        data = json.loads(m.group(0))
+    except Exception:
+        return parsed
+    rows = data.get("results", []) if isinstance(data, dict) else []
+    for pos, row in enumerate(rows if isinstance(rows, list) else []):
+        if not isinstance(row, dict):
+            continue
+        idx = row.get("index", pos)
+        scores = row.get("scores")
+        if not isinstance(idx, int) or not 0 <= idx < n_texts or not isinstance(scores, dict):
+            continue
+        for sid in step_ids:
+            v = scores.get(str(sid), scores.get(sid))
+            try:
+                parsed[idx][sid] = min(1.0, max(0.0, float(v)))
+            except (TypeError, ValueError):
+                continue
+    return parsed
+
+
+def score_chunks_steps_batched(
+    texts: list[str],
+    step_ids: list[int] = list(range(1, 13)),
+    token_budget: int = 1500,
+    max_chunks_per_call: int = CLASSIFY_BATCH_CHUNKS,
+    max_workers: int = 8,
+    timeout_s: int = 30,
+    retries: int = 2,
+    calls_per_sec: Optional[float] = None,
+    limiter: Optional[TokenBucketLimiter] = None,
+) -> list[dict[int, float]]:
+    """Score all steps for several chunks per call; malformed entries fall back per step."""
+    limiter = limiter or _limiter(calls_per_sec)
+    _ensure_pool(max_workers)
+    results: list[dict[int, float]] = [dict() for _ in texts]
+
+    def task(batch: list[int]):
+        prompt = build_step_classifier_batch_prompt([texts[i] for i in batch], step_ids)
+
+        def complete(out: str) -> bool:
+            rows = parse_batch_scores(out, len(batch), step_ids)
+            return all(len(row) == len(step_ids) for row in rows)
 
         def call():
-            limiter.acquire()
-            out = _invoke_claude_cfg(
+            return _invoke_limited(
+                limiter,
                 prompt,
-                system="Classify coaching step",
-                max_tokens=200,
+                system="Classify coaching steps",
+                max_tokens=60 + 110 * len(batch),
                 temperature=0.0,
                 timeout_s=timeout_s,
+                valid=complete,
             )
-            try:
-                data = json.loads(out)
-                return float(data.get("score", 0.0))
-            except Exception:
-                return 0.0
 
-        sc = _retry(call, retries=retries)
-        results[ci][sid] = sc
+        try:
+            parsed = parse_batch_scores(_retry(call, retries=retries), len(batch), step_ids)
+        except Exception:
+            parsed = [dict() for _ in batch]
+        for pos, ci in enumerate(batch):
+            results[ci] = parsed[pos]
+            for sid in step_ids:
+                if sid not in results[ci]:
+                    results[ci][sid] = _score_single_step(
+                        texts[ci], sid, limiter, timeout_s, retries
+                    )
 
     with ThreadPoolExecutor(max_workers=max_workers) as ex:
-        # initial staggering to avoid burst
-        futs = []
-        for ci, _ in enumerate(texts):
-            for sid in step_ids:
-                futs.append(ex.submit(task, ci, sid))
-                time.sleep(initial_stagger_ms / 1000.0)
+        futs = [ex.submit(task, b) for b in pack_chunks(texts, token_budget, max_chunks_per_call)]
         for f in as_completed(futs):
             _ = f.result()
     return results
 
 
-def top_step_per_chunk(texts: list[str]) -> list[int]:
-    scores = score_chunks_steps(texts)
-    tops = []
-    for d in scores:
-        if not d:
-            tops.append(11)
-        else:
-            tops.append(max(d, key=lambda k: d[k]))
-    return tops
+def score_chunks(texts: list[str], mode: str = CLASSIFY_MODE) -> list[dict[int, float]]:
+    if mode == "batched":
+        return score_chunks_steps_batched(texts)
+    if mode == "per_step":
+        return score_chunks_steps(texts)
+    if mode == "cascade":
+        from ..cascade import cascade_score_chunks, default_local_scorer
+
+        return cascade_score_chunks(texts, local_scorer=default_local_scorer())[0]
+    raise ValueError(f"unknown classify mode: {mode}")
+
+
+def score_matrix(texts: list[str], mode: str = CLASSIFY_MODE) -> np.ndarray:
+    return scores_to_matrix(score_chunks(texts, mode=mode))
+
+
+def top_step_per_chunk(texts: list[str], mode: str = CLASSIFY_MODE) -> list[int]:
+    m = score_matrix(texts, mode=mode)
+    return np.where(m.max(axis=1) > 0, m.argmax(axis=1) + 1, 11).tolist() if len(m) else []
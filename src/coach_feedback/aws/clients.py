@@ -0,0 +1,74 @@
+from __future__ import annotations
+import threading
+from typing import Any, Dict, Optional, Tuple
+import boto3
+from botocore.config import Config
+from .config import AWS_REGION, AWS_PROFILE
+
+# boto3 Sessions are not thread-safe, so creation happens under one lock; the resulting
+# low-level clients are thread-safe and shared process-wide.
+_lock = threading.Lock()
+_sessions: Dict[Tuple[str, Optional[str]], boto3.Session] = {}
+_clients: Dict[Tuple, Any] = {}
+_local = threading.local()
+
+
+def session(region: str = AWS_REGION, profile: Optional[str] = AWS_PROFILE) -> boto3.Session:
+    key = (region, profile)
+    with _lock:
+        sess = _sessions.get(key)
+        if sess is None:
+            if profile:
+                sess = boto3.Session(profile_name=profile, region_name=region)
+            else:
+                sess = boto3.Session(region_name=region)
+            _sessions[key] = sess
+        return sess
+
+
+def client(
+    service: str,
+    region: str = AWS_REGION,
+    profile: Optional[str] = AWS_PROFILE,
+    timeout_s: Optional[int] = None,
+    max_attempts: Optional[int] = None,
+    max_pool_connections: int = 10,
+):
+    key = (service, region, profile, timeout_s, max_attempts, max_pool_connections)
+    cli = _clients.get(key)
+    if cli is not None:
+        return cli
+    sess = session(region, profile)
+    cfg_kwargs: Dict[str, Any] = {"max_pool_connections": max_pool_connections}
+    if timeout_s is not None:
+        cfg_kwargs["read_timeout"] = timeout_s
+    if max_attempts is not None:
+        cfg_kwargs["retries"] = {"max_attempts": max_attempts}
+    with _lock:
+        cli = _clients.get(key)
+        if cli is None:
+            cli = sess.client(service, region_name=region, config=Config(**cfg_kwargs))
+            _clients[key] = cli
+        return cli
+
+
+def resource(service: str, region: str = AWS_REGION, profile: Optional[str] = AWS_PROFILE):
+    # Resource objects are not thread-safe; keep one per thread on top of the shared session.
+    cache = getattr(_local, "resources", None)
+    if cache is None:
+        cache = _local.resources = {}
+    key = (service, region, profile)
+    res = cache.get(key)
+    if res is None:
+        sess = session(region, profile)
+        with _lock:
+            res = sess.resource(service, region_name=region)
+        cache[key] = res
+    return res
+
+
+def clear() -> None:
+    with _lock:
+        _clients.clear()
+        _sessions.clear()
+    _local.resources = {}
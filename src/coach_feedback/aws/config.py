@@ -6,3 +6,12 @@ S3_BUCKET = os.getenv("S3_BUCKET")
 DDB_TABLE = os.getenv("DDB_TABLE")
 BEDROCK_MODEL_ID = os.getenv("BEDROCK_MODEL_ID", "anthropic.claude-3-5-sonnet-20240620-v1:0")
 CLOUD_MODE_DEFAULT = os.getenv("CLOUD_MODE", "0") == "1"
+CLASSIFY_MODE = os.getenv("CLASSIFY_MODE", "per_step")  # per_step | batched | cascade
+CLASSIFY_BATCH_CHUNKS = int(os.getenv("CLASSIFY_BATCH_CHUNKS", "8"))  # chunks per batched call
+BEDROCK_RATE = float(os.getenv("BEDROCK_RATE", "8"))  # starting calls/sec, adapted at runtime
+BEDROCK_BURST = float(os.getenv("BEDROCK_BURST", "8"))
+BEDROCK_MAX_RATE = float(os.getenv("BEDROCK_MAX_RATE", "32"))
+CASCADE_THRESHOLD = float(os.getenv("CASCADE_THRESHOLD", "0.6"))  # cue confidence kept locally
+CASCADE_TOP_K = int(os.getenv("CASCADE_TOP_K", "3"))
+CASCADE_MIN_CHARS = int(os.getenv("CASCADE_MIN_CHARS", "8"))
+CASCADE_EMBED_MODEL = os.getenv("CASCADE_EMBED_MODEL", "")  # e.g. a sentence-transformers model
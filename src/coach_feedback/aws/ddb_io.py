@@ -1,23 +1,235 @@
 from __future__ import annotations
-from typing import Any, Dict
-import boto3
+from typing import Any, Callable, Dict, List, Optional, Tuple
+from concurrent.futures import Future
+from decimal import Decimal
+import atexit
+import json
+import math
+import os
+import random
+import threading
 import time
-from .config import AWS_REGION, AWS_PROFILE, DDB_TABLE
+from .config import DDB_TABLE
+from . import clients
 
+DDB_BATCH = os.getenv("DDB_BATCH", "1") == "1"
+DDB_FLUSH_S = float(os.getenv("DDB_FLUSH_S", "0.5"))
+DDB_OFFLOAD_TRANSCRIPT = os.getenv("DDB_OFFLOAD_TRANSCRIPT", "1") == "1"
+DDB_ITEM_LIMIT = 400 * 1024
+# headroom for attribute names and the JSON-length estimate undercounting DynamoDB's encoding
+OFFLOAD_AT = int(DDB_ITEM_LIMIT * 0.9)
+BATCH_SIZE = 25
 
-def _session():
-    if AWS_PROFILE:
-        return boto3.Session(profile_name=AWS_PROFILE, region_name=AWS_REGION)
-    return boto3.Session(region_name=AWS_REGION)
 
+def _ddb_client():
+    return clients.client("dynamodb", max_pool_connections=32)
 
-def _ddb():
-    return _session().resource("dynamodb", region_name=AWS_REGION)
 
+def to_attr(v: Any) -> Dict[str, Any]:
+    """Python value -> DynamoDB AttributeValue in one walk (floats become N, no Decimal step)."""
+    if v is None:
+        return {"NULL": True}
+    if isinstance(v, bool):
+        return {"BOOL": v}
+    if isinstance(v, float):
+        return {"N": repr(v)} if math.isfinite(v) else {"NULL": True}
+    if isinstance(v, (int, Decimal)):
+        return {"N": str(v)}
+    if isinstance(v, str):
+        return {"S": v}
+    if isinstance(v, (bytes, bytearray)):
+        return {"B": bytes(v)}
+    if isinstance(v, dict):
+        return {"M": {str(k): to_attr(x) for k, x in v.items()}}
+    if isinstance(v, (list, tuple)):
+        return {"L": [to_attr(x) for x in v]}
+    raise TypeError(f"unsupported DynamoDB value: {type(v).__name__}")
 
-def put_feedback(session_id: str, payload: Dict[str, Any]) -> None:
-    if not DDB_TABLE:
-        return
-    tbl = _ddb().Table(DDB_TABLE)
+
+def serialize_item(item: Dict[str, Any]) -> Dict[str, Any]:
+    return {str(k): to_attr(v) for k, v in item.items()}
+
+
+def from_attr(av: Dict[str, Any]) -> Any:
+    """Inverse of to_attr; N comes back as int or float rather than Decimal."""
+    ((kind, v),) = av.items()
+    if kind == "N":
+        return int(v) if v.lstrip("-").isdigit() else float(v)
+    if kind == "M":
+        return {k: from_attr(x) for k, x in v.items()}
+    if kind == "L":
+        return [from_attr(x) for x in v]
+    if kind == "NULL":
+        return None
+    return v
+
+
+def deserialize_item(item: Dict[str, Any]) -> Dict[str, Any]:
+    return {k: from_attr(v) for k, v in item.items()}
+
+
+def offload_transcript(item: Dict[str, Any]) -> Dict[str, Any]:
+    """Move the transcript to S3 when the item would get close to DynamoDB's 400 KB limit."""
+    if "transcript" not in item:
+        return item
+    size = len(json.dumps(item, ensure_ascii=False, default=str).encode("utf-8"))
+    if size < OFFLOAD_AT:
+        return item
+    from .s3_io import upload_json
+
+    key = f"sessions/{item['session_id']}/output/transcript.json"
+    item = dict(item)
+    item["transcript_s3"] = upload_json({"transcript": item.pop("transcript")}, key)
+    return item
+
+
+def _build_item(session_id: str, payload: Dict[str, Any]) -> Dict[str, Any]:
     item = {"session_id": session_id, "ts": int(time.time()), **payload}
-    tbl.put_item(Item=item)
+    return offload_transcript(item) if DDB_OFFLOAD_TRANSCRIPT else item
+
+
+def put_feedback(session_id: str, payload: Dict[str, Any]) -> Optional[Future]:
+    """Write the session item; with DDB_BATCH it is buffered and the returned Future
+    resolves once its batch is written."""
+    if not DDB_TABLE:
+        return None
+    if DDB_BATCH:
+        return WRITER.put(_build_item(session_id, payload))
+    item = serialize_item(_build_item(session_id, payload))
+    _ddb_client().put_item(TableName=DDB_TABLE, Item=item)
+    return None
+
+
+def get_latest_feedback(session_id: str) -> Optional[Dict[str, Any]]:
+    """Most recent item written for session_id (items are keyed by session_id and ts)."""
+    if not DDB_TABLE:
+        return None
+    resp = _ddb_client().query(
+        TableName=DDB_TABLE,
+        KeyConditionExpression="session_id = :s",
+        ExpressionAttributeValues={":s": {"S": session_id}},
+        ScanIndexForward=False,
+        Limit=1,
+    )
+    items = resp.get("Items") or []
+    return deserialize_item(items[0]) if items else None
+
+
+class BatchWriter:
+    """Buffers puts and writes them with batch_write_item, 25 at a time.
+
+    A background thread flushes when a full batch is buffered or flush_s has passed; items
+    DynamoDB reports as unprocessed are resent with exponential backoff. put() returns a
+    Future that resolves once the item is written.
+    """
+
+    def __init__(
+        self,
+        table: Optional[str] = DDB_TABLE,
+        flush_s: float = DDB_FLUSH_S,
+        max_retries: int = 8,
+        backoff_s: float = 0.05,
+        client: Callable[[], Any] = _ddb_client,
+    ):
+        self.table = table
+        self.flush_s = flush_s
+        self.max_retries = max_retries
+        self.backoff_s = backoff_s
+        self.client = client
+        self.cond = threading.Condition()
+        self.buf: List[Tuple[Dict[str, Any], Future]] = []
+        self.thread: Optional[threading.Thread] = None
+        self.written = 0
+        self.batches = 0
+        self.retries = 0
+        self.failed = 0
+
+    def put(self, item: Dict[str, Any]) -> Future:
+        fut: Future = Future()
+        entry = (serialize_item(item), fut)
+        with self.cond:
+            self.buf.append(entry)
+            if len(self.buf) >= BATCH_SIZE:
+                self.cond.notify()
+            if self.thread is None or not self.thread.is_alive():
+                self.thread = threading.Thread(target=self._run, daemon=True)
+                self.thread.start()
+        return fut
+
+    def _take(self) -> List[Tuple[Dict[str, Any], Future]]:
+        batch, self.buf = self.buf[:BATCH_SIZE], self.buf[BATCH_SIZE:]
+        return batch
+
+    def _run(self):
+        while True:
+            with self.cond:
+                self.cond.wait_for(lambda: len(self.buf) >= BATCH_SIZE, timeout=self.flush_s)
+                batch = self._take()
+            if batch:
+                self._write(batch)
+
+    def flush(self):
+        """Write everything buffered so far from the calling thread."""
+        while True:
+            with self.cond:
+                batch = self._take()
+            if not batch:
+                return
+            self._write(batch)
+
+    @staticmethod
+    def _key(item: Dict[str, Any]) -> Tuple:
+        return (json.dumps(item.get("session_id")), json.dumps(item.get("ts")))
+
+    def _write(self, batch: List[Tuple[Dict[str, Any], Future]]):
+        # batch_write_item rejects duplicate keys: the last put for a key wins
+        futs: Dict[Tuple, List[Future]] = {}
+        latest: Dict[Tuple, Dict[str, Any]] = {}
+        for item, fut in batch:
+            futs.setdefault(self._key(item), []).append(fut)
+            latest[self._key(item)] = item
+        requests = [{"PutRequest": {"Item": item}} for item in latest.values()]
+        error: Optional[BaseException] = None
+        for attempt in range(self.max_retries + 1):
+            if attempt:
+                with self.cond:
+                    self.retries += 1
+                time.sleep(self.backoff_s * (2 ** (attempt - 1)) * (0.5 + random.random()))
+            try:
+                resp = self.client().batch_write_item(RequestItems={self.table: requests})
+            except Exception as e:
+                error = e
+                continue
+            unprocessed = resp.get("UnprocessedItems", {}).get(self.table, [])
+            left = {self._key(r["PutRequest"]["Item"]) for r in unprocessed}
+            for key in list(futs):
+                if key not in left:
+                    for fut in futs.pop(key):
+                        fut.set_result(None)
+                    with self.cond:
+                        self.written += 1
+            requests = unprocessed
+            if not requests:
+                with self.cond:
+                    self.batches += 1
+                return
+            error = RuntimeError(f"{len(requests)} items unprocessed")
+        with self.cond:
+            self.failed += len(futs)
+        for pending in futs.values():
+            for fut in pending:
+                fut.set_exception(error or RuntimeError("batch write failed"))
+
+    def stats(self) -> Dict[str, Any]:
+        with self.cond:
+            return {
+                "queued": len(self.buf),
+                "written": self.written,
+                "batches": self.batches,
+                "retries": self.retries,
+                "failed": self.failed,
+            }
+
+
+WRITER = BatchWriter()
+atexit.register(WRITER.flush)
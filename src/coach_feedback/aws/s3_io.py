@@ -1,25 +1,40 @@
 from __future__ import annotations
-from typing import Any, Dict
+from typing import Any, Dict, Iterator
 import json
-import boto3
-from .config import AWS_REGION, AWS_PROFILE, S3_BUCKET
+import os
+import tempfile
+from contextlib import contextmanager
+from boto3.s3.transfer import TransferConfig
+from .config import S3_BUCKET
+from . import clients
 
-
-def _session():
-    if AWS_PROFILE:
-        return boto3.Session(profile_name=AWS_PROFILE, region_name=AWS_REGION)
-    return boto3.Session(region_name=AWS_REGION)
+S3_MULTIPART_MB = int(os.getenv("S3_MULTIPART_MB", "8"))
+S3_UPLOAD_CONCURRENCY = int(os.getenv("S3_UPLOAD_CONCURRENCY", "10"))
+# buckets audio may be read from besides S3_BUCKET (comma-separated), e.g. for batch ingest
+S3_INGEST_BUCKETS = [b for b in os.getenv("S3_INGEST_BUCKETS", "").split(",") if b]
+TRANSFER_CONFIG = TransferConfig(
+    multipart_threshold=S3_MULTIPART_MB * 1024 * 1024,
+    multipart_chunksize=S3_MULTIPART_MB * 1024 * 1024,
+    max_concurrency=S3_UPLOAD_CONCURRENCY,
+    use_threads=True,
+)
 
 
 def _s3():
-    return _session().client("s3", region_name=AWS_REGION)
+    # pool sized for the multipart transfer threads
+    return clients.client("s3", max_pool_connections=max(10, S3_UPLOAD_CONCURRENCY))
+
+
+def s3_uri(key: str, bucket: str | None = None) -> str | None:
+    bucket = bucket or S3_BUCKET
+    return f"s3://{bucket}/{key}" if bucket else None
 
 
 def upload_file(local_path: str, key: str, bucket: str | None = None) -> str:
     bucket = bucket or S3_BUCKET
     if not bucket:
         raise RuntimeError("S3_BUCKET not set")
-    _s3().upload_file(local_path, bucket, key)
+    _s3().upload_file(local_path, bucket, key, Config=TRANSFER_CONFIG)
     return f"s3://{bucket}/{key}"
 
 
@@ -32,3 +47,96 @@ def upload_json(obj: Dict[str, Any], key: str, bucket: str | None = None) -> str
         Bucket=bucket, Key=key, Body=body, ContentType="application/json; charset=utf-8"
     )
     return f"s3://{bucket}/{key}"
+
+
+def get_json(key: str, bucket: str | None = None) -> Dict[str, Any] | None:
+    bucket = bucket or S3_BUCKET
+    if not bucket:
+        raise RuntimeError("S3_BUCKET not set")
+    s3 = _s3()
+    try:
+        resp = s3.get_object(Bucket=bucket, Key=key)
+    except s3.exceptions.NoSuchKey:
+        return None
+    return json.loads(resp["Body"].read().decode("utf-8"))
+
+
+def parse_s3_uri(uri: str) -> tuple[str, str]:
+    if not uri.startswith("s3://"):
+        raise ValueError(f"not an s3:// URI: {uri}")
+    bucket, _, key = uri[5:].partition("/")
+    return bucket, key
+
+
+def list_keys(prefix: str, bucket: str | None = None) -> Iterator[str]:
+    bucket = bucket or S3_BUCKET
+    if not bucket:
+        raise RuntimeError("S3_BUCKET not set")
+    pages = _s3().get_paginator("list_objects_v2").paginate(Bucket=bucket, Prefix=prefix)
+    for page in pages:
+        for obj in page.get("Contents", []):
+            yield obj["Key"]
+
+
+def download_file(key: str, local_path: str, bucket: str | None = None) -> str:
+    bucket = bucket or S3_BUCKET
+    if not bucket:
+        raise RuntimeError("S3_BUCKET not set")
+    _s3().download_file(bucket, key, local_path, Config=TRANSFER_CONFIG)
+    return local_path
+
+
+def is_s3_uri(ref: str | None) -> bool:
+    return bool(ref) and ref.startswith("s3://")
+
+
+def readable_bucket(bucket: str) -> bool:
+    return bool(bucket) and (bucket == S3_BUCKET or bucket in S3_INGEST_BUCKETS)
+
+
+def download_to_temp(uri: str) -> str:
+    """Spool an s3:// object to a temp file with parallel ranged GETs (TRANSFER_CONFIG parts).
+
+    Only S3_BUCKET and S3_INGEST_BUCKETS are read; other buckets raise ValueError."""
+    bucket, key = parse_s3_uri(uri)
+    if not readable_bucket(bucket):
+        raise ValueError(f"s3 bucket not allowed: {bucket}")
+    fd, tmp = tempfile.mkstemp(suffix=os.path.splitext(key)[1])
+    os.close(fd)
+    try:
+        return download_file(key, tmp, bucket=bucket)
+    except Exception:
+        os.remove(tmp)
+        raise
+
+
+@contextmanager
+def local_audio(ref: str) -> Iterator[str]:
+    """Local path for an audio ref: local paths as-is, s3:// objects spooled and cleaned up."""
+    if not is_s3_uri(ref):
+        yield ref
+        return
+    tmp = download_to_temp(ref)
+    try:
+        yield tmp
+    finally:
+        try:
+            os.remove(tmp)
+        except OSError:
+            pass
+
+
+def presign_put(
+    key: str,
+    bucket: str | None = None,
+    content_type: str | None = None,
+    expires_s: int = 900,
+) -> str:
+    """URL a client can PUT the object to directly, bypassing the app server."""
+    bucket = bucket or S3_BUCKET
+    if not bucket:
+        raise RuntimeError("S3_BUCKET not set")
+    params = {"Bucket": bucket, "Key": key}
+    if content_type:
+        params["ContentType"] = content_type
+    return _s3().generate_presigned_url("put_object", Params=params, ExpiresIn=expires_s)
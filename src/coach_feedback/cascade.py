@@ -0,0 +1,110 @@
+from __future__ import annotations
+import pathlib
+from typing import Callable, Dict, List, Optional, Tuple
+import numpy as np
+from .aws.bedrock_client import score_chunks_steps
+from .aws.config import CASCADE_MIN_CHARS, CASCADE_THRESHOLD, CASCADE_TOP_K, CASCADE_EMBED_MODEL
+from .classifier import StepClassifier, get_classifier, load_step_yaml
+from .scoring import N_STEPS
+from . import metrics
+
+try:
+    from sentence_transformers import SentenceTransformer
+except Exception:  # pragma: no cover
+    SentenceTransformer = None
+
+STEPS_YAML = pathlib.Path(__file__).parent / "steps.yaml"
+ALL_STEPS = tuple(range(1, N_STEPS + 1))
+
+# (texts) -> (n_texts, 12) matrix used to rank candidate steps for ambiguous chunks
+LocalScorer = Callable[[List[str]], np.ndarray]
+# (texts, step_ids) -> per-chunk {step_id: score}, i.e. score_chunks_steps
+RemoteScorer = Callable[[List[str], List[int]], List[Dict[int, float]]]
+
+
+def cue_confidence(clf: StepClassifier, texts: List[str]) -> np.ndarray:
+    """Per-step cue share hits/(total+1): one stray cue stays below two agreeing ones."""
+    m = np.zeros((len(texts), N_STEPS), dtype=np.float32)
+    for i, t in enumerate(texts):
+        hits = clf.chunk_hits(t)
+        total = sum(hits.values())
+        for sid, n in hits.items():
+            m[i, sid - 1] = n / (total + 1)
+    return m
+
+
+def embedding_scorer(
+    model_name: str = CASCADE_EMBED_MODEL, steps_yaml_path: str = str(STEPS_YAML)
+) -> LocalScorer:
+    """Cosine similarity between chunks and each step's name + cues."""
+    if SentenceTransformer is None:
+        raise RuntimeError("sentence-transformers not installed. Install extra: embed")
+    model = SentenceTransformer(model_name)
+    steps = load_step_yaml(steps_yaml_path)
+    refs = [
+        " ".join([steps.get(sid, {}).get("name", ""), *steps.get(sid, {}).get("cues", [])])
+        for sid in ALL_STEPS
+    ]
+    ref_emb = model.encode(refs, normalize_embeddings=True)
+
+    def score(texts: List[str]) -> np.ndarray:
+        emb = model.encode(texts, normalize_embeddings=True)
+        return np.clip(emb @ ref_emb.T, 0.0, 1.0).astype(np.float32)
+
+    return score
+
+
+_default_local: Dict[str, Optional[LocalScorer]] = {}
+
+
+def default_local_scorer() -> Optional[LocalScorer]:
+    if not CASCADE_EMBED_MODEL:
+        return None
+    if CASCADE_EMBED_MODEL not in _default_local:
+        _default_local[CASCADE_EMBED_MODEL] = embedding_scorer(CASCADE_EMBED_MODEL)
+    return _default_local[CASCADE_EMBED_MODEL]
+
+
+def cascade_score_chunks(
+    texts: List[str],
+    threshold: float = CASCADE_THRESHOLD,
+    top_k: int = CASCADE_TOP_K,
+    min_chars: int = CASCADE_MIN_CHARS,
+    local_scorer: Optional[LocalScorer] = None,
+    remote_scorer: RemoteScorer = score_chunks_steps,
+    steps_yaml_path: str = str(STEPS_YAML),
+) -> Tuple[List[Dict[int, float]], Dict[str, int]]:
+    """Score chunks locally first and send only ambiguous ones, on top-k steps, to Bedrock.
+
+    Short chunks get no scores (no vote); chunks whose cue confidence reaches threshold keep
+    the local scores. Returns the per-chunk scores and a stats dict of calls made/saved.
+    """
+    conf = cue_confidence(get_classifier(steps_yaml_path), texts)
+    rank = conf if local_scorer is None else conf + local_scorer(texts)
+    results: List[Dict[int, float]] = [{} for _ in texts]
+    groups: Dict[Tuple[int, ...], List[int]] = {}
+    stats = {"chunks": len(texts), "skipped": 0, "local": 0, "escalated": 0}
+    for i, t in enumerate(texts):
+        if len("".join(t.split())) < min_chars:
+            stats["skipped"] += 1
+            continue
+        if conf[i].max() >= threshold:
+            results[i] = {int(s) + 1: float(conf[i, s]) for s in np.flatnonzero(conf[i])}
+            stats["local"] += 1
+            continue
+        order = np.argsort(-rank[i], kind="stable")[:top_k]
+        cands = tuple(sorted(int(s) + 1 for s in order if rank[i, s] > 0))
+        if len(cands) < 2:  # nothing to choose between locally: score every step
+            cands = ALL_STEPS
+        groups.setdefault(cands, []).append(i)
+    calls = 0
+    for cands, idx in groups.items():
+        for i, scores in zip(idx, remote_scorer([texts[i] for i in idx], list(cands))):
+            results[i] = scores
+        calls += len(idx) * len(cands)
+        stats["escalated"] += len(idx)
+    stats["bedrock_calls"] = calls
+    stats["calls_saved"] = len(texts) * N_STEPS - calls
+    metrics.incr("cascade.bedrock_calls", calls)
+    metrics.incr("cascade.calls_saved", stats["calls_saved"])
+    return results, stats
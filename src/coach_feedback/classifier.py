@@ -1,8 +1,12 @@
 from __future__ import annotations
-from typing import List, Dict, Any
+from typing import List, Dict, Any, Tuple
+import os
 import re
+import threading
 import yaml
+import numpy as np
 from .schema import TranscriptChunk, StepEnum, StepLabel, ClassificationOutput
+from .scoring import N_STEPS
 
 
 def load_step_yaml(path: str) -> Dict[int, Dict[str, Any]]:
@@ -11,21 +15,123 @@ def load_step_yaml(path: str) -> Dict[int, Dict[str, Any]]:
     return {int(k): v for k, v in data.get("steps", {}).items()}
 
 
-def classify_transcript(
-    chunks: List[TranscriptChunk], steps_yaml_path: str
-) -> ClassificationOutput:
-    steps = load_step_yaml(steps_yaml_path)
-    labels: List[StepLabel] = []
-    for ch in chunks:
-        text = ch.text.lower()
-        matched = []
+_ASCII_WORD = re.compile(r"[0-9a-z_]")
+_HANGUL = re.compile(r"[가-힣]")
+
+
+def _left_boundary(c: str) -> str:
+    if _ASCII_WORD.match(c):
+        return r"(?<![0-9a-z_])"
+    if _HANGUL.match(c):
+        return r"(?<![가-힣])"
+    return ""
+
+
+def _trie_pattern(cues: List[str]) -> str:
+    """Prefix-factored alternation of cues, so each scan position tests ~one branch.
+
+    ASCII cues need a word boundary on both sides. Hangul cues must start a word (no
+    syllable before them, so "전이" does not hit inside "이전이") but stay open on the
+    right, so particles and endings ("학습을", "지난번") still hit, which `\\b` would reject.
+    """
+    trie: Dict[str, dict] = {}
+    for cue in cues:
+        node = trie
+        for c in cue:
+            node = node.setdefault(c, {})
+        node[""] = {}
+
+    def build(node: Dict[str, dict], last: str) -> str:
+        alts = [re.escape(c) + build(child, c) for c, child in sorted(node.items()) if c]
+        if "" in node:  # end of a cue: tried after longer continuations
+            alts.append(r"(?![0-9a-z_])" if _ASCII_WORD.match(last) else "")
+        return alts[0] if len(alts) == 1 else "(?:" + "|".join(alts) + ")"
+
+    top = [_left_boundary(c) + re.escape(c) + build(child, c) for c, child in sorted(trie.items())]
+    return "|".join(top)
+
+
+class StepClassifier:
+    """Cue classifier compiled once from steps.yaml into a single trie-shaped regex."""
+
+    def __init__(self, steps: Dict[int, Dict[str, Any]]):
+        self.steps = steps
+        cue_steps: Dict[str, List[int]] = {}
         for sid, meta in steps.items():
             for cue in meta.get("cues", []):
-                if re.search(r"\b" + re.escape(cue.lower()) + r"\b", text):
-                    matched.append(StepEnum(sid))
-                    break
-        if not matched and (("학생" in ch.text) or ("students" in text)):
+                ids = cue_steps.setdefault(cue.lower(), [])
+                if sid not in ids:
+                    ids.append(sid)
+        self.cue_steps = cue_steps
+        # The match sits inside a lookahead, so cues that overlap (e.g. "try next" and
+        # "next step") are all reported in a single left-to-right scan.
+        self.pattern = None
+        if cue_steps:
+            self.pattern = re.compile(f"(?=({_trie_pattern(list(cue_steps))}))")
+
+    def chunk_hits(self, text: str) -> Dict[int, int]:
+        hits: Dict[int, int] = {}
+        if self.pattern is None:
+            return hits
+        for m in self.pattern.finditer(text.lower()):
+            for sid in self.cue_steps[m.group(1)]:
+                hits[sid] = hits.get(sid, 0) + 1
+        return hits
+
+    def matched_steps(self, text: str) -> Tuple[List[StepEnum], Dict[int, int]]:
+        hits = self.chunk_hits(text)
+        matched = [StepEnum(sid) for sid in sorted(hits)]
+        if not matched and (("학생" in text) or ("students" in text.lower())):
             matched = [StepEnum.LINK_PRAISE_TO_STUDENT_LEARNING]
+        return matched, hits
+
+    def classify_chunk(self, ch: TranscriptChunk) -> Tuple[StepLabel, Dict[int, int]]:
+        matched, hits = self.matched_steps(ch.text)
         conf = 0.6 if matched else 0.2
-        labels.append(StepLabel(id=ch.id, step_ids=matched, confidence=conf))
-    return ClassificationOutput(labels=labels, notes="heuristic yaml-driven classifier")
+        return StepLabel(id=ch.id, step_ids=matched, confidence=conf), hits
+
+    def classify(self, chunks: List[TranscriptChunk]) -> ClassificationOutput:
+        labels = [self.classify_chunk(ch)[0] for ch in chunks]
+        return ClassificationOutput(labels=labels, notes="heuristic yaml-driven classifier")
+
+    def score_matrix(self, chunks: List[TranscriptChunk]) -> np.ndarray:
+        return self.text_score_matrix([ch.text for ch in chunks])
+
+    def text_score_matrix(self, texts: List[str]) -> np.ndarray:
+        """(n_texts, 12) float32 matrix holding the label confidence on each matched step."""
+        m = np.zeros((len(texts), N_STEPS), dtype=np.float32)
+        for i, text in enumerate(texts):
+            for sid in self.matched_steps(text)[0]:
+                m[i, int(sid) - 1] = 0.6
+        return m
+
+    def hit_counts(self, chunks: List[TranscriptChunk]) -> Dict[int, int]:
+        totals: Dict[int, int] = {}
+        for ch in chunks:
+            for sid, n in self.chunk_hits(ch.text).items():
+                totals[sid] = totals.get(sid, 0) + n
+        return totals
+
+
+_classifiers: Dict[str, Tuple[float, StepClassifier]] = {}
+_classifiers_lock = threading.Lock()
+
+
+def get_classifier(steps_yaml_path: str) -> StepClassifier:
+    """Compiled classifier for a steps file, rebuilt only when its mtime changes."""
+    path = os.path.abspath(steps_yaml_path)
+    mtime = os.path.getmtime(path)
+    with _classifiers_lock:
+        cached = _classifiers.get(path)
+        if cached and cached[0] == mtime:
+            return cached[1]
+    clf = StepClassifier(load_step_yaml(path))
+    with _classifiers_lock:
+        _classifiers[path] = (mtime, clf)
+    return clf
+
+
+def classify_transcript(
+    chunks: List[TranscriptChunk], steps_yaml_path: str
+) -> ClassificationOutput:
+    return get_classifier(steps_yaml_path).classify(chunks)
@@ -0,0 +1,120 @@
+from __future__ import annotations
+import os
+import pathlib
+from typing import Any, Dict, List, Optional, Tuple
+import numpy as np
+from .classifier import get_classifier
+from .llm.tokens import estimate_tokens
+
+COMPACT_TRANSCRIPT = os.getenv("COMPACT_TRANSCRIPT", "1") == "1"
+FEEDBACK_TOKEN_BUDGET = int(os.getenv("FEEDBACK_TOKEN_BUDGET", "3000"))
+MAX_TURN_TOKENS = int(os.getenv("COMPACT_MAX_TURN_TOKENS", "400"))
+STEPS_YAML = pathlib.Path(__file__).parent / "steps.yaml"
+GAP = "[...]"
+
+
+def merge_turns(
+    transcript: List[Dict[str, Any]], max_turn_tokens: int = MAX_TURN_TOKENS
+) -> List[Dict[str, Any]]:
+    """Join consecutive same-speaker segments; `rows` keeps the source indices of each turn."""
+    turns: List[Dict[str, Any]] = []
+    for i, seg in enumerate(transcript):
+        text = (seg.get("text") or "").strip()
+        if not text:
+            continue
+        speaker = seg.get("speaker", "other")
+        last = turns[-1] if turns else None
+        if last and last["speaker"] == speaker and last["rows"][-1] == i - 1:
+            if last["tokens"] + estimate_tokens(text) <= max_turn_tokens:
+                last["text"] += " " + text
+                last["tokens"] += estimate_tokens(text)
+                last["rows"].append(i)
+                continue
+        turns.append(
+            {"speaker": speaker, "text": text, "rows": [i], "tokens": estimate_tokens(text)}
+        )
+    return turns
+
+
+def _line(turn: Dict[str, Any]) -> str:
+    return f"[{turn['rows'][0] + 1}] {turn['speaker']}: {turn['text']}"
+
+
+def _ranking(turns: List[Dict[str, Any]], step_focus: int, scores: np.ndarray) -> np.ndarray:
+    """Turn indices, most relevant to step_focus first, then by any-step evidence."""
+    rel = np.array([scores[t["rows"], step_focus - 1].max() for t in turns], dtype=np.float32)
+    evidence = np.array([scores[t["rows"]].max() for t in turns], dtype=np.float32)
+    return np.lexsort((np.arange(len(turns)), -evidence, -rel))
+
+
+def select_turns(
+    turns: List[Dict[str, Any]],
+    step_focus: int,
+    scores: np.ndarray,
+    token_budget: int = FEEDBACK_TOKEN_BUDGET,
+) -> List[int]:
+    """Indices of the turns most relevant to step_focus (then any-step evidence) that fit
+    the budget, in transcript order."""
+    costs = [estimate_tokens(_line(t)) + 1 for t in turns]
+    if sum(costs) <= token_budget:
+        return list(range(len(turns)))
+    keep = []
+    used = 0
+    for i in _ranking(turns, step_focus, scores):
+        if used + costs[i] <= token_budget:
+            keep.append(int(i))
+            used += costs[i]
+    return sorted(keep)
+
+
+def truncate_turn(turn: Dict[str, Any], token_budget: int) -> Dict[str, Any]:
+    """Copy of turn cut to the longest text prefix whose line (ending in `[...]`) fits."""
+
+    def fits(n: int) -> bool:
+        line = _line({**turn, "text": turn["text"][:n] + " " + GAP})
+        return estimate_tokens(line) + 1 <= token_budget
+
+    lo, hi = 0, len(turn["text"])
+    while lo < hi:
+        mid = (lo + hi + 1) // 2
+        if fits(mid):
+            lo = mid
+        else:
+            hi = mid - 1
+    text = (turn["text"][:lo].rstrip() + " " + GAP).lstrip()
+    return {**turn, "text": text, "tokens": estimate_tokens(text)}
+
+
+def compact_transcript(
+    transcript: List[Dict[str, Any]],
+    step_focus: int,
+    scores: Optional[np.ndarray] = None,
+    token_budget: int = FEEDBACK_TOKEN_BUDGET,
+) -> Tuple[str, Dict[str, int]]:
+    """One `[n] speaker: text` line per merged turn, `[...]` where turns were dropped. When
+    not even one turn fits the budget, the most relevant turn is truncated to fit.
+
+    scores is the (n_chunks, 12) step score matrix aligned with transcript; the local cue
+    classifier is used when it is not given.
+    """
+    if scores is None or len(scores) != len(transcript):
+        texts = [seg.get("text") or "" for seg in transcript]
+        scores = get_classifier(str(STEPS_YAML)).text_score_matrix(texts)
+    turns = merge_turns(transcript)
+    kept = select_turns(turns, step_focus, scores, token_budget)
+    if not kept and turns:
+        # no whole turn fits: keep the most relevant one, cut to the budget
+        top = int(_ranking(turns, step_focus, scores)[0])
+        turns[top] = truncate_turn(turns[top], token_budget)
+        kept = [top]
+    lines = []
+    prev = -1
+    for i in kept:
+        if i > prev + 1:
+            lines.append(GAP)
+        lines.append(_line(turns[i]))
+        prev = i
+    if kept and prev < len(turns) - 1:
+        lines.append(GAP)
+    text = "\n".join(lines)
+    return text, {"segments": len(transcript), "turns": len(turns), "kept": len(kept)}
@@ -1,12 +1,14 @@
 from __future__ import annotations
-import json
-import os
+import asyncio
 import strawberry
 from typing import List, Optional
 from fastapi import FastAPI
+from strawberry.dataloader import DataLoader
 from strawberry.fastapi import GraphQLRouter
+from strawberry.types import Info
 from fastapi import Depends
 from ..auth.cognito import cognito_auth_dependency, AUTH_REQUIRED
+from .sessions import SESSIONS, SessionEntry
 
 
 @strawberry.type
@@ -32,43 +34,58 @@ class FeedbackType:
 class SessionType:
     session_id: str
     step_focus: int
-    transcript: List[TranscriptChunkType]
-    feedback: FeedbackType
     audio_s3: Optional[str] = None
     feedback_s3: Optional[str] = None
+    entry: strawberry.Private[SessionEntry] = None
 
+    # resolved per field, so e.g. `feedback { praise }` never touches the transcript
+    @strawberry.field
+    async def transcript(self) -> List[TranscriptChunkType]:
+        rows = self.entry.transcript
+        if rows is None:
+            rows = await asyncio.to_thread(self.entry.load_transcript)
+        return [TranscriptChunkType(**t) for t in rows]
+
+    @strawberry.field
+    def feedback(self) -> FeedbackType:
+        return FeedbackType(**self.entry.data["feedback"])
+
+    @classmethod
+    def from_entry(cls, entry: SessionEntry) -> "SessionType":
+        data = entry.data
+        return cls(
+            session_id=data["session_id"],
+            step_focus=data["step_focus"],
+            audio_s3=data.get("audio_s3"),
+            feedback_s3=data.get("feedback_s3"),
+            entry=entry,
+        )
 
-SESSIONS_DIR = os.getenv("SESSIONS_DIR", "data/sessions")
 
+async def _load_sessions(session_ids: List[str]) -> List[Optional[SessionEntry]]:
+    return await asyncio.to_thread(SESSIONS.get_many, list(session_ids))
 
-def _load_session(session_id: str) -> Optional[dict]:
-    path = os.path.join(SESSIONS_DIR, session_id, "output", "feedback.json")
-    if not os.path.exists(path):
-        return None
-    with open(path, "r", encoding="utf-8") as f:
-        return json.load(f)
+
+async def get_context() -> dict:
+    # one loader per request: every get_session in a query is resolved in one batch
+    return {"session_loader": DataLoader(load_fn=_load_sessions)}
 
 
 @strawberry.type
 class Query:
     @strawberry.field
-    def get_session(self, session_id: str) -> Optional[SessionType]:
-        data = _load_session(session_id)
-        if not data:
-            return None
-        fb = data["feedback"]
-        return SessionType(
-            session_id=data["session_id"],
-            step_focus=data["step_focus"],
-            transcript=[TranscriptChunkType(**t) for t in data["transcript"]],
-            feedback=FeedbackType(**fb),
-            audio_s3=data.get("audio_s3"),
-            feedback_s3=data.get("feedback_s3"),
-        )
+    async def get_session(self, info: Info, session_id: str) -> Optional[SessionType]:
+        entry = await info.context["session_loader"].load(session_id)
+        return SessionType.from_entry(entry) if entry else None
+
+    @strawberry.field
+    async def get_sessions(self, info: Info, session_ids: List[str]) -> List[Optional[SessionType]]:
+        entries = await info.context["session_loader"].load_many(session_ids)
+        return [SessionType.from_entry(e) if e else None for e in entries]
 
 
 schema = strawberry.Schema(query=Query)
 app = FastAPI()
 deps = [Depends(cognito_auth_dependency())] if AUTH_REQUIRED else None
-graphql_app = GraphQLRouter(schema, dependencies=deps)
-app.include_router(graphql_app, path="/graphql")
+graphql_app = GraphQLRouter(schema, context_getter=get_context, dependencies=deps)
+app.include_router(graphql_app, prefix="/graphql")
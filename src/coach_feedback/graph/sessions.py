@@ -0,0 +1,152 @@
+from __future__ import annotations
+import json
+import os
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Dict, List, Optional
+
+SESSIONS_DIR = os.getenv("SESSIONS_DIR", "data/sessions")
+GRAPH_CACHE_SIZE = int(os.getenv("GRAPH_CACHE_SIZE", "1024"))
+GRAPH_DDB = os.getenv("GRAPH_DDB", "0") == "1"
+GRAPH_DDB_TTL_S = float(os.getenv("GRAPH_DDB_TTL_S", "30"))
+
+
+class SessionEntry:
+    """A loaded session; transcript objects are built on first use and kept with it."""
+
+    def __init__(self, data: Dict[str, Any], stamp: Optional[int], expires: float):
+        self.data = data
+        self.stamp = stamp
+        self.expires = expires
+        self.lock = threading.Lock()
+        self.transcript: Optional[List[Dict[str, Any]]] = None
+
+    def load_transcript(self) -> List[Dict[str, Any]]:
+        with self.lock:
+            if self.transcript is None:
+                rows = self.data.get("transcript")
+                if rows is None and self.data.get("transcript_s3"):
+                    rows = _fetch_transcript(self.data["transcript_s3"])
+                self.transcript = rows or []
+            return self.transcript
+
+
+def _fetch_transcript(uri: str) -> List[Dict[str, Any]]:
+    from ..aws.s3_io import get_json, parse_s3_uri
+
+    bucket, key = parse_s3_uri(uri)
+    obj = get_json(key, bucket=bucket) or {}
+    return obj.get("transcript", [])
+
+
+def _ddb_lookup(session_id: str) -> Optional[Dict[str, Any]]:
+    from ..aws.ddb_io import get_latest_feedback
+
+    return get_latest_feedback(session_id)
+
+
+class SessionCache:
+    """Read-through LRU of session outputs.
+
+    Local feedback.json entries are revalidated by mtime on every hit (one stat, no read);
+    with ddb=True sessions missing locally are read from the DynamoDB table and kept for
+    ddb_ttl_s.
+    """
+
+    def __init__(
+        self,
+        root: str = SESSIONS_DIR,
+        max_entries: int = GRAPH_CACHE_SIZE,
+        ddb: bool = GRAPH_DDB,
+        ddb_ttl_s: float = GRAPH_DDB_TTL_S,
+        ddb_lookup=_ddb_lookup,
+    ):
+        self.root = root
+        self.max_entries = max_entries
+        self.ddb = ddb
+        self.ddb_ttl_s = ddb_ttl_s
+        self.ddb_lookup = ddb_lookup
+        self.lock = threading.Lock()
+        self.entries: "OrderedDict[str, SessionEntry]" = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.ddb_reads = 0
+
+    def _path(self, session_id: str) -> str:
+        return os.path.join(self.root, session_id, "output", "feedback.json")
+
+    def _cached(self, session_id: str, stamp: Optional[int]) -> Optional[SessionEntry]:
+        with self.lock:
+            entry = self.entries.get(session_id)
+            if entry is None:
+                return None
+            if entry.stamp != stamp or (stamp is None and entry.expires < time.monotonic()):
+                del self.entries[session_id]
+                return None
+            self.entries.move_to_end(session_id)
+            self.hits += 1
+            return entry
+
+    def _store(self, session_id: str, entry: SessionEntry) -> SessionEntry:
+        with self.lock:
+            self.misses += 1
+            self.entries[session_id] = entry
+            self.entries.move_to_end(session_id)
+            while len(self.entries) > self.max_entries:
+                self.entries.popitem(last=False)
+                self.evictions += 1
+        return entry
+
+    def _stat(self, session_id: str) -> Optional[int]:
+        try:
+            return os.stat(self._path(session_id)).st_mtime_ns
+        except (OSError, ValueError):
+            return None
+
+    def get(self, session_id: str) -> Optional[SessionEntry]:
+        stamp = self._stat(session_id)
+        entry = self._cached(session_id, stamp)
+        if entry is not None:
+            return entry
+        if stamp is not None:
+            try:
+                with open(self._path(session_id), "r", encoding="utf-8") as f:
+                    data = json.load(f)
+            except (OSError, ValueError):
+                return None
+            return self._store(session_id, SessionEntry(data, stamp, 0.0))
+        if not self.ddb:
+            return None
+        data = self.ddb_lookup(session_id)
+        with self.lock:
+            self.ddb_reads += 1
+        if not data:
+            return None
+        return self._store(session_id, SessionEntry(data, None, time.monotonic() + self.ddb_ttl_s))
+
+    def get_many(self, session_ids: List[str], workers: int = 8) -> List[Optional[SessionEntry]]:
+        """Batch lookup; DynamoDB misses are fetched concurrently."""
+        if not self.ddb or len(session_ids) < 2:
+            return [self.get(sid) for sid in session_ids]
+        with ThreadPoolExecutor(max_workers=min(workers, len(session_ids))) as ex:
+            return list(ex.map(self.get, session_ids))
+
+    def invalidate(self, session_id: str):
+        with self.lock:
+            self.entries.pop(session_id, None)
+
+    def stats(self) -> Dict[str, Any]:
+        with self.lock:
+            return {
+                "entries": len(self.entries),
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "ddb_reads": self.ddb_reads,
+            }
+
+
+SESSIONS = SessionCache()
@@ -0,0 +1,127 @@
+from __future__ import annotations
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+from typing import Any, Dict, Optional
+
+CACHE_ENABLE = os.getenv("LLM_CACHE", "1") == "1"
+CACHE_PATH = os.getenv("LLM_CACHE_PATH", "data/cache/llm.sqlite")
+CACHE_TTL_S = float(os.getenv("LLM_CACHE_TTL_S", str(7 * 24 * 3600)))
+CACHE_MAX_ENTRIES = int(os.getenv("LLM_CACHE_MAX_ENTRIES", "200000"))
+CACHE_ANY_TEMPERATURE = os.getenv("LLM_CACHE_ANY_TEMPERATURE", "0") == "1"
+
+_EVICT_EVERY = 500
+
+
+class ResponseCache:
+    """SQLite-backed cache of model responses with TTL and size-based eviction."""
+
+    def __init__(
+        self,
+        path: str = CACHE_PATH,
+        ttl_s: float = CACHE_TTL_S,
+        max_entries: int = CACHE_MAX_ENTRIES,
+        enabled: bool = CACHE_ENABLE,
+        any_temperature: bool = CACHE_ANY_TEMPERATURE,
+    ):
+        self.path = path
+        self.ttl_s = ttl_s
+        self.max_entries = max_entries
+        self.enabled = enabled
+        self.any_temperature = any_temperature
+        self.lock = threading.Lock()
+        self.conn: Optional[sqlite3.Connection] = None
+        self.hits = 0
+        self.misses = 0
+        self.puts = 0
+        self.evictions = 0
+
+    def _db(self) -> sqlite3.Connection:
+        if self.conn is None:
+            if os.path.dirname(self.path):
+                os.makedirs(os.path.dirname(self.path), exist_ok=True)
+            conn = sqlite3.connect(self.path, check_same_thread=False, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS responses ("
+                "key TEXT PRIMARY KEY, value TEXT NOT NULL, created REAL, accessed REAL)"
+            )
+            conn.execute("CREATE INDEX IF NOT EXISTS responses_accessed ON responses(accessed)")
+            self.conn = conn
+        return self.conn
+
+    def key(
+        self,
+        model_id: str,
+        system: Optional[str],
+        prompt: str,
+        max_tokens: int,
+        temperature: float,
+    ) -> Optional[str]:
+        """Cache key for a request, or None when the request should not be cached."""
+        if not self.enabled or (temperature != 0.0 and not self.any_temperature):
+            return None
+        raw = json.dumps([model_id, system, prompt, max_tokens, temperature], ensure_ascii=False)
+        return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+    def get(self, key: str) -> Optional[str]:
+        now = time.time()
+        with self.lock:
+            db = self._db()
+            row = db.execute(
+                "SELECT value FROM responses WHERE key = ? AND created > ?",
+                (key, now - self.ttl_s),
+            ).fetchone()
+            if row is None:
+                self.misses += 1
+                return None
+            db.execute("UPDATE responses SET accessed = ? WHERE key = ?", (now, key))
+            self.hits += 1
+            return row[0]
+
+    def put(self, key: str, value: str) -> None:
+        now = time.time()
+        with self.lock:
+            db = self._db()
+            db.execute(
+                "INSERT OR REPLACE INTO responses(key, value, created, accessed) VALUES (?,?,?,?)",
+                (key, value, now, now),
+            )
+            self.puts += 1
+            if self.puts % _EVICT_EVERY == 0:
+                self._evict_locked(now)
+
+    def _evict_locked(self, now: float) -> None:
+        db = self._db()
+        cur = db.execute("DELETE FROM responses WHERE created <= ?", (now - self.ttl_s,))
+        self.evictions += max(cur.rowcount, 0)
+        (count,) = db.execute("SELECT COUNT(*) FROM responses").fetchone()
+        if count > self.max_entries:
+            cur = db.execute(
+                "DELETE FROM responses WHERE key IN "
+                "(SELECT key FROM responses ORDER BY accessed LIMIT ?)",
+                (count - self.max_entries,),
+            )
+            self.evictions += max(cur.rowcount, 0)
+
+    def evict(self) -> None:
+        with self.lock:
+            self._evict_locked(time.time())
+
+    def stats(self) -> Dict[str, Any]:
+        with self.lock:
+            total = self.hits + self.misses
+            return {
+                "enabled": self.enabled,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "hit_rate": (self.hits / total) if total else 0.0,
+            }
+
+
+CACHE = ResponseCache()
@@ -1,6 +1,15 @@
 from __future__ import annotations
+import asyncio
 import threading
 import time
+from typing import Any, Dict, Optional
+
+THROTTLE_CODES = {
+    "ThrottlingException",
+    "TooManyRequestsException",
+    "ServiceUnavailableException",
+    "ModelNotReadyException",
+}
 
 
 class SimpleRateLimiter:
@@ -10,9 +19,118 @@ class SimpleRateLimiter:
         self.last = 0.0
 
     def acquire(self):
+        # reserve the next slot under the lock, sleep outside it
         with self.lock:
             now = time.time()
-            wait = self.interval - (now - self.last)
+            slot = max(now, self.last + self.interval)
+            self.last = slot
+        wait = slot - now
+        if wait > 0:
+            time.sleep(wait)
+
+
+class TokenBucketLimiter:
+    """Token bucket with AIMD rate adaptation, shared by threads and coroutines.
+
+    Each acquire reserves a token (the balance may go negative) and sleeps outside the
+    lock until its token is due, so waiters queue without holding the lock. Successes
+    raise the rate additively up to max_rate; throttling responses cut it multiplicatively
+    (at most once per cooldown_s) down to min_rate.
+    """
+
+    def __init__(
+        self,
+        rate: float = 8.0,
+        burst: float = 8.0,
+        min_rate: float = 0.5,
+        max_rate: Optional[float] = None,
+        increase: float = 0.05,
+        decrease: float = 0.5,
+        cooldown_s: float = 1.0,
+    ):
+        self.rate = rate
+        self.capacity = max(1.0, burst)
+        self.min_rate = min_rate
+        self.max_rate = max_rate or rate * 4
+        self.increase = increase
+        self.decrease = decrease
+        self.cooldown_s = cooldown_s
+        self.lock = threading.Lock()
+        self.tokens = self.capacity
+        self.updated = time.monotonic()
+        self.last_decrease = 0.0
+        self.waiting = 0
+        self.acquired = 0
+        self.successes = 0
+        self.throttles = 0
+
+    def _reserve(self) -> float:
+        now = time.monotonic()
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+        self.tokens -= 1.0
+        self.acquired += 1
+        return 0.0 if self.tokens >= 0 else -self.tokens / self.rate
+
+    def acquire(self):
+        with self.lock:
+            wait = self._reserve()
             if wait > 0:
+                self.waiting += 1
+        if wait > 0:
+            try:
                 time.sleep(wait)
-            self.last = time.time()
+            finally:
+                with self.lock:
+                    self.waiting -= 1
+
+    async def acquire_async(self):
+        with self.lock:
+            wait = self._reserve()
+            if wait > 0:
+                self.waiting += 1
+        if wait > 0:
+            try:
+                await asyncio.sleep(wait)
+            finally:
+                with self.lock:
+                    self.waiting -= 1
+
+    def on_success(self):
+        with self.lock:
+            self.successes += 1
+            self.rate = min(self.max_rate, self.rate + self.increase)
+
+    def on_throttle(self):
+        with self.lock:
+            self.throttles += 1
+            now = time.monotonic()
+            if now - self.last_decrease < self.cooldown_s:
+                return
+            self.last_decrease = now
+            self.rate = max(self.min_rate, self.rate * self.decrease)
+            self.tokens = min(self.tokens, 0.0)
+
+    def stats(self) -> Dict[str, Any]:
+        with self.lock:
+            return {
+                "rate": round(self.rate, 3),
+                "burst": self.capacity,
+                "tokens": round(self.tokens, 3),
+                "queue_depth": self.waiting,
+                "acquired": self.acquired,
+                "successes": self.successes,
+                "throttles": self.throttles,
+            }
+
+
+def is_throttle(exc: BaseException) -> bool:
+    resp = getattr(exc, "response", None)
+    if isinstance(resp, dict):
+        code = resp.get("Error", {}).get("Code")
+        if code in THROTTLE_CODES:
+            return True
+    status = getattr(resp, "status_code", None)
+    if status in (429, 503):
+        return True
+    return "throttl" in str(exc).lower()
@@ -0,0 +1,7 @@
+from __future__ import annotations
+
+
+def estimate_tokens(text: str) -> int:
+    """Cheap token estimate: ~1 token per Hangul syllable, ~4 chars per token otherwise."""
+    hangul = sum(1 for c in text if "가" <= c <= "힣")
+    return hangul + (len(text) - hangul + 3) // 4
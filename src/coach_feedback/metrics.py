@@ -0,0 +1,46 @@
+from __future__ import annotations
+import threading
+from collections import deque
+from typing import Any, Deque, Dict
+
+_WINDOW = 1024
+
+_lock = threading.Lock()
+_counters: Dict[str, float] = {}
+_timings: Dict[str, Deque[float]] = {}
+
+
+def incr(name: str, n: float = 1.0) -> None:
+    with _lock:
+        _counters[name] = _counters.get(name, 0.0) + n
+
+
+def observe(name: str, value: float) -> None:
+    with _lock:
+        _timings.setdefault(name, deque(maxlen=_WINDOW)).append(float(value))
+
+
+def _pct(sorted_vals: list[float], q: float) -> float:
+    idx = min(len(sorted_vals) - 1, int(round(q * (len(sorted_vals) - 1))))
+    return sorted_vals[idx]
+
+
+def snapshot() -> Dict[str, Any]:
+    with _lock:
+        timings = {}
+        for name, vals in _timings.items():
+            s = sorted(vals)
+            timings[name] = {
+                "count": len(s),
+                "last": vals[-1],
+                "p50": _pct(s, 0.5),
+                "p95": _pct(s, 0.95),
+                "max": s[-1],
+            }
+        return {"counters": dict(_counters), "timings": timings}
+
+
+def reset() -> None:
+    with _lock:
+        _counters.clear()
+        _timings.clear()
@@ -0,0 +1,309 @@
+from __future__ import annotations
+import argparse
+import json
+import multiprocessing as mp
+import os
+import queue
+import threading
+import time
+import uuid
+from concurrent.futures import Executor, ProcessPoolExecutor
+from typing import Any, Callable, Dict, Iterable, List, Optional
+from ..audio.model_cache import get_model
+from ..aws.bedrock_client import generate_feedback_cloud
+from ..aws import ddb_io
+from ..aws.config import CLASSIFY_MODE
+from ..aws.s3_io import download_to_temp, is_s3_uri, list_keys, parse_s3_uri
+from ..schema import TranscriptChunk
+from .voice_feedback import iter_transcript_chunks
+from .persistence import start_audio_upload
+from .voice_feedback_cloud import classify_steps, persist_session
+
+AUDIO_EXTS = (".wav", ".mp3", ".m4a", ".flac", ".ogg", ".webm")
+BATCH_ASR_WORKERS = int(os.getenv("BATCH_ASR_WORKERS", "2"))
+BATCH_LLM_WORKERS = int(os.getenv("BATCH_LLM_WORKERS", "4"))
+BATCH_IO_WORKERS = int(os.getenv("BATCH_IO_WORKERS", "8"))
+BATCH_QUEUE_SIZE = int(os.getenv("BATCH_QUEUE_SIZE", "4"))
+BATCH_CHECKPOINT = os.getenv("BATCH_CHECKPOINT", "data/batch/checkpoint.jsonl")
+BATCH_WHISPER_MODEL = os.getenv("BATCH_WHISPER_MODEL", "small")
+
+_DONE = object()
+
+
+def discover(source: str) -> List[Dict[str, Any]]:
+    """Recordings from a directory, a manifest (.txt paths / .jsonl objects) or s3://prefix."""
+    if source.startswith("s3://"):
+        bucket, prefix = parse_s3_uri(source)
+        return [
+            {"source": f"s3://{bucket}/{key}"}
+            for key in list_keys(prefix, bucket=bucket)
+            if key.lower().endswith(AUDIO_EXTS)
+        ]
+    if os.path.isdir(source):
+        return [
+            {"source": os.path.join(root, name)}
+            for root, _, files in sorted(os.walk(source))
+            for name in sorted(files)
+            if name.lower().endswith(AUDIO_EXTS)
+        ]
+    items = []
+    with open(source, "r", encoding="utf-8") as f:
+        for line in f:
+            line = line.strip()
+            if not line or line.startswith("#"):
+                continue
+            if line.startswith("{"):
+                obj = json.loads(line)
+                obj["source"] = obj.pop("audio", obj.get("source"))
+                items.append(obj)
+            else:
+                items.append({"source": line})
+    return items
+
+
+def _init_asr_worker(threads: int, model_size: str = BATCH_WHISPER_MODEL):
+    os.environ.setdefault("OMP_NUM_THREADS", str(threads))
+    get_model(model_size)
+
+
+def _asr_job(
+    audio_path: str, model_size: str = BATCH_WHISPER_MODEL, language: Optional[str] = None
+) -> List[Dict[str, Any]]:
+    chunks = iter_transcript_chunks(audio_path, model_size=model_size, language=language)
+    return [ch.model_dump() for ch in chunks]
+
+
+class Checkpoint:
+    """Append-only JSONL of finished sessions, so an interrupted batch resumes where it was."""
+
+    def __init__(self, path: str):
+        self.path = path
+        self.lock = threading.Lock()
+        self.done: Dict[str, Dict[str, Any]] = {}
+        if os.path.exists(path):
+            with open(path, "r", encoding="utf-8") as f:
+                for line in f:
+                    rec = json.loads(line)
+                    if rec.get("status") == "done":
+                        self.done[rec["source"]] = rec
+
+    def record(self, rec: Dict[str, Any]):
+        with self.lock:
+            os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+            with open(self.path, "a", encoding="utf-8") as f:
+                f.write(json.dumps(rec, ensure_ascii=False) + "\n")
+            if rec.get("status") == "done":
+                self.done[rec["source"]] = rec
+
+
+class BatchRunner:
+    """fetch -> ASR (process pool) -> Bedrock (shared limiter/client) -> persist (I/O threads).
+
+    Stages are linked by bounded queues, so a slow stage holds back the ones before it
+    instead of piling decoded transcripts up in memory.
+    """
+
+    def __init__(
+        self,
+        asr_workers: int = BATCH_ASR_WORKERS,
+        llm_workers: int = BATCH_LLM_WORKERS,
+        io_workers: int = BATCH_IO_WORKERS,
+        queue_size: int = BATCH_QUEUE_SIZE,
+        checkpoint: str = BATCH_CHECKPOINT,
+        language: str = "ko",
+        classify_mode: str = CLASSIFY_MODE,
+        model_size: str = BATCH_WHISPER_MODEL,
+        asr_pool: Optional[Executor] = None,
+    ):
+        self.asr_workers = asr_workers
+        self.llm_workers = llm_workers
+        self.io_workers = io_workers
+        self.queue_size = queue_size
+        self.checkpoint = Checkpoint(checkpoint)
+        self.language = language
+        self.classify_mode = classify_mode
+        self.model_size = model_size
+        self.asr_pool = asr_pool
+        self.lock = threading.Lock()
+        self._stats: Dict[str, Dict[str, float]] = {}
+
+    # --- stages ---
+    def _fetch(self, item: Dict[str, Any]) -> Dict[str, Any]:
+        src = item["source"]
+        if is_s3_uri(src):
+            item["audio_path"] = item["tmp"] = download_to_temp(src)
+        else:
+            item["audio_path"] = src
+        item["audio_upload"] = start_audio_upload(item["session_id"], src)
+        return item
+
+    def _asr(self, item: Dict[str, Any]) -> Dict[str, Any]:
+        # manifest entries may override the run's language / Whisper model per recording
+        item["transcript"] = self.asr_pool.submit(
+            _asr_job,
+            item["audio_path"],
+            item.get("model_size", self.model_size),
+            item.get("language", self.language),
+        ).result()
+        return item
+
+    def _llm(self, item: Dict[str, Any]) -> Dict[str, Any]:
+        transcript = item["transcript"]
+        step, secondary, matrix = item.get("force_step"), [], None
+        if not step:
+            chunks = [TranscriptChunk(**c) for c in transcript]
+            step, secondary, matrix = classify_steps(chunks, mode=self.classify_mode)
+        item["step_focus"], item["secondary"] = step, secondary
+        item["feedback"] = generate_feedback_cloud(
+            transcript, step, language=item.get("language", self.language), scores=matrix
+        )
+        return item
+
+    def _persist(self, item: Dict[str, Any]) -> Dict[str, Any]:
+        out = persist_session(
+            item["session_id"],
+            item["source"],
+            item["step_focus"],
+            item["transcript"],
+            item["feedback"],
+            item["secondary"],
+            item.get("audio_upload"),
+        )
+        item["feedback_s3"] = out.get("feedback_s3")
+        return item
+
+    # --- plumbing ---
+    def _finish(self, item: Dict[str, Any], error: Optional[BaseException] = None):
+        if item.get("audio_upload") is not None:
+            item["audio_upload"].exception()  # the temp file must outlive its upload
+        if item.get("tmp"):
+            try:
+                os.remove(item["tmp"])
+            except OSError:
+                pass
+        rec = {"source": item["source"], "session_id": item["session_id"], "ts": time.time()}
+        if error is None:
+            rec.update(status="done", step_focus=item["step_focus"])
+            rec["feedback_s3"] = item.get("feedback_s3")
+        else:
+            rec.update(status="failed", error=f"{type(error).__name__}: {error}")
+        self.checkpoint.record(rec)
+
+    def _stage(
+        self,
+        name: str,
+        fn: Callable[[Dict[str, Any]], Dict[str, Any]],
+        workers: int,
+        inbox: queue.Queue,
+        outbox: Optional[queue.Queue],
+    ) -> threading.Thread:
+        st = self._stats.setdefault(name, {"done": 0, "failed": 0, "busy_s": 0.0})
+
+        def work():
+            while True:
+                item = inbox.get()
+                if item is _DONE:
+                    inbox.put(_DONE)  # let sibling workers see it too
+                    return
+                t0 = time.perf_counter()
+                try:
+                    item = fn(item)
+                except Exception as e:
+                    with self.lock:
+                        st["failed"] += 1
+                        st["busy_s"] += time.perf_counter() - t0
+                    self._finish(item, e)
+                    continue
+                with self.lock:
+                    st["done"] += 1
+                    st["busy_s"] += time.perf_counter() - t0
+                if outbox is None:
+                    self._finish(item)
+                else:
+                    outbox.put(item)
+
+        threads = [threading.Thread(target=work, daemon=True) for _ in range(workers)]
+        for t in threads:
+            t.start()
+
+        def close():
+            for t in threads:
+                t.join()
+            if outbox is not None:
+                outbox.put(_DONE)
+
+        closer = threading.Thread(target=close, daemon=True)
+        closer.start()
+        return closer
+
+    def run(self, items: Iterable[Dict[str, Any]]) -> Dict[str, Any]:
+        t0 = time.perf_counter()
+        own_pool = self.asr_pool is None
+        if own_pool:
+            self.asr_pool = ProcessPoolExecutor(
+                max_workers=self.asr_workers,
+                mp_context=mp.get_context("spawn"),
+                initializer=_init_asr_worker,
+                initargs=(max(1, (os.cpu_count() or 1) // self.asr_workers), self.model_size),
+            )
+        q_fetch, q_asr, q_llm, q_io = (queue.Queue(maxsize=self.queue_size) for _ in range(4))
+        try:
+            last = [
+                self._stage("fetch", self._fetch, self.io_workers, q_fetch, q_asr),
+                self._stage("asr", self._asr, self.asr_workers, q_asr, q_llm),
+                self._stage("llm", self._llm, self.llm_workers, q_llm, q_io),
+                self._stage("persist", self._persist, self.io_workers, q_io, None),
+            ]
+            skipped = 0
+            for item in items:
+                if item["source"] in self.checkpoint.done:
+                    skipped += 1
+                    continue
+                item = dict(item, session_id=str(uuid.uuid4())[:8])
+                q_fetch.put(item)  # blocks while the pipeline is full
+            q_fetch.put(_DONE)
+            for t in last:
+                t.join()
+            ddb_io.WRITER.flush()
+        finally:
+            if own_pool:
+                self.asr_pool.shutdown()
+                self.asr_pool = None
+        return dict(self.stats(time.perf_counter() - t0), skipped=skipped)
+
+    def stats(self, wall_s: Optional[float] = None) -> Dict[str, Any]:
+        with self.lock:
+            stages = {k: dict(v) for k, v in self._stats.items()}
+        if wall_s:
+            for st in stages.values():
+                st["per_min"] = round(st["done"] / wall_s * 60, 2)
+        return {"stages": stages, "wall_s": wall_s}
+
+
+def main(argv: Optional[List[str]] = None):
+    ap = argparse.ArgumentParser(description="Run the cloud pipeline over many recordings")
+    ap.add_argument("source", help="directory, manifest (.txt/.jsonl) or s3://bucket/prefix")
+    ap.add_argument("--asr-workers", type=int, default=BATCH_ASR_WORKERS)
+    ap.add_argument("--llm-workers", type=int, default=BATCH_LLM_WORKERS)
+    ap.add_argument("--io-workers", type=int, default=BATCH_IO_WORKERS)
+    ap.add_argument("--queue-size", type=int, default=BATCH_QUEUE_SIZE)
+    ap.add_argument("--checkpoint", default=BATCH_CHECKPOINT)
+    ap.add_argument("--language", default="ko")
+    ap.add_argument("--classify-mode", default=CLASSIFY_MODE)
+    ap.add_argument("--model-size", default=BATCH_WHISPER_MODEL)
+    args = ap.parse_args(argv)
+    runner = BatchRunner(
+        asr_workers=args.asr_workers,
+        llm_workers=args.llm_workers,
+        io_workers=args.io_workers,
+        queue_size=args.queue_size,
+        checkpoint=args.checkpoint,
+        language=args.language,
+        classify_mode=args.classify_mode,
+        model_size=args.model_size,
+    )
+    print(json.dumps(runner.run(discover(args.source)), indent=2))
+
+
+if __name__ == "__main__":
+    main()
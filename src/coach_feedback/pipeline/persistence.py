@@ -0,0 +1,246 @@
+from __future__ import annotations
+import json
+import os
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Any, Callable, Dict, List, Optional
+from ..aws.config import S3_BUCKET
+from ..aws.s3_io import is_s3_uri, s3_uri, upload_file, upload_json
+from ..aws.ddb_io import put_feedback
+
+PERSIST_WORKERS = int(os.getenv("PERSIST_WORKERS", "8"))
+PERSIST_WRITE_BEHIND = os.getenv("PERSIST_WRITE_BEHIND", "0") == "1"
+PERSIST_SPOOL_DIR = os.getenv("PERSIST_SPOOL_DIR", "data/spool/persist")
+# drain attempts before a spooled record is moved to <spool>/dead for manual replay
+PERSIST_MAX_ATTEMPTS = int(os.getenv("PERSIST_MAX_ATTEMPTS", "10"))
+
+# Separate pools: writers block on audio uploads and must never starve them.
+UPLOAD_POOL = ThreadPoolExecutor(max_workers=PERSIST_WORKERS, thread_name_prefix="upload")
+IO_POOL = ThreadPoolExecutor(max_workers=PERSIST_WORKERS, thread_name_prefix="persist")
+
+
+def audio_key(session_id: str) -> str:
+    return f"sessions/{session_id}/input/audio.wav"
+
+
+def feedback_key(session_id: str) -> str:
+    return f"sessions/{session_id}/output/feedback.json"
+
+
+def _upload_audio(audio_path: str, key: str) -> Optional[str]:
+    """s3:// URI of the audio; None when no bucket is configured. Upload errors propagate."""
+    if is_s3_uri(audio_path):
+        return audio_path  # ingested straight from S3: nothing to copy
+    if not S3_BUCKET:
+        return None
+    return upload_file(audio_path, key)
+
+
+def audio_uri(session_id: str, audio_path: str) -> Optional[str]:
+    return audio_path if is_s3_uri(audio_path) else s3_uri(audio_key(session_id))
+
+
+def start_audio_upload(session_id: str, audio_path: str) -> Future:
+    """Begin the (multipart) audio upload right away; resolves to the s3:// URI or None."""
+    if is_s3_uri(audio_path):
+        done: Future = Future()
+        done.set_result(audio_path)
+        return done
+    return UPLOAD_POOL.submit(_upload_audio, audio_path, audio_key(session_id))
+
+
+def write_outputs(
+    out_obj: Dict[str, Any], audio_upload: Optional[Future] = None, wait: bool = False
+) -> Dict[str, Any]:
+    """Settle the audio upload, then write feedback JSON to S3 and the item to DynamoDB.
+
+    The DynamoDB put is batched. With wait=True every step must succeed: a failed upload or
+    put raises (so a spooled record is kept for retry) and the put is waited for.
+    """
+    session_id = out_obj["session_id"]
+    try:
+        if audio_upload is not None:
+            out_obj["audio_s3"] = audio_upload.result()
+        elif out_obj.get("audio_path"):
+            out_obj["audio_s3"] = _upload_audio(out_obj["audio_path"], audio_key(session_id))
+    except Exception:
+        if wait:
+            raise
+        out_obj["audio_s3"] = None
+    out_obj.pop("audio_path", None)
+    try:
+        out_obj["feedback_s3"] = (
+            upload_json(out_obj, feedback_key(session_id)) if S3_BUCKET else None
+        )
+    except Exception:
+        if wait:
+            raise
+        out_obj["feedback_s3"] = None
+    try:
+        written = put_feedback(session_id, out_obj)
+    except Exception:
+        if wait:
+            raise
+        return out_obj
+    if wait and written is not None:
+        written.result()
+    return out_obj
+
+
+def _write_durably(out_obj: Dict[str, Any], audio_upload: Optional[Future] = None):
+    return write_outputs(out_obj, audio_upload, wait=True)
+
+
+class WriteBehindQueue:
+    """Durable spool of pending session writes, drained by a background thread.
+
+    Each record is fsync'ed to its own file before enqueue returns, so writes that were
+    accepted survive a restart and are replayed by the next drain. A record that keeps
+    failing is moved to ``dead/`` after ``max_attempts`` so it cannot hold up the rest.
+    """
+
+    def __init__(
+        self,
+        root: str = PERSIST_SPOOL_DIR,
+        writer: Callable[[Dict[str, Any], Optional[Future]], Any] = _write_durably,
+        retry_s: float = 5.0,
+        max_attempts: int = PERSIST_MAX_ATTEMPTS,
+    ):
+        self.root = root
+        self.writer = writer
+        self.retry_s = retry_s
+        self.max_attempts = max_attempts
+        self.cond = threading.Condition()
+        self.pending: Dict[str, Future] = {}  # audio uploads still running in this process
+        self.thread: Optional[threading.Thread] = None
+        self.written = 0
+        self.failures = 0
+        self.attempts: Dict[str, int] = {}
+        self.dead = 0
+
+    def _files(self) -> List[str]:
+        try:
+            return sorted(f for f in os.listdir(self.root) if f.endswith(".json"))
+        except FileNotFoundError:
+            return []
+
+    def enqueue(self, out_obj: Dict[str, Any], audio_upload: Optional[Future] = None) -> str:
+        os.makedirs(self.root, exist_ok=True)
+        name = f"{time.time_ns():020d}-{out_obj['session_id']}.json"
+        tmp = os.path.join(self.root, name + ".tmp")
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump(out_obj, f, ensure_ascii=False)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp, os.path.join(self.root, name))
+        with self.cond:
+            if audio_upload is not None:
+                self.pending[name] = audio_upload
+            self.cond.notify()
+        self.start()
+        return name
+
+    def start(self):
+        with self.cond:
+            if self.thread is None or not self.thread.is_alive():
+                self.thread = threading.Thread(target=self._run, daemon=True)
+                self.thread.start()
+
+    def _bury(self, name: str):
+        dead_dir = os.path.join(self.root, "dead")
+        os.makedirs(dead_dir, exist_ok=True)
+        os.replace(os.path.join(self.root, name), os.path.join(dead_dir, name))
+        with self.cond:
+            self.pending.pop(name, None)
+        self.attempts.pop(name, None)
+        self.dead += 1
+
+    def drain_once(self) -> int:
+        done = 0
+        blocked = set()  # sessions with an earlier failed record keep their write order
+        for name in self._files():
+            session_id = name.split("-", 1)[1][: -len(".json")]
+            if session_id in blocked:
+                continue
+            path = os.path.join(self.root, name)
+            try:
+                with open(path, "r", encoding="utf-8") as f:
+                    out_obj = json.load(f)
+            except ValueError:
+                self.failures += 1
+                self._bury(name)  # unreadable record: no retry can fix it
+                continue
+            with self.cond:
+                upload = self.pending.get(name)
+                if upload is not None and upload.done() and upload.exception() is not None:
+                    # the eager upload failed: retry it from audio_path with this record
+                    del self.pending[name]
+                    upload = None
+            if upload is not None:
+                out_obj.pop("audio_path", None)
+            try:
+                self.writer(out_obj, upload)
+            except Exception:
+                self.failures += 1
+                self.attempts[name] = self.attempts.get(name, 0) + 1
+                if self.attempts[name] >= self.max_attempts:
+                    self._bury(name)
+                else:
+                    blocked.add(session_id)
+                continue
+            os.remove(path)
+            with self.cond:
+                self.pending.pop(name, None)
+            self.attempts.pop(name, None)
+            self.written += 1
+            done += 1
+        return done
+
+    def _run(self):
+        while True:
+            if not self._files():
+                with self.cond:
+                    self.cond.wait(timeout=self.retry_s)
+                continue
+            if self.drain_once() == 0 and self._files():
+                time.sleep(self.retry_s)
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "queued": len(self._files()),
+            "written": self.written,
+            "failures": self.failures,
+            "dead": self.dead,
+        }
+
+
+WRITE_BEHIND = WriteBehindQueue()
+if WRITE_BEHIND._files():
+    WRITE_BEHIND.start()  # replay records left by a previous process
+
+
+def persist_outputs(
+    out_obj: Dict[str, Any],
+    audio_path: str,
+    audio_upload: Optional[Future] = None,
+    publish: Optional[Callable[[Dict[str, Any]], Any]] = None,
+    write_behind: bool = PERSIST_WRITE_BEHIND,
+) -> Dict[str, Any]:
+    """Publish without waiting on storage: S3/DDB writes run alongside the publish, or are
+    handed to the durable write-behind spool.
+
+    The event leaves out audio_s3/feedback_s3; they are only known once the writes succeed.
+    """
+    event = {k: v for k, v in out_obj.items() if k not in ("audio_s3", "feedback_s3")}
+    if write_behind:
+        WRITE_BEHIND.enqueue(dict(out_obj, audio_path=audio_path), audio_upload)
+        if publish is not None:
+            publish(event)
+        return out_obj
+    if audio_upload is None:
+        audio_upload = start_audio_upload(out_obj["session_id"], audio_path)
+    writes = IO_POOL.submit(write_outputs, out_obj, audio_upload)
+    if publish is not None:
+        publish(event)
+    return writes.result()
@@ -1,42 +1,115 @@
 from __future__ import annotations
-from typing import List, Optional
+from typing import AsyncIterator, Callable, Iterator, List, Optional
 from ..schema import TranscriptChunk, GenerationInput, StepEnum, FeedbackOutput
-from ..classifier import classify_transcript
+from ..classifier import get_classifier
+from .. import scoring
 from ..generator import generate_feedback
-from ..audio.transcribe import transcribe_audio
+from ..audio.transcribe import iter_segments
+from ..aws.s3_io import local_audio
+from .. import metrics
+import asyncio
 import pathlib
+import time
+import uuid
+
+ChunkCallback = Callable[[TranscriptChunk], None]
+
+
+def iter_transcript_chunks(
+    audio_path: str, model_size: str = "small", language: Optional[str] = None
+) -> Iterator[TranscriptChunk]:
+    # s3:// refs are spooled to a temp file only for the duration of decoding
+    with local_audio(audio_path) as path:
+        for i, s in enumerate(iter_segments(path, model_size, language=language), start=1):
+            if s["text"]:
+                yield TranscriptChunk(id=f"seg{i}", speaker="teacher", text=s["text"])
+
+
+async def aiter_transcript_chunks(
+    audio_path: str, session_id: Optional[str] = None, on_chunk: Optional[ChunkCallback] = None
+) -> AsyncIterator[TranscriptChunk]:
+    """Async variant of stream_transcript: decoding runs in a worker thread."""
+    loop = asyncio.get_running_loop()
+    q: asyncio.Queue = asyncio.Queue()
+    done = object()
+
+    def pump():
+        try:
+            for ch in stream_transcript(audio_path, session_id, on_chunk):
+                loop.call_soon_threadsafe(q.put_nowait, ch)
+        except Exception as e:
+            loop.call_soon_threadsafe(q.put_nowait, e)
+        finally:
+            loop.call_soon_threadsafe(q.put_nowait, done)
+
+    fut = loop.run_in_executor(None, pump)
+    while True:
+        item = await q.get()
+        if item is done:
+            break
+        if isinstance(item, Exception):
+            raise item
+        yield item
+    await fut
+
+
+def new_local_session_id() -> str:
+    return "local-" + uuid.uuid4().hex[:8]
+
+
+def stream_transcript(
+    audio_path: str, session_id: Optional[str] = None, on_chunk: Optional[ChunkCallback] = None
+) -> Iterator[TranscriptChunk]:
+    """Yield chunks while decoding, emitting TranscriptChunkAppended for each one."""
+    session_id = session_id or new_local_session_id()
+    t0 = time.perf_counter()
+    first = True
+    for ch in iter_transcript_chunks(audio_path):
+        if first:
+            metrics.observe("transcript.time_to_first_chunk_s", time.perf_counter() - t0)
+            first = False
+        metrics.incr("transcript.chunks")
+        if on_chunk is not None:
+            on_chunk(ch)
+        _maybe_publish_asyncapi(
+            session_id,
+            {"session_id": session_id, "chunk": ch.model_dump()},
+            event_type="TranscriptChunkAppended",
+        )
+        yield ch
 
 
 def audio_to_transcript_chunks(audio_path: str) -> List[TranscriptChunk]:
-    full_text, segments = transcribe_audio(audio_path)
-    chunks = [
-        TranscriptChunk(id=f"seg{i}", speaker="teacher", text=s["text"])
-        for i, s in enumerate(segments, start=1)
-    ]
-    if not chunks and full_text:
-        chunks = [TranscriptChunk(id="t1", speaker="teacher", text=full_text)]
-    return chunks
+    return list(iter_transcript_chunks(audio_path))
 
 
 def run_pipeline_on_audio(
-    audio_path: str, preferred_step: Optional[StepEnum] = None
+    audio_path: str,
+    preferred_step: Optional[StepEnum] = None,
+    on_chunk: Optional[ChunkCallback] = None,
+) -> FeedbackOutput:
+    session_id = new_local_session_id()  # transcript and feedback events share one session
+    chunks = list(stream_transcript(audio_path, session_id, on_chunk))
+    return feedback_from_chunks(chunks, preferred_step, session_id)
+
+
+def feedback_from_chunks(
+    chunks: List[TranscriptChunk],
+    preferred_step: Optional[StepEnum] = None,
+    session_id: Optional[str] = None,
 ) -> FeedbackOutput:
-    chunks = audio_to_transcript_chunks(audio_path)
+    """Classify and generate from an already decoded transcript (the post-ASR half)."""
     steps_yaml = pathlib.Path(__file__).parents[1] / "steps.yaml"
-    cl_out = classify_transcript(chunks, str(steps_yaml))
-    top_step = preferred_step
-    if top_step is None:
-        max_conf = -1.0
-        for lab in cl_out.labels:
-            if lab.step_ids and lab.confidence > max_conf:
-                top_step = lab.step_ids[0]
-                max_conf = lab.confidence
-        if top_step is None:
-            top_step = StepEnum.LINK_PRAISE_TO_STUDENT_LEARNING
-    gi = GenerationInput(transcript_chunks=chunks, step_focus=top_step)
+    matrix = get_classifier(str(steps_yaml)).score_matrix(chunks)
+    weights = scoring.chunk_weights([ch.text for ch in chunks])
+    top_step = preferred_step or StepEnum(scoring.primary_step(matrix, weights=weights))
+    secondary = [StepEnum(s) for s in scoring.secondary_steps(matrix, int(top_step))]
+    gi = GenerationInput(
+        transcript_chunks=chunks, step_focus=top_step, secondary_steps=secondary or None
+    )
     fb = generate_feedback(gi)
     try:
-        session_id = "local-" + chunks[0].id
+        session_id = session_id or new_local_session_id()
         payload = {
             "session_id": session_id,
             "step_focus": int(fb.step_focus),
@@ -49,14 +122,14 @@ def run_pipeline_on_audio(
 
 
 # --- AsyncAPI publish hook (optional) ---
-def _maybe_publish_asyncapi(session_id: str, data: dict):
+def _maybe_publish_asyncapi(session_id: str, data: dict, event_type: str = "FeedbackCreated"):
     import os
 
     if os.getenv("ASYNCAPI_ENABLE", "0") != "1":
         return
     try:
-        from ..asyncapi.publisher import publish_event
+        from ..asyncapi.publisher import PUBLISH_ASYNC, publish_event
 
-        publish_event(session_id, "FeedbackCreated", data)
+        publish_event(session_id, event_type, data, fire_and_forget=PUBLISH_ASYNC)
     except Exception:
         pass
@@ -1,77 +1,306 @@
 from __future__ import annotations
-from typing import List, Optional, Dict, Any
+from typing import Callable, Iterable, List, Optional, Dict, Any, Tuple
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
 from ..schema import TranscriptChunk
-from ..audio.transcribe import transcribe_audio
-from ..aws.bedrock_client import classify_chunk_parallel_scores_concurrent, generate_feedback_cloud
-from ..aws.s3_io import upload_file, upload_json
-from ..aws.ddb_io import put_feedback
+from ..aws.bedrock_client import (
+    classify_chunk_parallel_scores_concurrent,
+    generate_feedback_cloud,
+    score_chunks,
+)
+from ..aws import bedrock_async
+from ..aws.config import CLASSIFY_BATCH_CHUNKS, CLASSIFY_MODE
+from ..scoring import (
+    DEFAULT_STEP,
+    N_STEPS,
+    chunk_weights,
+    primary_step,
+    scores_to_matrix,
+    secondary_steps,
+)
+from .. import metrics
+from ..aws.s3_io import s3_uri
+from .persistence import audio_uri, feedback_key, persist_outputs, start_audio_upload
+from .voice_feedback import (
+    ChunkCallback,
+    audio_to_transcript_chunks,
+    stream_transcript,
+)
+import asyncio
+import math
+import os
+import random
 import uuid
+from statistics import NormalDist
+import numpy as np
+
+# Chunks classified concurrently while decoding continues (each fans out to 12 step calls).
+STREAM_CLASSIFY_WORKERS = 2
+EARLY_EXIT = os.getenv("EARLY_EXIT", "0") == "1"
+EARLY_EXIT_CONFIDENCE = float(os.getenv("EARLY_EXIT_CONFIDENCE", "0.95"))
+EARLY_EXIT_MIN_CHUNKS = int(os.getenv("EARLY_EXIT_MIN_CHUNKS", "5"))
+EARLY_EXIT_MAX_CHUNKS = int(os.getenv("EARLY_EXIT_MAX_CHUNKS", "0"))  # 0 = no budget
 
 
 def audio_to_chunks(audio_path: str) -> List[TranscriptChunk]:
-    full_text, segments = transcribe_audio(audio_path)
-    chunks = [
-        TranscriptChunk(id=f"seg{i}", speaker="teacher", text=s["text"])
-        for i, s in enumerate(segments, start=1)
-    ]
-    if not chunks and full_text:
-        chunks = [TranscriptChunk(id="t1", speaker="teacher", text=full_text)]
-    return chunks
+    return audio_to_transcript_chunks(audio_path)
+
+
+def _select_steps(
+    per_chunk_scores: Iterable[Dict[int, float]], chunks: List[TranscriptChunk]
+) -> Tuple[int, List[int], np.ndarray]:
+    matrix = scores_to_matrix(list(per_chunk_scores))
+    primary = primary_step(matrix, weights=chunk_weights([ch.text for ch in chunks]))
+    return primary, secondary_steps(matrix, primary), matrix
+
+
+def _vote(per_chunk_scores: Iterable[Dict[int, float]]) -> int:
+    return primary_step(scores_to_matrix(list(per_chunk_scores)))
+
+
+def _group_scorer(mode: str) -> Tuple[int, Callable[[List[str]], List[Dict[int, float]]]]:
+    """(group size, scorer) for streaming: per_step fans out per chunk, the other modes score
+    CLASSIFY_BATCH_CHUNKS decoded chunks per score_chunks call."""
+    if mode == "per_step":
+        return 1, lambda texts: [classify_chunk_parallel_scores_concurrent(t) for t in texts]
+    return CLASSIFY_BATCH_CHUNKS, lambda texts: score_chunks(texts, mode=mode)
+
+
+def detect_primary_step(
+    chunks: List[TranscriptChunk], mode: str = CLASSIFY_MODE, early_exit: bool = EARLY_EXIT
+) -> int:
+    if early_exit:
+        return detect_primary_step_early_exit(chunks, mode=mode)[0]
+    if mode == "per_step":
+        return _vote(classify_chunk_parallel_scores_concurrent(ch.text) for ch in chunks)
+    return _vote(score_chunks([ch.text for ch in chunks], mode=mode))
+
 
+def stratified_order(n: int, seed: Optional[int] = None) -> List[int]:
+    """Visit ~sqrt(n) timeline strata round-robin, random within each, so any prefix is spread
+    across the whole session."""
+    rng = random.Random(seed)
+    k = max(1, math.isqrt(n))
+    strata = [list(range(n * i // k, n * (i + 1) // k)) for i in range(k)]
+    for s in strata:
+        rng.shuffle(s)
+    order = []
+    while any(strata):
+        rnd = [s.pop() for s in strata if s]
+        rng.shuffle(rnd)
+        order.extend(rnd)
+    return order
 
-def detect_primary_step(chunks: List[TranscriptChunk]) -> int:
-    votes = {}
-    for ch in chunks:
-        scores = classify_chunk_parallel_scores_concurrent(ch.text)
-        sid = max(scores, key=lambda k: scores[k]) if scores else 11
-        votes[sid] = votes.get(sid, 0.0) + 1.0
-    return max(votes, key=lambda k: votes[k]) if votes else 11
+
+def margin_settled(votes: np.ndarray, remaining: int, confidence: float) -> bool:
+    """True when the leader cannot be overturned, or its lead over the runner-up is
+    significant under a normal approximation of the multinomial vote difference."""
+    top = np.sort(votes)[::-1]
+    lead = top[0] - top[1]
+    if lead > remaining:
+        return True
+    n = votes.sum()
+    if n == 0:
+        return False
+    var = max(top[0] + top[1] - lead * lead / n, 1.0)
+    return lead - NormalDist().inv_cdf(confidence) * math.sqrt(var) > 0
+
+
+def detect_primary_step_early_exit(
+    chunks: List[TranscriptChunk],
+    mode: str = CLASSIFY_MODE,
+    confidence: float = EARLY_EXIT_CONFIDENCE,
+    min_chunks: int = EARLY_EXIT_MIN_CHUNKS,
+    max_chunks: int = EARLY_EXIT_MAX_CHUNKS,
+    workers: int = STREAM_CLASSIFY_WORKERS,
+    seed: Optional[int] = None,
+) -> Tuple[int, int]:
+    """Anytime majority vote: score chunks in stratified random order and stop once the
+    leading step's margin is safe or max_chunks are spent. Returns (step, chunks scored).
+
+    per_step fans out per chunk; the other modes score each stratified round (one chunk per
+    stratum) in a single score_chunks call."""
+    group_size, scorer = _group_scorer(mode)
+    order = stratified_order(len(chunks), seed)
+    if max_chunks:
+        order = order[:max_chunks]
+    if group_size > 1:
+        group_size = max(1, math.isqrt(len(chunks)))  # one stratified round
+    groups = [order[i : i + group_size] for i in range(0, len(order), group_size)]
+    votes = np.zeros(N_STEPS, dtype=np.int64)
+    scored = 0
+
+    def submit(ex, group):
+        return ex.submit(scorer, [chunks[i].text for i in group])
+
+    pending = iter(groups)
+    with ThreadPoolExecutor(max_workers=workers) as ex:
+        inflight = {submit(ex, g) for _, g in zip(range(workers), pending)}
+        while inflight:
+            done, inflight = wait(inflight, return_when=FIRST_COMPLETED)
+            for f in done:
+                for scores in f.result():
+                    scored += 1
+                    if scores and max(scores.values()) > 0:
+                        votes[max(scores, key=scores.get) - 1] += 1
+            remaining = len(order) - scored
+            if scored >= min_chunks and margin_settled(votes, remaining, confidence):
+                pending = iter(())
+            for _, g in zip(range(len(done)), pending):
+                inflight.add(submit(ex, g))
+    metrics.observe("classify.early_exit_fraction", scored / max(1, len(chunks)))
+    return (int(votes.argmax()) + 1 if votes.any() else DEFAULT_STEP), scored
+
+
+def classify_steps(
+    chunks: List[TranscriptChunk], mode: str = CLASSIFY_MODE, early_exit: bool = EARLY_EXIT
+) -> Tuple[int, List[int], Optional[np.ndarray]]:
+    """(primary, secondary, score matrix) for a decoded transcript. With early_exit only enough
+    chunks are scored to settle the primary step, so there are no secondary steps or matrix."""
+    if early_exit:
+        return detect_primary_step_early_exit(chunks, mode=mode)[0], [], None
+    return _select_steps(score_chunks([ch.text for ch in chunks], mode=mode), chunks)
 
 
 def run_cloud_pipeline(
-    audio_path: str, force_step: Optional[int] = None, language: str = "ko"
+    audio_path: str,
+    force_step: Optional[int] = None,
+    language: str = "ko",
+    on_chunk: Optional[ChunkCallback] = None,
+    classify_mode: str = CLASSIFY_MODE,
+    early_exit: bool = EARLY_EXIT,
+) -> Dict[str, Any]:
+    session_id = str(uuid.uuid4())[:8]
+    audio_upload = start_audio_upload(session_id, audio_path)  # overlaps ASR and Bedrock
+    chunks: List[TranscriptChunk] = []
+    group_size, scorer = _group_scorer(classify_mode)
+    # Step scoring starts as soon as a group of chunks is decoded, overlapping ASR. Early exit
+    # needs the whole timeline to sample from, so it scores after decoding instead.
+    stream_scoring = not force_step and not early_exit
+    with ThreadPoolExecutor(max_workers=STREAM_CLASSIFY_WORKERS) as ex:
+        futs = []
+        group: List[str] = []
+        for ch in stream_transcript(audio_path, session_id, on_chunk):
+            chunks.append(ch)
+            if stream_scoring:
+                group.append(ch.text)
+                if len(group) >= group_size:
+                    futs.append(ex.submit(scorer, group))
+                    group = []
+        if group:
+            futs.append(ex.submit(scorer, group))
+        step_focus, secondary, matrix = force_step, [], None
+        if stream_scoring:
+            scores = (s for f in futs for s in f.result())
+            step_focus, secondary, matrix = _select_steps(scores, chunks)
+        elif not force_step:
+            step_focus, secondary, matrix = classify_steps(chunks, classify_mode, early_exit=True)
+    transcript = [c.model_dump() for c in chunks]
+    fb = generate_feedback_cloud(transcript, step_focus, language=language, scores=matrix)
+    return persist_session(
+        session_id, audio_path, step_focus, transcript, fb, secondary, audio_upload
+    )
+
+
+def cloud_feedback_from_chunks(
+    session_id: str,
+    audio_path: Optional[str],
+    chunks: List[TranscriptChunk],
+    force_step: Optional[int] = None,
+    language: str = "ko",
+    audio_upload: Optional[Future] = None,
+    classify_mode: str = CLASSIFY_MODE,
+    early_exit: bool = EARLY_EXIT,
 ) -> Dict[str, Any]:
-    chunks = audio_to_chunks(audio_path)
+    """Post-ASR half of the cloud pipeline: score, generate and persist a decoded transcript."""
+    step_focus, secondary, matrix = force_step, [], None
+    if not force_step:
+        step_focus, secondary, matrix = classify_steps(chunks, classify_mode, early_exit)
     transcript = [c.model_dump() for c in chunks]
-    step_focus = force_step or detect_primary_step(chunks)
-    fb = generate_feedback_cloud(transcript, step_focus, language=language)
+    fb = generate_feedback_cloud(transcript, step_focus, language=language, scores=matrix)
+    return persist_session(
+        session_id, audio_path, step_focus, transcript, fb, secondary, audio_upload
+    )
 
-    session_id = str(uuid.uuid4())[:8]
-    key_audio = f"sessions/{session_id}/input/audio.wav"
-    key_json = f"sessions/{session_id}/output/feedback.json"
-    try:
-        s3_audio = upload_file(audio_path, key_audio)
-    except Exception:
-        s3_audio = None
+
+async def cloud_feedback_from_chunks_async(
+    session_id: str,
+    audio_path: Optional[str],
+    chunks: List[TranscriptChunk],
+    force_step: Optional[int] = None,
+    language: str = "ko",
+    audio_upload: Optional[Future] = None,
+    classify_mode: str = CLASSIFY_MODE,
+    early_exit: bool = EARLY_EXIT,
+) -> Dict[str, Any]:
+    """Event-loop variant of cloud_feedback_from_chunks: per_step scoring and generation are
+    bedrock_async coroutines, so in-flight Bedrock calls hold no threads. The batched/cascade
+    modes and the early-exit vote run in a worker thread; without httpx the whole thread path
+    is used."""
+    if bedrock_async.httpx is None:
+        return await asyncio.to_thread(
+            cloud_feedback_from_chunks,
+            session_id,
+            audio_path,
+            chunks,
+            force_step,
+            language,
+            audio_upload,
+            classify_mode,
+            early_exit,
+        )
+    step_focus, secondary, matrix = force_step, [], None
+    if not force_step:
+        if classify_mode == "per_step" and not early_exit:
+            scores = await bedrock_async.score_chunks_steps_async([ch.text for ch in chunks])
+            step_focus, secondary, matrix = _select_steps(scores, chunks)
+        else:
+            step_focus, secondary, matrix = await asyncio.to_thread(
+                classify_steps, chunks, classify_mode, early_exit
+            )
+    transcript = [c.model_dump() for c in chunks]
+    fb = await bedrock_async.generate_feedback_cloud_async(
+        transcript, step_focus, language=language, scores=matrix
+    )
+    return await asyncio.to_thread(
+        persist_session, session_id, audio_path, step_focus, transcript, fb, secondary, audio_upload
+    )
+
+
+def persist_session(
+    session_id: str,
+    audio_path: str,
+    step_focus: int,
+    transcript: List[Dict[str, Any]],
+    fb: Dict[str, Any],
+    secondary: Optional[List[int]] = None,
+    audio_upload: Optional[Future] = None,
+) -> Dict[str, Any]:
     out_obj = {
         "session_id": session_id,
         "step_focus": step_focus,
+        "secondary_steps": secondary or [],
         "transcript": transcript,
         "feedback": fb,
-        "audio_s3": s3_audio,
+        "audio_s3": audio_uri(session_id, audio_path),
+        "feedback_s3": s3_uri(feedback_key(session_id)),
     }
-    try:
-        s3_json = upload_json(out_obj, key_json)
-        out_obj["feedback_s3"] = s3_json
-    except Exception:
-        pass
-    try:
-        put_feedback(session_id, out_obj)
-    except Exception:
-        pass
-    _maybe_publish_asyncapi(session_id, out_obj)
-    return out_obj
+    return persist_outputs(
+        out_obj,
+        audio_path,
+        audio_upload,
+        publish=lambda event: _maybe_publish_asyncapi(session_id, event),
+    )
 
 
 # --- AsyncAPI publish hook (optional) ---
-def _maybe_publish_asyncapi(session_id: str, data: dict):
+def _maybe_publish_asyncapi(session_id: str, data: dict, event_type: str = "FeedbackCreated"):
     import os
 
     if os.getenv("ASYNCAPI_ENABLE", "0") != "1":
         return
     try:
-        from ..asyncapi.publisher import publish_event
+        from ..asyncapi.publisher import PUBLISH_ASYNC, publish_event
 
-        publish_event(session_id, "FeedbackCreated", data)
+        publish_event(session_id, event_type, data, fire_and_forget=PUBLISH_ASYNC)
     except Exception:
         pass
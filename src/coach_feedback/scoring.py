@@ -0,0 +1,91 @@
+from __future__ import annotations
+import os
+from typing import Dict, List, Optional, Sequence
+import numpy as np
+
+N_STEPS = 12
+STEP_IDS = np.arange(1, N_STEPS + 1)
+_STEP_RANGE = range(1, N_STEPS + 1)
+DEFAULT_STEP = 11
+PRIMARY_STEP_METHOD = os.getenv("PRIMARY_STEP_METHOD", "vote")  # vote | duration | softmax
+
+
+def scores_to_matrix(per_chunk: Sequence[Dict[int, float]]) -> np.ndarray:
+    """Dense (n_chunks, 12) float32 matrix from per-chunk {step_id: score} dicts."""
+    rows = [[d.get(sid, 0.0) for sid in _STEP_RANGE] for d in per_chunk]
+    return np.array(rows, dtype=np.float32).reshape(len(rows), N_STEPS)
+
+
+def chunk_weights(texts: Sequence[str]) -> np.ndarray:
+    """Speech-length proxy for duration weighting when segment timings are unavailable."""
+    return np.fromiter((len(t) for t in texts), dtype=np.float32, count=len(texts))
+
+
+def _softmax(m: np.ndarray, temperature: float) -> np.ndarray:
+    z = m / max(temperature, 1e-6)
+    z = z - z.max(axis=1, keepdims=True)
+    e = np.exp(z)
+    return e / e.sum(axis=1, keepdims=True)
+
+
+def aggregate(
+    matrix: np.ndarray,
+    method: str = PRIMARY_STEP_METHOD,
+    weights: Optional[np.ndarray] = None,
+    temperature: float = 0.1,
+) -> np.ndarray:
+    """Per-step session totals (12,) from a chunk score matrix; rows with no evidence skipped."""
+    matrix = np.asarray(matrix, dtype=np.float32)
+    informative = matrix.max(axis=1) > 0 if len(matrix) else np.zeros(0, dtype=bool)
+    if weights is None or method == "vote":
+        w = np.ones(len(matrix), dtype=np.float32)
+    else:
+        w = np.asarray(weights, dtype=np.float32)
+    w = np.where(informative, w, 0.0)
+    if method in ("vote", "duration"):
+        top = matrix.argmax(axis=1)
+        return np.bincount(top, weights=w, minlength=N_STEPS).astype(np.float32)
+    if method == "softmax":
+        if not informative.any():
+            return np.zeros(N_STEPS, dtype=np.float32)
+        return (_softmax(matrix, temperature) * w[:, None]).sum(axis=0) / w.sum()
+    raise ValueError(f"unknown aggregation method: {method}")
+
+
+def primary_step(
+    matrix: np.ndarray,
+    method: str = PRIMARY_STEP_METHOD,
+    weights: Optional[np.ndarray] = None,
+    default: int = DEFAULT_STEP,
+) -> int:
+    totals = aggregate(matrix, method=method, weights=weights)
+    return int(STEP_IDS[totals.argmax()]) if totals.any() else default
+
+
+def secondary_steps(
+    matrix: np.ndarray, primary: int, k: int = 2, min_score: float = 0.0
+) -> List[int]:
+    """Top-k steps by mean chunk score, excluding the primary step."""
+    if not len(matrix):
+        return []
+    mean = np.asarray(matrix, dtype=np.float32).mean(axis=0)
+    mean[primary - 1] = -np.inf
+    order = np.argsort(-mean, kind="stable")[:k]
+    return [int(STEP_IDS[i]) for i in order if mean[i] > min_score]
+
+
+def primary_steps_batch(
+    matrix: np.ndarray,
+    session_index: np.ndarray,
+    n_sessions: int,
+    weights: Optional[np.ndarray] = None,
+    default: int = DEFAULT_STEP,
+) -> np.ndarray:
+    """Primary step for many sessions at once from their stacked chunk rows (vote/duration)."""
+    matrix = np.asarray(matrix, dtype=np.float32)
+    w = np.ones(len(matrix), dtype=np.float32) if weights is None else weights
+    w = np.where(matrix.max(axis=1) > 0, w, 0.0) if len(matrix) else w
+    flat = np.asarray(session_index) * N_STEPS + matrix.argmax(axis=1)
+    totals = np.bincount(flat, weights=w, minlength=n_sessions * N_STEPS)
+    totals = totals.reshape(n_sessions, N_STEPS)
+    return np.where(totals.any(axis=1), STEP_IDS[totals.argmax(axis=1)], default)
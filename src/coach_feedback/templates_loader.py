@@ -1,8 +1,42 @@
 from __future__ import annotations
 import importlib.resources as pkg
+import os
+from jinja2 import Environment, FileSystemBytecodeCache, PackageLoader, Template
 from . import templates
 
+# TEMPLATES_AUTO_RELOAD=1 re-checks template files on every lookup (development only).
+TEMPLATES_AUTO_RELOAD = os.getenv("TEMPLATES_AUTO_RELOAD", "0") == "1"
+TEMPLATES_BYTECODE_DIR = os.getenv("TEMPLATES_BYTECODE_DIR")  # default: per-user temp dir
+
 
 def load_template(name: str) -> str:
     with pkg.files(templates).joinpath(name).open("r", encoding="utf-8") as f:
         return f.read()
+
+
+def _make_env() -> Environment:
+    return Environment(
+        loader=PackageLoader(__package__, "templates"),
+        auto_reload=TEMPLATES_AUTO_RELOAD,
+        bytecode_cache=FileSystemBytecodeCache(TEMPLATES_BYTECODE_DIR),
+        cache_size=-1,
+    )
+
+
+ENV = _make_env()
+
+
+def precompile() -> None:
+    for name in ENV.list_templates(extensions=["j2"]):
+        ENV.get_template(name)
+
+
+def get_template(name: str) -> Template:
+    return ENV.get_template(name)
+
+
+def render_template(name: str, **ctx) -> str:
+    return ENV.get_template(name).render(**ctx)
+
+
+precompile()
@@ -128,17 +128,25 @@ def render_ui():
             "Force step (optional)", options=[None] + [s.value for s in StepEnum]
         )
         lang_cloud = st.selectbox("Language", ["ko", "en"], index=0, key="lang_cloud")
+        s3_ref = st.text_input(
+            "…or an s3:// audio URI (already in the bucket, no upload)", key="s3_ref"
+        ).strip()
         if st.button("Run Cloud pipeline (ASR → Bedrock → S3/DDB)"):
-            if au_cloud is None:
-                st.warning("Upload an audio file first.")
+            if au_cloud is None and not s3_ref:
+                st.warning("Upload an audio file or enter an s3:// URI first.")
             else:
-                fd, tmp = tempfile.mkstemp(suffix="-" + au_cloud.name)
-                os.close(fd)
-                with open(tmp, "wb") as f:
-                    f.write(au_cloud.getbuffer())
+                if s3_ref:
+                    audio_ref = s3_ref
+                else:
+                    fd, audio_ref = tempfile.mkstemp(suffix="-" + au_cloud.name)
+                    os.close(fd)
+                    with open(audio_ref, "wb") as f:
+                        f.write(au_cloud.getbuffer())
                 with st.spinner("Running cloud pipeline..."):
                     try:
-                        result = run_cloud_pipeline(tmp, force_step=force_step, language=lang_cloud)
+                        result = run_cloud_pipeline(
+                            audio_ref, force_step=force_step, language=lang_cloud
+                        )
                         st.success("Done")
                         st.json(result)
                     except Exception as e:
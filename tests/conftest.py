@@ -0,0 +1,5 @@
+import os
+
+# Keep test runs from reading or writing the on-disk response/transcript caches.
+os.environ.setdefault("LLM_CACHE", "0")
+os.environ.setdefault("TRANSCRIPT_CACHE", "0")
@@ -0,0 +1,26 @@
+import threading
+from src.coach_feedback.aws import clients
+
+
+def test_clients_are_shared_per_config():
+    clients.clear()
+    a = clients.client("s3", region="us-east-1", profile=None)
+    b = clients.client("s3", region="us-east-1", profile=None)
+    c = clients.client("s3", region="us-east-1", profile=None, timeout_s=5, max_pool_connections=32)
+    assert a is b and a is not c
+    assert c.meta.config.max_pool_connections == 32
+
+
+def test_client_creation_is_thread_safe():
+    clients.clear()
+    out = []
+
+    def get():
+        out.append(clients.client("sts", region="us-east-1", profile=None))
+
+    ts = [threading.Thread(target=get) for _ in range(16)]
+    for t in ts:
+        t.start()
+    for t in ts:
+        t.join()
+    assert len({id(x) for x in out}) == 1
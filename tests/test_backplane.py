@@ -0,0 +1,67 @@
+import asyncio
+import json
+from src.coach_feedback.asyncapi.backplane import Backplane, EventBus, InMemoryBackplane, MemoryHub
+from src.coach_feedback.asyncapi.broadcast import Broadcaster
+
+
+class Sock:
+    def __init__(self):
+        self.frames = []
+
+    async def send(self, data):
+        self.frames.append(json.loads(data))
+
+
+async def _settle():
+    for _ in range(5):
+        await asyncio.sleep(0)
+
+
+def test_events_reach_every_node_hosting_the_session_once():
+    async def main():
+        hub = MemoryHub()
+        nodes = [
+            EventBus(Broadcaster(heartbeat_s=0), InMemoryBackplane(hub), node_id=n)
+            for n in ("a", "b", "c")
+        ]
+        for bus in nodes:
+            await bus.start()
+        a, b, c = nodes
+        on_a, on_b, other = Sock(), Sock(), Sock()
+        a.local.subscribe("s1", on_a.send)
+        b.local.subscribe("s1", on_b.send)
+        c.local.subscribe("s2", other.send)
+        await _settle()
+        await a.publish("s1", {"type": "FeedbackCreated", "n": 1})
+        await c.publish("s1", {"type": "FeedbackCreated", "n": 2})  # node without subscribers
+        await _settle()
+        assert [f["n"] for f in on_a.frames] == [1, 2]
+        assert [f["n"] for f in on_b.frames] == [1, 2]
+        assert other.frames == [] and c.backplane.received == 0
+        assert a.echoes == 1 and a.backplane.stats()["sessions"] == 1
+
+        # the last local socket leaving unsubscribes the node from the session topic
+        await b.local.unsubscribe(next(iter(b.local.subs["s1"])))
+        await _settle()
+        await a.publish("s1", {"type": "FeedbackCreated", "n": 3})
+        assert b.backplane.sessions == set() and b.backplane.received == 2
+
+    asyncio.run(main())
+
+
+def test_backplane_failure_does_not_reach_the_publisher():
+    class Down(Backplane):
+        async def publish(self, envelope):
+            raise ConnectionError("broker down")
+
+    async def main():
+        bus = EventBus(Broadcaster(heartbeat_s=0), Down(), node_id="a")
+        await bus.start()
+        sock = Sock()
+        bus.local.subscribe("s1", sock.send)
+        await bus.publish("s1", {"type": "FeedbackCreated", "n": 1})
+        await _settle()
+        assert [f["n"] for f in sock.frames] == [1]
+        assert bus.stats()["errors"] == 1
+
+    asyncio.run(main())
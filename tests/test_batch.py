@@ -0,0 +1,80 @@
+import json
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from src.coach_feedback.pipeline import batch
+
+
+def _fakes(monkeypatch, fail=()):
+    persisted = []
+    lock = threading.Lock()
+
+    def asr(path, model_size, language):
+        if path in fail:
+            raise RuntimeError("decode failed")
+        return [{"id": "seg1", "speaker": "teacher", "text": f"plan for {path}"}]
+
+    def persist(session_id, audio_path, step, transcript, fb, secondary, audio_upload):
+        with lock:
+            persisted.append(audio_path)
+        return {"feedback_s3": f"s3://b/{session_id}.json"}
+
+    monkeypatch.setattr(batch, "_asr_job", asr)
+    monkeypatch.setattr(batch, "start_audio_upload", lambda session_id, path: None)
+    monkeypatch.setattr(batch, "classify_steps", lambda chunks, mode: (7, [], None))
+    monkeypatch.setattr(batch, "generate_feedback_cloud", lambda t, s, **k: {"praise": "ok"})
+    monkeypatch.setattr(batch, "persist_session", persist)
+    return persisted
+
+
+def test_discover_dir_and_manifest(tmp_path):
+    (tmp_path / "a.wav").write_bytes(b"")
+    (tmp_path / "notes.txt").write_text("x")
+    (tmp_path / "sub").mkdir()
+    (tmp_path / "sub" / "b.MP3").write_bytes(b"")
+    assert [i["source"] for i in batch.discover(str(tmp_path))] == [
+        str(tmp_path / "a.wav"),
+        str(tmp_path / "sub" / "b.MP3"),
+    ]
+    manifest = tmp_path / "m.jsonl"
+    manifest.write_text('# comment\nx.wav\n{"audio": "y.wav", "force_step": 3}\n')
+    assert batch.discover(str(manifest)) == [
+        {"source": "x.wav"},
+        {"source": "y.wav", "force_step": 3},
+    ]
+
+
+def test_batch_runs_all_stages_and_resumes_from_checkpoint(monkeypatch, tmp_path):
+    persisted = _fakes(monkeypatch, fail={"bad.wav"})
+    ckpt = str(tmp_path / "ckpt.jsonl")
+    items = [{"source": f"{i}.wav"} for i in range(12)] + [{"source": "bad.wav"}]
+    runner = batch.BatchRunner(
+        asr_workers=2,
+        llm_workers=2,
+        io_workers=2,
+        queue_size=1,
+        checkpoint=ckpt,
+        asr_pool=ThreadPoolExecutor(2),
+    )
+    out = runner.run(items)
+    assert sorted(persisted) == sorted(f"{i}.wav" for i in range(12))
+    assert out["stages"]["asr"] == dict(out["stages"]["asr"], done=12, failed=1)
+    assert out["stages"]["persist"]["done"] == 12
+    recs = [json.loads(line) for line in open(ckpt, encoding="utf-8")]
+    assert {r["status"] for r in recs if r["source"] == "bad.wav"} == {"failed"}
+    assert all(r["step_focus"] == 7 for r in recs if r["status"] == "done")
+
+    persisted.clear()
+    again = batch.BatchRunner(checkpoint=ckpt, asr_pool=ThreadPoolExecutor(1)).run(items)
+    assert again["skipped"] == 12 and persisted == []
+
+
+def test_asr_gets_each_items_language_and_model(monkeypatch, tmp_path):
+    _fakes(monkeypatch)
+    seen = []
+    monkeypatch.setattr(batch, "_asr_job", lambda path, *args: seen.append((path, *args)) or [])
+    items = [{"source": "a.wav"}, {"source": "b.wav", "language": "en", "model_size": "medium"}]
+    runner = batch.BatchRunner(
+        checkpoint=str(tmp_path / "ckpt.jsonl"), model_size="base", asr_pool=ThreadPoolExecutor(1)
+    )
+    runner.run(items)
+    assert sorted(seen) == [("a.wav", "base", "ko"), ("b.wav", "medium", "en")]
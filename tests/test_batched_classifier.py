@@ -0,0 +1,37 @@
+import json
+import re
+from src.coach_feedback.aws import bedrock_client as bc
+
+
+def test_pack_chunks_respects_budget_and_cap():
+    texts = ["a" * 400, "b" * 400, "c" * 40, "d" * 40, "e" * 40]
+    assert bc.pack_chunks(texts, token_budget=150, max_chunks_per_call=2) == [[0], [1, 2], [3, 4]]
+
+
+def test_parse_batch_scores_tolerates_fences_and_gaps():
+    out = '```json\n{"results": [{"index": 1, "scores": {"1": 0.2, "2": "bad", "3": 7}}]}\n```'
+    parsed = bc.parse_batch_scores(out, 2, [1, 2, 3])
+    assert parsed == [{}, {1: 0.2, 3: 1.0}]
+    assert bc.parse_batch_scores("not json", 1, [1]) == [{}]
+
+
+def test_batched_mode_one_call_per_pack_with_single_step_fallback(monkeypatch):
+    calls = {"batch": 0, "single": 0}
+
+    def fake_invoke_cfg(prompt, system=None, max_tokens=0, temperature=0, timeout_s=0):
+        if system == "Classify coaching steps":
+            calls["batch"] += 1
+            n = len(re.findall(r"^\[\d+\]", prompt, re.M))
+            results = [
+                {"index": i, "scores": {str(s): (0.9 if s == 7 else 0.1) for s in range(1, 13)}}
+                for i in range(n)
+            ]
+            del results[0]["scores"]["12"]  # force one per-step fallback
+            return json.dumps({"results": results})
+        calls["single"] += 1
+        return json.dumps({"score": 0.5})
+
+    monkeypatch.setattr(bc, "_invoke_claude_cfg", fake_invoke_cfg)
+    tops = bc.top_step_per_chunk(["let's plan", "when and where", "timeline"], mode="batched")
+    assert tops == [7, 7, 7]
+    assert calls == {"batch": 1, "single": 1}
@@ -0,0 +1,46 @@
+import asyncio
+import json
+import re
+from types import SimpleNamespace
+from botocore.credentials import ReadOnlyCredentials
+from src.coach_feedback.aws import bedrock_async as ba
+
+
+def test_score_chunks_steps_async_bounded(monkeypatch):
+    state = {"in_flight": 0, "peak": 0}
+
+    async def fake_invoke(prompt, system=None, max_tokens=0, temperature=0, timeout_s=0):
+        state["in_flight"] += 1
+        state["peak"] = max(state["peak"], state["in_flight"])
+        await asyncio.sleep(0.001)
+        state["in_flight"] -= 1
+        sid = int(re.search(r"ID\s(\d+)", prompt).group(1))
+        return json.dumps({"score": 0.9 if sid == 7 else 0.1})
+
+    monkeypatch.setattr(ba, "_invoke_claude_async", fake_invoke)
+    out = asyncio.run(
+        ba.score_chunks_steps_async(["a", "b"], max_concurrency=4, calls_per_sec=10_000)
+    )
+    assert [max(d, key=d.get) for d in out] == [7, 7]
+    assert len(out[0]) == 12 and state["peak"] <= 4
+
+
+def test_generate_feedback_async_falls_back_on_bad_json(monkeypatch):
+    async def fake_invoke(*a, **k):
+        return "not json"
+
+    monkeypatch.setattr(ba, "_invoke_claude_async", fake_invoke)
+    fb = asyncio.run(ba.generate_feedback_cloud_async([{"id": "t1", "text": "hi"}], 11))
+    assert fb["praise"] and fb["evidence_quote"]
+
+
+def test_signed_request_has_sigv4_headers(monkeypatch):
+    creds = SimpleNamespace(
+        get_frozen_credentials=lambda: ReadOnlyCredentials("AKIDEXAMPLE", "secret", None)
+    )
+    monkeypatch.setattr(
+        ba.clients, "session", lambda: SimpleNamespace(get_credentials=lambda: creds)
+    )
+    url, headers = ba._signed_request("anthropic.claude-3:0", b"{}")
+    assert url.endswith("/model/anthropic.claude-3%3A0/invoke")
+    assert headers["Authorization"].startswith("AWS4-HMAC-SHA256 Credential=AKIDEXAMPLE/")
@@ -0,0 +1,130 @@
+import asyncio
+import json
+from src.coach_feedback.asyncapi.broadcast import Broadcaster
+
+
+class Sock:
+    def __init__(self, gate=None):
+        self.frames = []
+        self.gate = gate
+        self.closed = None
+
+    async def send(self, data):
+        if self.gate is not None:
+            await self.gate.wait()
+        self.frames.append(data)
+
+    async def close(self, code):
+        self.closed = code
+
+
+async def _settle():
+    for _ in range(5):
+        await asyncio.sleep(0)
+
+
+def test_slow_subscriber_does_not_block_others_and_frames_are_shared():
+    async def main():
+        b = Broadcaster(heartbeat_s=0)
+        slow, fast = Sock(asyncio.Event()), Sock()
+        b.subscribe("s1", slow.send)
+        b.subscribe("s1", fast.send)
+        await b.publish("s1", {"type": "FeedbackCreated", "n": 1})
+        await _settle()
+        assert [json.loads(f)["n"] for f in fast.frames] == [1] and slow.frames == []
+        slow.gate.set()
+        await _settle()
+        assert slow.frames[0] is fast.frames[0]  # serialized once
+
+    asyncio.run(main())
+
+
+def test_slow_consumer_policies():
+    async def run(policy):
+        b = Broadcaster(maxsize=2, policy=policy, heartbeat_s=0)
+        sock = Sock(asyncio.Event())
+        sub = b.subscribe("s1", sock.send, sock.close)
+        await b.publish("s1", {"type": "FeedbackCreated"})
+        await _settle()  # writer is now blocked sending the first frame
+        for i in range(4):
+            await b.publish("s1", {"type": "JobProgress", "job_id": "j", "stage": str(i)})
+        await b.publish("s1", {"type": "TranscriptChunkAppended", "n": 9})
+        await _settle()
+        return b, sub, sock, [json.loads(d) for d, _, _ in sub.queue]
+
+    async def main():
+        b, sub, sock, queued = await run("drop_oldest")
+        assert [q.get("stage", q.get("n")) for q in queued] == ["3", 9]
+        assert b.stats()["dropped"] == 3
+        b, sub, sock, queued = await run("coalesce")
+        assert [q.get("stage", q.get("n")) for q in queued] == ["3", 9]
+        assert b.stats()["coalesced"] == 3
+        b, sub, sock, _ = await run("disconnect")
+        assert sub.closed and sock.closed == 1013 and b.stats()["subscribers"] == 0
+
+    asyncio.run(main())
+
+
+def test_heartbeat_reaps_stalled_connections():
+    async def main():
+        b = Broadcaster(heartbeat_s=0.01, send_timeout_s=0.02, heartbeat_misses=0)
+        stuck, ok = Sock(asyncio.Event()), Sock()
+        b.subscribe("s1", stuck.send, stuck.close)
+        b.subscribe("s1", ok.send)
+        await b.publish("s1", {"type": "FeedbackCreated"})
+        for _ in range(50):
+            if b.stats()["reaped"]:
+                break
+            await asyncio.sleep(0.01)
+        assert b.stats()["reaped"] == 1 and b.sessions() == {"s1": 1}
+        assert any(json.loads(f)["type"] == "Ping" for f in ok.frames)
+        assert stuck.closed == 1000
+        await b.unsubscribe(next(iter(b.subs["s1"])))
+        await _settle()
+
+    asyncio.run(main())
+
+
+def test_heartbeat_reaps_clients_that_stop_answering():
+    async def main():
+        b = Broadcaster(heartbeat_s=0.01, heartbeat_misses=3)
+        gone, alive = Sock(), Sock()
+        b.subscribe("s1", gone.send, gone.close)
+        alive_sub = b.subscribe("s1", alive.send)
+        for _ in range(100):
+            alive_sub.seen()  # answers every Ping
+            if b.stats()["reaped"]:
+                break
+            await asyncio.sleep(0.005)
+        assert b.stats()["reaped"] == 1 and gone.closed == 1000
+        assert b.subs["s1"] == {alive_sub}
+        await b.unsubscribe(alive_sub)
+        await _settle()
+
+    asyncio.run(main())
+
+
+def test_listen_only_clients_are_kept_by_default():
+    async def main():
+        b = Broadcaster(heartbeat_s=0.01)
+        listener = Sock()
+        sub = b.subscribe("s1", listener.send, listener.close)
+        await asyncio.sleep(0.08)  # many heartbeats without a reply
+        assert b.stats()["reaped"] == 0 and b.subs["s1"] == {sub}
+        await b.unsubscribe(sub)
+        await _settle()
+
+    asyncio.run(main())
+
+
+def test_websocket_replies_and_publish_go_through_send_queue():
+    from fastapi.testclient import TestClient
+    from src.coach_feedback.asyncapi import server
+
+    with TestClient(server.app) as client:
+        with client.websocket_connect("/ws/sessions/ws1") as ws:
+            ws.send_text("not json")
+            assert ws.receive_json() == {"type": "Error", "error": "Invalid JSON"}
+            assert client.get("/healthz").json()["broadcast"]["subscribers"] == 1
+            client.post("/publish/ws1", json={"type": "FeedbackCreated", "session_id": "ws1"})
+            assert ws.receive_json()["type"] == "FeedbackCreated"
@@ -0,0 +1,45 @@
+from src.coach_feedback import cascade
+
+
+def _fake_remote(calls):
+    def score(texts, step_ids):
+        calls.append((list(texts), list(step_ids)))
+        return [{sid: 0.1 * sid for sid in step_ids} for _ in texts]
+
+    return score
+
+
+def test_cascade_skips_short_keeps_confident_and_escalates_rest():
+    texts = [
+        "네.",  # too short
+        "Let's plan when and where you will try it.",  # three step-7 cues: local
+        "because students practice",  # 6/8/11 tie: top-k candidates only
+        "오늘 수업 정말 수고 많으셨습니다",  # no cues: all 12 steps
+    ]
+    calls = []
+    scores, st = cascade.cascade_score_chunks(
+        texts, threshold=0.6, remote_scorer=_fake_remote(calls)
+    )
+    assert scores[0] == {} and max(scores[1], key=scores[1].get) == 7
+    assert sorted(scores[2]) == [6, 8, 11] and len(scores[3]) == 12
+    assert st["skipped"] == 1 and st["local"] == 1 and st["escalated"] == 2
+    assert st["bedrock_calls"] == 3 + 12 and st["calls_saved"] == 4 * 12 - 15
+    assert sorted(len(s) for _, s in calls) == [3, 12]
+
+
+def test_local_scorer_narrows_candidates_for_cue_less_chunks():
+    import numpy as np
+
+    def local(texts):
+        m = np.zeros((len(texts), 12), dtype=np.float32)
+        m[:, [2, 4, 9]] = [0.3, 0.2, 0.1]
+        return m
+
+    calls = []
+    scores, st = cascade.cascade_score_chunks(
+        ["오늘 수업 정말 수고 많으셨습니다"],
+        top_k=2,
+        local_scorer=local,
+        remote_scorer=_fake_remote(calls),
+    )
+    assert calls[0][1] == [3, 5] and st["bedrock_calls"] == 2
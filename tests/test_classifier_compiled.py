@@ -0,0 +1,53 @@
+import pathlib
+from src.coach_feedback.classifier import StepClassifier, classify_transcript, get_classifier
+from src.coach_feedback.schema import TranscriptChunk, StepEnum
+
+STEPS_YAML = pathlib.Path(__file__).parents[1] / "src" / "coach_feedback" / "steps.yaml"
+
+
+def test_hangul_cues_match_with_particles_and_ascii_keeps_boundaries():
+    clf = get_classifier(str(STEPS_YAML))
+    hits = clf.chunk_hits("지난번 수업의 학습을 돌아보면, the planet showed a plan")
+    assert hits[1] == 1 and hits[11] == 1 and hits[7] == 1  # "plan" but not "planet"
+
+
+def test_hangul_cues_are_anchored_at_the_start_of_a_word():
+    clf = get_classifier(str(STEPS_YAML))
+    assert clf.chunk_hits("이전이랑 비교하면") == {1: 1}  # not "전이" inside "이전이"
+    assert clf.chunk_hits("(전이) 효과") == {11: 1}
+
+
+def test_overlapping_cues_and_shared_cues_map_to_all_steps():
+    clf = StepClassifier(
+        {
+            2: {"cues": ["관찰"]},
+            9: {"cues": ["try next"]},
+            10: {"cues": ["관찰"]},
+            12: {"cues": ["next step"]},
+        }
+    )
+    assert clf.chunk_hits("let's try next step") == {9: 1, 12: 1}
+    assert clf.chunk_hits("수업 관찰 결과") == {2: 1, 10: 1}
+
+
+def test_classify_transcript_labels_and_hit_counts():
+    chunks = [
+        TranscriptChunk(id="a", speaker="teacher", text="Because students practice, we plan."),
+        TranscriptChunk(id="b", speaker="coach", text="hello there"),
+    ]
+    out = classify_transcript(chunks, str(STEPS_YAML))
+    assert out.labels[0].step_ids == [StepEnum(6), StepEnum(7), StepEnum(8), StepEnum(11)]
+    assert out.labels[1].step_ids == [] and out.labels[1].confidence == 0.2
+    assert get_classifier(str(STEPS_YAML)).hit_counts(chunks) == {6: 1, 7: 1, 8: 1, 11: 1}
+
+
+def test_classifier_rebuilt_when_yaml_changes(tmp_path):
+    import os
+
+    p = tmp_path / "steps.yaml"
+    p.write_text('steps:\n  3: { name: "x", cues: ["pick"] }\n', encoding="utf-8")
+    first = get_classifier(str(p))
+    assert get_classifier(str(p)) is first
+    p.write_text('steps:\n  4: { name: "y", cues: ["agree"] }\n', encoding="utf-8")
+    os.utime(p, (1, 1))
+    assert get_classifier(str(p)).chunk_hits("we agree") == {4: 1}
@@ -0,0 +1,50 @@
+import numpy as np
+from src.coach_feedback import compaction
+from src.coach_feedback.aws import bedrock_client as bc
+
+TRANSCRIPT = [
+    {"id": "t1", "speaker": "coach", "text": "안녕하세요", "ts": "2024-01-01T00:00:00Z"},
+    {"id": "t2", "speaker": "coach", "text": "오늘 수업 어땠어요?"},
+    {"id": "t3", "speaker": "teacher", "text": "Let's plan when to try it."},
+    {"id": "t4", "speaker": "coach", "text": "날씨 얘기 " * 40},
+    {"id": "t5", "speaker": "teacher", "text": "students practiced more"},
+]
+
+
+def test_merge_and_compact_line_format():
+    turns = compaction.merge_turns(TRANSCRIPT)
+    assert [t["rows"] for t in turns] == [[0, 1], [2], [3], [4]]
+    text, st = compaction.compact_transcript(TRANSCRIPT, 7, token_budget=10_000)
+    assert text.splitlines()[0] == "[1] coach: 안녕하세요 오늘 수업 어땠어요?"
+    assert '"ts"' not in text and st == {"segments": 5, "turns": 4, "kept": 4}
+
+
+def test_budget_keeps_relevant_turns_in_order_with_gaps():
+    scores = np.zeros((5, 12), dtype=np.float32)
+    scores[2, 6] = 0.9  # plan -> step 7
+    scores[4, 10] = 0.8
+    text, st = compaction.compact_transcript(TRANSCRIPT, 7, scores=scores, token_budget=22)
+    assert text.splitlines() == [
+        "[...]",
+        "[3] teacher: Let's plan when to try it.",
+        "[...]",
+        "[5] teacher: students practiced more",
+    ]
+    assert st["kept"] == 2
+
+
+def test_tiny_budget_truncates_the_most_relevant_turn():
+    scores = np.zeros((5, 12), dtype=np.float32)
+    scores[3, 6] = 0.9  # the long turn is the relevant one
+    text, st = compaction.compact_transcript(TRANSCRIPT, 7, scores=scores, token_budget=9)
+    lines = text.splitlines()
+    assert lines[0] == "[...]" and lines[1].startswith("[4] coach: 날씨")
+    assert lines[1].endswith(" [...]") and st["kept"] == 1
+    assert compaction.estimate_tokens(lines[1]) + 1 <= 9
+
+
+def test_feedback_prompt_uses_compact_transcript():
+    compact = bc.build_feedback_prompt(TRANSCRIPT, 7)
+    full = bc.build_feedback_prompt(TRANSCRIPT, 7, compact=False)
+    assert "[3] teacher:" in compact and '"speaker"' not in compact
+    assert '"speaker"' in full and len(compact) < len(full)
@@ -0,0 +1,68 @@
+from decimal import Decimal
+import pytest
+from src.coach_feedback.aws import ddb_io
+
+
+class FakeClient:
+    def __init__(self, unprocessed_rounds=0, fail=False):
+        self.calls = []
+        self.unprocessed_rounds = unprocessed_rounds
+        self.fail = fail
+
+    def batch_write_item(self, RequestItems):
+        ((table, reqs),) = RequestItems.items()
+        self.calls.append(len(reqs))
+        if self.fail:
+            raise RuntimeError("throttled")
+        if self.unprocessed_rounds:
+            self.unprocessed_rounds -= 1
+            return {"UnprocessedItems": {table: reqs[len(reqs) // 2 :]}}
+        return {"UnprocessedItems": {}}
+
+
+def test_to_attr_converts_floats_in_one_pass():
+    item = ddb_io.serialize_item(
+        {
+            "session_id": "s",
+            "conf": 0.6,
+            "n": 3,
+            "ok": True,
+            "nan": float("nan"),
+            "d": Decimal("1.5"),
+            "fb": {"scores": [0.1, None, "x"]},
+        }
+    )
+    assert item["conf"] == {"N": "0.6"} and item["n"] == {"N": "3"}
+    assert item["ok"] == {"BOOL": True} and item["nan"] == {"NULL": True}
+    assert item["d"] == {"N": "1.5"}
+    assert item["fb"]["M"]["scores"]["L"] == [{"N": "0.1"}, {"NULL": True}, {"S": "x"}]
+
+
+def test_batch_writer_groups_by_25_and_retries_unprocessed():
+    fake = FakeClient(unprocessed_rounds=1)
+    w = ddb_io.BatchWriter(table="t", flush_s=0.05, backoff_s=0.001, client=lambda: fake)
+    futs = [w.put({"session_id": f"s{i}", "ts": 1, "confidence": 0.5}) for i in range(30)]
+    assert all(f.result(timeout=5) is None for f in futs)
+    assert max(fake.calls) == 25 and len(fake.calls) == 3  # 25 + 5, one partial resend
+    assert w.stats() == dict(w.stats(), queued=0, written=30, batches=2, retries=1, failed=0)
+
+
+def test_batch_writer_fails_futures_after_retries():
+    w = ddb_io.BatchWriter(
+        table="t", max_retries=2, backoff_s=0.001, client=lambda: FakeClient(fail=True)
+    )
+    fut = w.put({"session_id": "s", "ts": 1})
+    with pytest.raises(RuntimeError):
+        fut.result(timeout=5)
+    assert w.stats()["failed"] == 1
+
+
+def test_large_transcript_moves_to_s3(monkeypatch):
+    from src.coach_feedback.aws import s3_io
+
+    monkeypatch.setattr(s3_io, "upload_json", lambda obj, key: f"s3://b/{key}")
+    big = {"session_id": "s", "transcript": [{"text": "가" * 1000}] * 200}
+    item = ddb_io.offload_transcript(big)
+    assert "transcript" not in item and item["transcript_s3"].endswith("s/output/transcript.json")
+    small = {"session_id": "s", "transcript": [{"text": "hi"}]}
+    assert ddb_io.offload_transcript(small) is small
@@ -0,0 +1,67 @@
+import numpy as np
+from src.coach_feedback.pipeline import voice_feedback_cloud as vfc
+from src.coach_feedback.schema import TranscriptChunk
+
+
+def _chunks(steps):
+    return [
+        TranscriptChunk(id=f"c{i}", speaker="teacher", text=str(s)) for i, s in enumerate(steps)
+    ]
+
+
+def _fake_scorer(mode):
+    return 1, lambda texts: [{int(t): 0.9} for t in texts]
+
+
+def test_stratified_order_is_a_spread_permutation():
+    order = vfc.stratified_order(100, seed=0)
+    assert sorted(order) == list(range(100))
+    assert len({i // 10 for i in order[:10]}) == 10  # first round touches every stratum
+
+
+def test_margin_settled():
+    assert vfc.margin_settled(np.array([12, 2] + [0] * 10), remaining=100, confidence=0.95)
+    assert not vfc.margin_settled(np.array([6, 5] + [0] * 10), remaining=100, confidence=0.95)
+    assert vfc.margin_settled(np.array([6, 5] + [0] * 10), remaining=0, confidence=0.95)
+
+
+def test_early_exit_stops_on_clear_winner(monkeypatch):
+    monkeypatch.setattr(vfc, "_group_scorer", _fake_scorer)
+    steps = [3] * 160 + [7] * 40
+    step, scored = vfc.detect_primary_step_early_exit(_chunks(steps), seed=1, workers=1)
+    assert step == 3 and scored < 60
+
+
+def test_early_exit_respects_budget_and_full_pass_on_ties(monkeypatch):
+    monkeypatch.setattr(vfc, "_group_scorer", _fake_scorer)
+    tie = _chunks([3, 7] * 20)
+    assert vfc.detect_primary_step_early_exit(tie, seed=1, max_chunks=10)[1] == 10
+    assert vfc.detect_primary_step_early_exit(tie, seed=1)[1] == 40
+
+
+def test_early_exit_scores_each_round_in_one_call(monkeypatch):
+    calls = []
+
+    def score_chunks(texts, mode):
+        calls.append(len(texts))
+        return [{int(t): 0.9} for t in texts]
+
+    monkeypatch.setattr(vfc, "score_chunks", score_chunks)
+    steps = [3] * 80 + [7] * 20
+    step, scored = vfc.detect_primary_step_early_exit(_chunks(steps), mode="batched", seed=1)
+    assert step == 3 and scored == sum(calls) < 100
+    assert all(n == 10 for n in calls)  # a round spans the sqrt(100) strata
+
+
+def test_cloud_feedback_uses_early_exit_and_skips_unsure_votes(monkeypatch):
+    monkeypatch.setattr(
+        vfc, "_group_scorer", lambda mode: (1, lambda texts: [{int(t): 0.0} for t in texts])
+    )
+    monkeypatch.setattr(vfc, "generate_feedback_cloud", lambda t, s, **k: {"step": s})
+    monkeypatch.setattr(vfc, "persist_session", lambda sid, a, step, *rest: step)
+    step = vfc.cloud_feedback_from_chunks("s", None, _chunks([3] * 6), early_exit=True)
+    assert step == vfc.DEFAULT_STEP  # all-zero scores cast no vote
+
+    monkeypatch.setattr(vfc, "_group_scorer", _fake_scorer)
+    monkeypatch.setattr(vfc, "score_chunks", lambda *a, **k: 1 / 0)  # full pass must not run
+    assert vfc.cloud_feedback_from_chunks("s", None, _chunks([3] * 6), early_exit=True) == 3
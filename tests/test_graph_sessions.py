@@ -0,0 +1,87 @@
+import json
+import os
+from fastapi.testclient import TestClient
+from src.coach_feedback.graph import api
+from src.coach_feedback.graph.sessions import SessionCache
+
+FEEDBACK = {
+    "step_focus": 3,
+    "praise": "p",
+    "improvement": "i",
+    "why_it_matters": "w",
+    "evidence_quote": ["q"],
+    "student_learning_link": "l",
+    "next_step": "n",
+}
+
+
+def _write(root, sid, praise="p"):
+    out = os.path.join(root, sid, "output")
+    os.makedirs(out, exist_ok=True)
+    data = {
+        "session_id": sid,
+        "step_focus": 3,
+        "transcript": [{"id": "t1", "speaker": "teacher", "text": "hi"}],
+        "feedback": dict(FEEDBACK, praise=praise),
+    }
+    path = os.path.join(out, "feedback.json")
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(data, f)
+    return path
+
+
+def test_cache_revalidates_by_mtime_and_evicts(tmp_path):
+    cache = SessionCache(root=str(tmp_path), max_entries=1)
+    path = _write(tmp_path, "a")
+    assert cache.get("a").data["feedback"]["praise"] == "p"
+    assert cache.get("a") is cache.get("a")
+    _write(tmp_path, "a", praise="new")
+    os.utime(path, ns=(1, 1))
+    assert cache.get("a").data["feedback"]["praise"] == "new"
+    _write(tmp_path, "b")
+    cache.get("b")
+    assert cache.stats()["evictions"] == 1 and cache.get("missing") is None
+
+
+def test_ddb_fallback_with_offloaded_transcript(tmp_path, monkeypatch):
+    from src.coach_feedback.graph import sessions
+
+    lookups = []
+
+    def lookup(sid):
+        lookups.append(sid)
+        return {
+            "session_id": sid,
+            "step_focus": 3,
+            "feedback": FEEDBACK,
+            "transcript_s3": "s3://b/k",
+        }
+
+    monkeypatch.setattr(
+        sessions, "_fetch_transcript", lambda uri: [{"id": "t", "speaker": "s", "text": uri}]
+    )
+    cache = SessionCache(root=str(tmp_path), ddb=True, ddb_lookup=lookup)
+    entry = cache.get("x")
+    assert cache.get("x") is entry and lookups == ["x"]
+    assert entry.transcript is None
+    assert entry.load_transcript()[0]["text"] == "s3://b/k"
+
+
+def test_query_batches_sessions_and_skips_unselected_transcript(tmp_path, monkeypatch):
+    cache = SessionCache(root=str(tmp_path))
+    monkeypatch.setattr(api, "SESSIONS", cache)
+    batches = []
+    get_many = cache.get_many
+    monkeypatch.setattr(cache, "get_many", lambda ids: batches.append(ids) or get_many(ids))
+    _write(tmp_path, "a")
+    _write(tmp_path, "b")
+    query = """{ a: getSession(sessionId: "a") { feedback { praise } }
+                 b: getSession(sessionId: "b") { sessionId transcript { text } }
+                 c: getSession(sessionId: "c") { sessionId } }"""
+    resp = TestClient(api.app).post("/graphql", json={"query": query})
+    data = resp.json()["data"]
+    assert data["a"] == {"feedback": {"praise": "p"}}
+    assert data["b"]["transcript"] == [{"text": "hi"}]
+    assert data["c"] is None
+    assert batches == [["a", "b", "c"]]
+    assert cache.get("a").transcript is None
@@ -20,3 +20,14 @@ def test_parallel_scores_monkeypatch(monkeypatch):
     monkeypatch.setattr(bc, "_invoke_claude", fake_invoke)
     scores = bc.classify_chunk_parallel_scores_concurrent("text", list(range(1, 6)))
     assert len(scores) == 5 and max(scores.values()) > 0.0
+
+
+def test_shared_env_matches_per_call_template_and_is_compiled_once():
+    from jinja2 import Template
+    from src.coach_feedback import templates_loader as tl
+
+    ctx = dict(step_name="Plan implementation", step_id=7, chunk_text="let's plan")
+    expected = Template(tl.load_template("step_classifier.j2")).render(**ctx)
+    assert bc.render_with_jinja2("step_classifier.j2", **ctx) == expected
+    assert tl.get_template("step_classifier.j2") is tl.get_template("step_classifier.j2")
+    assert "feedback_generator.j2" in tl.ENV.list_templates()
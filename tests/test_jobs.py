@@ -0,0 +1,135 @@
+import asyncio
+import threading
+import time
+from fastapi.testclient import TestClient
+from src.coach_feedback.asyncapi import jobs, server
+
+
+def _fake_asr(job, on_chunk):
+    job.chunks = ["c1", "c2"]
+
+
+async def _fake_llm(job):
+    return {"session_id": job.session_id, "step_focus": 3, "feedback": {"praise": "ok"}}
+
+
+def test_jobs_run_through_both_stages_and_dedupe():
+    events = []
+
+    async def main():
+        sched = jobs.JobScheduler(
+            queue_size=4, asr_workers=1, llm_workers=2, asr=_fake_asr, llm=_fake_llm
+        )
+
+        async def emit(sid, event):
+            events.append(event)
+
+        sched.start(emit)
+        job, dup = sched.submit("s1", {"mode": "local", "audio_ref": "a.wav"})
+        again, dup2 = sched.submit("s1", {"mode": "local", "audio_ref": "a.wav"})
+        other, _ = sched.submit("s2", {"mode": "local", "audio_ref": "a.wav"})
+        assert not dup and dup2 and again is job and other is not job
+        for _ in range(100):
+            if sched.stats()["done"] == 2:
+                break
+            await asyncio.sleep(0.01)
+        await sched.stop()
+        return sched.stats()
+
+    stats = asyncio.run(main())
+    assert stats["done"] == 2 and stats["deduped"] == 1 and stats["inflight"] == 0
+    stages = [e["stage"] for e in events if e["type"] == "JobProgress" and e["session_id"] == "s1"]
+    assert stages == ["asr", "llm", "done"]
+    created = [e for e in events if e["type"] == "FeedbackCreated"]
+    assert {e["session_id"] for e in created} == {"s1", "s2"} and all(e["job_id"] for e in created)
+
+
+def test_failed_stage_emits_error():
+    events = []
+
+    def broken(job, on_chunk):
+        raise RuntimeError("decode failed")
+
+    async def main():
+        sched = jobs.JobScheduler(
+            queue_size=1, asr_workers=1, llm_workers=1, asr=broken, llm=_fake_llm
+        )
+
+        async def emit(sid, event):
+            events.append(event)
+
+        sched.start(emit)
+        sched.submit("s1", {})
+        for _ in range(100):
+            if sched.stats()["failed"]:
+                break
+            await asyncio.sleep(0.01)
+        await sched.stop()
+
+    asyncio.run(main())
+    assert events[-1]["type"] == "Error" and "decode failed" in events[-1]["error"]
+
+
+def test_http_command_acks_and_applies_backpressure(monkeypatch):
+    release = threading.Event()
+
+    def blocking_asr(job, on_chunk):
+        assert release.wait(5)
+        job.chunks = []
+
+    sched = jobs.JobScheduler(
+        queue_size=1, asr_workers=1, llm_workers=1, asr=blocking_asr, llm=_fake_llm
+    )
+    monkeypatch.setattr(jobs, "JOBS", sched)
+    with TestClient(server.app) as client:
+        codes = []
+        for i in range(4):
+            resp = client.post(f"/commands/request-feedback/s{i}", json={"session_id": f"s{i}"})
+            codes.append(resp.status_code)
+            if i == 0:
+                assert resp.json()["type"] == "Accepted" and resp.json()["job_id"]
+                for _ in range(100):  # first job leaves the queue for the ASR worker
+                    if sched.stats()["queued"] == 0:
+                        break
+                    time.sleep(0.01)
+        # one job running, one waiting, the rest rejected
+        assert codes == [202, 202, 429, 429]
+        health = client.get("/healthz").json()["jobs"]
+        assert health["rejected"] == 2 and health["queued"] == 1
+        release.set()
+
+
+def test_invalid_command_errors_only_to_the_requester():
+    with TestClient(server.app) as client:
+        with client.websocket_connect("/ws/sessions/bad1") as ws:
+            ws.send_json({"type": "RequestFeedback", "session_id": "bad1", "mode": "cloud"})
+            assert ws.receive_json()["error"] == "audio_ref required for cloud mode"
+            ws.send_json({"type": "Hello"})
+            assert ws.receive_json() == {"type": "Ack", "receivedType": "Hello"}
+
+
+def test_cloud_llm_stage_awaits_bedrock_coroutines(monkeypatch):
+    from src.coach_feedback.pipeline import voice_feedback_cloud as vfc
+    from src.coach_feedback.schema import TranscriptChunk
+
+    loop_threads = set()
+
+    async def fake_score(texts):
+        loop_threads.add(threading.get_ident())
+        return [{7: 0.9} for _ in texts]
+
+    async def fake_generate(transcript, step, language="ko", scores=None):
+        loop_threads.add(threading.get_ident())
+        return {"praise": "ok"}
+
+    monkeypatch.setattr(vfc.bedrock_async, "score_chunks_steps_async", fake_score)
+    monkeypatch.setattr(vfc.bedrock_async, "generate_feedback_cloud_async", fake_generate)
+    monkeypatch.setattr(vfc, "persist_session", lambda sid, a, step, t, fb, *r: (step, fb))
+    job = jobs.Job("s1", {"mode": "cloud", "audio_ref": "s3://b/a.wav"}, ("s1",))
+    job.chunks = [TranscriptChunk(id="seg1", speaker="teacher", text="plan")]
+
+    async def main():
+        return await jobs.llm_stage(job), threading.get_ident()
+
+    out, loop_thread = asyncio.run(main())
+    assert out == (7, {"praise": "ok"}) and loop_threads == {loop_thread}
@@ -0,0 +1,71 @@
+from types import SimpleNamespace
+
+from src.coach_feedback.aws import bedrock_client as bc
+from src.coach_feedback.llm import cache as llm_cache
+
+
+def test_response_cache_ttl_eviction_and_temperature(tmp_path):
+    c = llm_cache.ResponseCache(str(tmp_path / "llm.sqlite"), ttl_s=60, max_entries=2, enabled=True)
+    assert c.key("m", None, "p", 10, 0.2) is None
+    keys = [c.key("m", "sys", f"p{i}", 10, 0.0) for i in range(3)]
+    for i, k in enumerate(keys):
+        c.put(k, f"out{i}")
+    assert c.get(keys[2]) == "out2"
+    c.evict()
+    assert c.get(keys[0]) is None
+    c.ttl_s = 0
+    assert c.get(keys[2]) is None
+    st = c.stats()
+    assert st["hits"] == 1 and st["misses"] == 2 and st["evictions"] >= 1
+
+
+def test_invoke_claude_served_from_cache(tmp_path, monkeypatch):
+    cache = llm_cache.ResponseCache(str(tmp_path / "llm.sqlite"), enabled=True)
+    monkeypatch.setattr(llm_cache, "CACHE", cache)
+    calls = []
+
+    def fake_cfg(prompt, system, max_tokens, temperature, timeout_s):
+        calls.append(prompt)
+        return '{"score": 0.7}'
+
+    monkeypatch.setattr(bc, "_invoke_claude_cfg", fake_cfg)
+    first = bc.classify_chunk_parallel_scores_concurrent("same text", [1, 2])
+    second = bc.classify_chunk_parallel_scores_concurrent("same text", [1, 2])
+    assert first == second == {1: 0.7, 2: 0.7}
+    assert len(calls) == 2 and cache.stats()["hits"] == 2
+    bc.generate_feedback_cloud([{"id": "t1", "text": "x"}], 11)
+    bc.generate_feedback_cloud([{"id": "t1", "text": "x"}], 11)
+    assert len(calls) == 4  # temperature 0.2 is not cached by default
+
+
+def test_unparseable_responses_are_not_cached(tmp_path, monkeypatch):
+    cache = llm_cache.ResponseCache(str(tmp_path / "llm.sqlite"), enabled=True)
+    monkeypatch.setattr(llm_cache, "CACHE", cache)
+    replies = ["Sorry, I can't score that.", '{"score": 0.4}']
+    monkeypatch.setattr(bc, "_invoke_claude_cfg", lambda *a, **k: replies.pop(0))
+    assert bc.classify_chunk_parallel_scores_concurrent("t", [1]) == {1: 0.0}
+    assert bc.classify_chunk_parallel_scores_concurrent("t", [1]) == {1: 0.4}
+    assert bc.classify_chunk_parallel_scores_concurrent("t", [1]) == {1: 0.4}  # now cached
+    assert not replies and cache.stats()["hits"] == 1
+
+
+def test_default_calls_are_paced_by_the_shared_limiter(monkeypatch):
+    events = []
+    limiter = SimpleNamespace(
+        acquire=lambda: events.append("acquire"),
+        on_success=lambda: events.append("ok"),
+        on_throttle=lambda: events.append("throttle"),
+    )
+    replies = [RuntimeError("ThrottlingException: rate exceeded"), '{"score": 0.5}']
+
+    def fake_cfg(*a, **k):
+        out = replies.pop(0)
+        if isinstance(out, Exception):
+            raise out
+        return out
+
+    monkeypatch.setattr(bc, "BEDROCK_LIMITER", limiter)
+    monkeypatch.setattr(bc, "_invoke_claude_cfg", fake_cfg)
+    monkeypatch.setattr(bc.time, "sleep", lambda s: None)
+    assert bc.classify_chunk_parallel_scores_concurrent("t", [1]) == {1: 0.5}
+    assert events == ["acquire", "throttle", "acquire", "ok"]
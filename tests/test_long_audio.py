@@ -0,0 +1,28 @@
+from src.coach_feedback.audio.long_audio import plan_windows, stitch_window
+
+SR = 16000
+
+
+def test_plan_windows_cuts_at_silence_with_overlap():
+    # speech every 10s with a 2s pause; 65s total
+    speech = [{"start": i * 10 * SR, "end": (i * 10 + 8) * SR} for i in range(7)]
+    windows = plan_windows(speech, 65 * SR, window_s=30, overlap_s=1.0)
+    owns = [(w[2], w[3]) for w in windows]
+    assert owns == [(0.0, 29.0), (29.0, 59.0), (59.0, 65.0)]
+    assert windows[1][0] == 28 * SR and windows[1][1] == 60 * SR
+    assert windows[0][0] == 0 and windows[-1][1] == 65 * SR
+
+
+def test_plan_windows_hard_cut_without_silence():
+    windows = plan_windows([], 50 * SR, window_s=20, overlap_s=0)
+    assert [(w[2], w[3]) for w in windows] == [(0.0, 20.0), (20.0, 40.0), (40.0, 50.0)]
+
+
+def test_stitch_drops_overlap_duplicates():
+    w1 = (0, 31 * SR, 0.0, 29.0)
+    w2 = (28 * SR, 60 * SR, 29.0, 60.0)
+    a = [{"start": 20.0, "end": 27.0, "text": "one"}, {"start": 28.2, "end": 30.5, "text": "two"}]
+    b = [{"start": 28.3, "end": 30.4, "text": "two"}, {"start": 31.0, "end": 35.0, "text": "three"}]
+    kept1 = stitch_window(a, w1, None)
+    kept2 = stitch_window(b, w2, kept1[-1])
+    assert [s["text"] for s in kept1 + kept2] == ["one", "two", "three"]
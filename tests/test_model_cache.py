@@ -0,0 +1,48 @@
+import threading
+from src.coach_feedback.audio.model_cache import WhisperModelRegistry, parse_warmup_spec
+
+
+def test_registry_hits_misses_and_lru_eviction():
+    loads = []
+
+    def fake_loader(size, device, compute_type):
+        loads.append(size)
+        return object()
+
+    reg = WhisperModelRegistry(max_mb=500, loader=fake_loader)
+    m1 = reg.get("small", "cpu", "int8")  # 240 MB
+    assert reg.get("small", "cpu", "int8") is m1
+    reg.get("base", "cpu", "int8")  # 72.5 MB
+    reg.get("small", "cpu", "int8")  # touch -> base becomes LRU
+    reg.get("medium", "cpu", "int8")  # 765 MB -> evicts everything else
+    st = reg.stats()
+    assert st["hits"] == 2 and st["misses"] == 3
+    assert st["loaded"] == ["medium:cpu:int8"] and st["evictions"] == 2
+    assert loads == ["small", "base", "medium"]
+
+
+def test_registry_single_load_under_concurrency():
+    count = {"n": 0}
+    gate = threading.Event()
+
+    def slow_loader(size, device, compute_type):
+        count["n"] += 1
+        gate.wait(1)
+        return object()
+
+    reg = WhisperModelRegistry(loader=slow_loader)
+    out = []
+    ts = [threading.Thread(target=lambda: out.append(reg.get("tiny"))) for _ in range(8)]
+    for t in ts:
+        t.start()
+    gate.set()
+    for t in ts:
+        t.join()
+    assert count["n"] == 1 and len({id(m) for m in out}) == 1
+
+
+def test_parse_warmup_spec():
+    assert parse_warmup_spec("small, base:cuda:float16") == [
+        ("small", "cpu", "int8"),
+        ("base", "cuda", "float16"),
+    ]
@@ -0,0 +1,95 @@
+import threading
+from src.coach_feedback.pipeline import persistence
+
+
+def _out(session_id="s1"):
+    return {"session_id": session_id, "step_focus": 3, "feedback": {"praise": "ok"}}
+
+
+def test_publish_does_not_wait_for_uploads(monkeypatch):
+    released = threading.Event()
+    writes = []
+
+    def slow_upload(path, key):
+        assert released.wait(5)
+        return f"s3://b/{key}"
+
+    monkeypatch.setattr(persistence, "S3_BUCKET", "b")
+    monkeypatch.setattr(persistence, "upload_file", slow_upload)
+    monkeypatch.setattr(persistence, "upload_json", lambda obj, key: f"s3://b/{key}")
+    monkeypatch.setattr(persistence, "put_feedback", lambda sid, obj: writes.append(dict(obj)))
+    upload = persistence.start_audio_upload("s1", "a.wav")
+    published = []
+
+    def publish(event):
+        published.append(event)
+        released.set()  # storage is still blocked on the audio upload at this point
+
+    out = persistence.persist_outputs(_out(), "a.wav", upload, publish=publish, write_behind=False)
+    assert published and "audio_s3" not in published[0]
+    assert out["audio_s3"] == "s3://b/sessions/s1/input/audio.wav"
+    assert writes[0]["feedback_s3"] == "s3://b/sessions/s1/output/feedback.json"
+
+
+def test_write_behind_spool_survives_failures_and_restart(tmp_path):
+    calls = []
+
+    def flaky(obj, upload=None):
+        calls.append(obj["session_id"])
+        if len(calls) == 1:
+            raise RuntimeError("ddb down")
+
+    q = persistence.WriteBehindQueue(root=str(tmp_path), writer=flaky, retry_s=60)
+    q.start = lambda: None  # drive the drain by hand
+    q.enqueue(_out("a"))
+    q.enqueue(_out("b"))
+    assert q.drain_once() == 1 and q.stats()["queued"] == 1  # "a" does not block "b"
+
+    restarted = persistence.WriteBehindQueue(root=str(tmp_path), writer=flaky)
+    assert restarted.drain_once() == 1 and restarted.stats()["queued"] == 0
+    assert calls == ["a", "b", "a"]
+
+
+def test_records_that_keep_failing_are_moved_aside(tmp_path):
+    def writer(obj, upload=None):
+        if obj["session_id"] == "bad":
+            raise RuntimeError("rejected")
+
+    q = persistence.WriteBehindQueue(root=str(tmp_path), writer=writer, max_attempts=2)
+    q.start = lambda: None
+    q.enqueue(_out("bad"))
+    later = q.enqueue(_out("bad"))
+    q.enqueue(_out("good"))
+    (tmp_path / "0-broken.json").write_text("{", encoding="utf-8")
+    assert q.drain_once() == 1  # "good" is written past the failing and unreadable records
+    assert q.stats()["queued"] == 2 and q.stats()["dead"] == 1
+    assert q.drain_once() == 0 and q.stats()["queued"] == 1 and q.stats()["dead"] == 2
+    assert (tmp_path / later).exists()  # still retried after the earlier record gave up
+    assert q.drain_once() == 0 and q.stats()["queued"] == 0 and q.stats()["dead"] == 3
+
+
+def test_spooled_record_kept_until_uploads_succeed(tmp_path, monkeypatch):
+    uploads = []
+
+    def upload_file(path, key):
+        uploads.append(path)
+        return f"s3://b/{key}"
+
+    def s3_down(*args):
+        raise RuntimeError("s3 down")
+
+    monkeypatch.setattr(persistence, "S3_BUCKET", "b")
+    monkeypatch.setattr(persistence, "upload_file", upload_file)
+    monkeypatch.setattr(persistence, "upload_json", s3_down)
+    monkeypatch.setattr(persistence, "put_feedback", lambda sid, obj: None)
+    failed_audio = persistence.UPLOAD_POOL.submit(s3_down)
+    failed_audio.exception()
+
+    q = persistence.WriteBehindQueue(root=str(tmp_path), retry_s=60)  # real _write_durably
+    q.start = lambda: None
+    q.enqueue(dict(_out("a"), audio_path="a.wav"), failed_audio)
+    assert q.drain_once() == 0 and q.stats()["queued"] == 1
+
+    monkeypatch.setattr(persistence, "upload_json", lambda obj, key: f"s3://b/{key}")
+    assert q.drain_once() == 1 and q.stats()["queued"] == 0
+    assert uploads == ["a.wav", "a.wav"]  # the failed eager upload was redone from the spool
@@ -0,0 +1,102 @@
+import threading
+from fastapi.testclient import TestClient
+from src.coach_feedback.asyncapi.publisher import PublisherClient
+
+
+class Resp:
+    def __init__(self, ok=True, status_code=None):
+        self.ok = ok
+        self.status_code = status_code or (200 if ok else 503)
+
+    def raise_for_status(self):
+        if not self.ok:
+            raise RuntimeError(str(self.status_code))
+
+
+def test_background_sender_batches_and_retries(monkeypatch):
+    client = PublisherClient(base_url="http://x", batch_max=3, flush_s=0.01, backoff_max_s=0.01)
+    posts = []
+    down = threading.Event()
+    down.set()
+
+    def post(url, json=None, timeout=None):
+        posts.append((url, json))
+        if down.is_set() and len(posts) == 1:
+            down.clear()
+            return Resp(ok=False)  # server restarting
+        return Resp()
+
+    monkeypatch.setattr(client.session, "post", post)
+    for i in range(7):
+        client.submit(f"s{i % 2}", {"type": "TranscriptChunkAppended", "n": i})
+    assert client.flush(timeout=5)
+    bulk = [body["events"] for url, body in posts if url == "http://x/publish"]
+    assert all(len(b) <= 3 for b in bulk)
+    delivered = [e["message"]["n"] for b in bulk[1:] for e in b]
+    assert delivered == list(range(7))  # the failed batch is resent, order kept
+    assert client.stats()["retries"] == 1 and client.stats()["sent"] == 7
+
+
+def test_queue_is_bounded_while_server_is_down(monkeypatch):
+    client = PublisherClient(base_url="http://x", batch_max=2, queue_size=3, flush_s=0.01)
+    gate = threading.Event()
+
+    def post(url, json=None, timeout=None):
+        assert gate.wait(5)
+        return Resp()
+
+    monkeypatch.setattr(client.session, "post", post)
+    for i in range(10):
+        client.submit("s", {"n": i})
+    assert client.stats()["dropped"] >= 5
+    gate.set()
+    assert client.flush(timeout=5)
+
+
+def test_rejected_batches_are_not_retried_and_retries_are_capped(monkeypatch):
+    client = PublisherClient(base_url="http://x", flush_s=0.01, backoff_max_s=0.01, max_retries=2)
+    statuses = [422, 503, 503, 503]
+    posts = []
+
+    def post(url, json=None, timeout=None):
+        posts.append(json)
+        status = statuses.pop(0)
+        return Resp(ok=False, status_code=status)
+
+    monkeypatch.setattr(client.session, "post", post)
+    client.submit("s", {"n": 0})
+    assert client.flush(timeout=5)
+    client.submit("s", {"n": 1})
+    assert client.flush(timeout=5)
+    assert len(posts) == 4 and not statuses  # 1 rejected + 1 try and 2 retries
+    stats = client.stats()
+    assert stats["rejected"] == 1 and stats["dropped"] == 1 and stats["retries"] == 2
+
+
+def test_bulk_publish_endpoint():
+    from src.coach_feedback.asyncapi import server
+
+    with TestClient(server.app) as http:
+        with http.websocket_connect("/ws/sessions/bulk1") as ws:
+            events = [
+                {"session_id": "bulk1", "message": {"type": "Tick", "n": n}} for n in range(3)
+            ]
+            events.insert(1, {"session_id": "other", "message": {"type": "Tick", "n": 99}})
+            resp = http.post("/publish", json={"events": events})
+            assert resp.json() == {"ok": True, "published": 4}
+            assert [ws.receive_json()["n"] for _ in range(3)] == [0, 1, 2]
+
+
+def test_bulk_publish_rejects_malformed_batch_whole():
+    from src.coach_feedback.asyncapi import server
+
+    with TestClient(server.app) as http:
+        with http.websocket_connect("/ws/sessions/bulk2") as ws:
+            events = [
+                {"session_id": "bulk2", "message": {"type": "Tick", "n": 0}},
+                {"session_id": "bulk2"},
+            ]
+            resp = http.post("/publish", json={"events": events})
+            assert resp.status_code == 422 and "events[1]" in resp.json()["error"]
+            http.post("/publish/bulk2", json={"type": "Tick", "n": 1})
+            assert ws.receive_json()["n"] == 1  # nothing from the rejected batch went out
@@ -0,0 +1,57 @@
+import asyncio
+import threading
+import time
+from botocore.exceptions import ClientError
+from src.coach_feedback.llm.rate import TokenBucketLimiter, is_throttle
+
+
+def test_burst_then_paced():
+    lim = TokenBucketLimiter(rate=50.0, burst=5)
+    t0 = time.monotonic()
+    for _ in range(5):
+        lim.acquire()
+    assert time.monotonic() - t0 < 0.05
+    for _ in range(5):
+        lim.acquire()
+    assert time.monotonic() - t0 >= 0.08
+
+
+def test_waiters_do_not_hold_lock_and_report_queue_depth():
+    lim = TokenBucketLimiter(rate=20.0, burst=1)
+    lim.acquire()
+    ts = [threading.Thread(target=lim.acquire) for _ in range(4)]
+    for t in ts:
+        t.start()
+    time.sleep(0.02)
+    assert lim.stats()["queue_depth"] >= 2
+    assert lim.lock.acquire(timeout=0.01)  # lock is free while others sleep
+    lim.lock.release()
+    for t in ts:
+        t.join()
+    assert lim.stats()["queue_depth"] == 0
+
+
+def test_aimd_adaptation():
+    lim = TokenBucketLimiter(rate=10.0, max_rate=12.0, increase=1.0, cooldown_s=60)
+    lim.on_throttle()
+    lim.on_throttle()  # within cooldown: counted, not compounded
+    assert lim.rate == 5.0 and lim.stats()["throttles"] == 2
+    for _ in range(20):
+        lim.on_success()
+    assert lim.rate == 12.0
+
+
+def test_async_acquire():
+    lim = TokenBucketLimiter(rate=100.0, burst=2)
+
+    async def go():
+        await asyncio.gather(*(lim.acquire_async() for _ in range(6)))
+
+    asyncio.run(go())
+    assert lim.stats()["acquired"] == 6
+
+
+def test_is_throttle():
+    err = ClientError({"Error": {"Code": "ThrottlingException", "Message": "slow"}}, "InvokeModel")
+    assert is_throttle(err)
+    assert not is_throttle(ValueError("bad json"))
@@ -0,0 +1,51 @@
+import json
+from fastapi.testclient import TestClient
+from src.coach_feedback.asyncapi.replay import ReplayBuffer
+
+
+def test_ring_buffer_numbers_events_and_reports_gaps():
+    buf = ReplayBuffer(max_events=3)
+    for i in range(5):
+        seq, data = buf.record("s1", {"type": "TranscriptChunkAppended", "n": i})
+        assert json.loads(data)["seq"] == seq == i + 1
+    assert [json.loads(f)["seq"] for f in buf.since("s1", 3)] == [4, 5]
+    frames = [json.loads(f) for f in buf.since("s1", 0)]
+    gap = {"type": "ReplayGap", "session_id": "s1", "epoch": buf.epoch, "from_seq": 1, "to_seq": 2}
+    assert frames[0] == gap
+    assert [f["seq"] for f in frames[1:]] == [3, 4, 5]
+    assert buf.since("s1", 5, buf.epoch) == [] and buf.since("new", 0) == []
+    assert "new" not in buf.sessions  # probing does not allocate
+
+
+def test_resume_from_another_epoch_or_unissued_seq_resets():
+    buf = ReplayBuffer()
+    for i in range(2):
+        buf.record("s1", {"type": "TranscriptChunkAppended", "n": i})
+    for frames in (buf.since("s1", 1, "old-node"), buf.since("s1", 7), buf.since("gone", 4)):
+        frames = [json.loads(f) for f in frames]
+        assert frames[0]["type"] == "ReplayGap" and frames[0]["reset"] is True
+        assert frames[0]["epoch"] == buf.epoch and "from_seq" not in frames[0]
+    reset = [json.loads(f) for f in buf.since("s1", 7)]
+    assert [f["seq"] for f in reset[1:]] == [1, 2] and reset[1]["epoch"] == buf.epoch
+
+
+def test_idle_sessions_are_evicted():
+    buf = ReplayBuffer(max_sessions=2, ttl_s=60)
+    for sid in ("a", "b", "c"):
+        buf.record(sid, {"type": "FeedbackCreated"})
+    assert list(buf.sessions) == ["b", "c"] and buf.evicted == 1
+    buf.evict(now=buf.sessions["c"].touched + 61)
+    assert buf.stats() == {"sessions": 0, "events": 0, "evicted": 3}
+
+
+def test_late_joiner_resumes_from_last_seq():
+    from src.coach_feedback.asyncapi import server
+
+    with TestClient(server.app) as client:
+        for n in range(3):
+            client.post("/publish/late1", json={"type": "TranscriptChunkAppended", "n": n})
+        with client.websocket_connect("/ws/sessions/late1?last_seq=1") as ws:
+            assert [ws.receive_json()["n"] for _ in range(2)] == [1, 2]
+            client.post("/publish/late1", json={"type": "FeedbackCreated", "n": 3})
+            live = ws.receive_json()
+            assert live["type"] == "FeedbackCreated" and live["seq"] == 4
@@ -0,0 +1,75 @@
+import os
+import pytest
+from fastapi.testclient import TestClient
+from src.coach_feedback.aws import s3_io
+from src.coach_feedback.pipeline import persistence, voice_feedback
+
+
+def test_local_audio_spools_s3_and_cleans_up(monkeypatch):
+    seen = []
+
+    def fake_download(key, local_path, bucket=None):
+        seen.append((bucket, key))
+        with open(local_path, "wb") as f:
+            f.write(b"RIFF")
+        return local_path
+
+    monkeypatch.setattr(s3_io, "download_file", fake_download)
+    monkeypatch.setattr(s3_io, "S3_BUCKET", "rec")
+    with s3_io.local_audio("s3://rec/uploads/x/a.wav") as path:
+        assert path.endswith(".wav") and os.path.exists(path)
+    assert seen == [("rec", "uploads/x/a.wav")]
+    assert not os.path.exists(path)
+    with s3_io.local_audio("a.wav") as path:
+        assert path == "a.wav"
+    with pytest.raises(ValueError):
+        s3_io.download_to_temp("s3://someone-else/a.wav")
+    assert seen == [("rec", "uploads/x/a.wav")]
+
+
+def test_transcript_chunks_decode_spooled_copy(monkeypatch):
+    monkeypatch.setattr(s3_io, "download_to_temp", lambda uri: "/tmp/spooled.wav")
+    monkeypatch.setattr(s3_io.os, "remove", lambda p: None)
+    monkeypatch.setattr(voice_feedback, "iter_segments", lambda p, *a, **k: iter([{"text": p}]))
+    chunks = list(voice_feedback.iter_transcript_chunks("s3://rec/a.wav"))
+    assert [c.text for c in chunks] == ["/tmp/spooled.wav"]
+
+
+def test_s3_audio_is_not_uploaded_again(monkeypatch):
+    monkeypatch.setattr(
+        persistence, "upload_file", lambda *a: (_ for _ in ()).throw(AssertionError)
+    )
+    fut = persistence.start_audio_upload("s1", "s3://rec/uploads/x/a.wav")
+    assert fut.result() == "s3://rec/uploads/x/a.wav"
+    assert persistence.audio_uri("s1", "s3://rec/uploads/x/a.wav") == "s3://rec/uploads/x/a.wav"
+
+
+def test_presign_endpoint(monkeypatch):
+    from src.coach_feedback.asyncapi import server
+
+    calls = []
+
+    def fake_presign(key, bucket=None, content_type=None, expires_s=900):
+        calls.append((key, content_type, expires_s))
+        return f"https://signed/{key}"
+
+    monkeypatch.setattr(s3_io, "presign_put", fake_presign)
+    monkeypatch.setattr(s3_io, "s3_uri", lambda key, bucket=None: f"s3://rec/{key}")
+    body = {"filename": "../lesson.wav", "content_type": "audio/wav"}
+    resp = TestClient(server.app).post("/uploads/presign", json=body)
+    data = resp.json()
+    assert data["key"].startswith("uploads/") and data["key"].endswith("/lesson.wav")
+    assert data["url"] == f"https://signed/{data['key']}"
+    assert data["audio_ref"] == f"s3://rec/{data['key']}"
+    assert calls == [(data["key"], "audio/wav", 900)]
+
+    with TestClient(server.app) as client:
+        long = client.post("/uploads/presign", json={"expires_in": 86400})
+        assert long.json()["expires_in"] == 900 and calls[-1][2] == 900
+        assert client.post("/uploads/presign", json={"expires_in": "soon"}).status_code == 400
+        assert client.post("/uploads/presign", json={"expires_in": 0}).status_code == 400
+        bad = client.post(
+            "/commands/request-feedback/p1",
+            json={"session_id": "p1", "mode": "cloud", "audio_ref": "s3://someone-else/a.wav"},
+        )
+        assert bad.status_code == 400 and "bucket" in bad.json()["error"]
@@ -0,0 +1,41 @@
+import numpy as np
+from src.coach_feedback import scoring
+from src.coach_feedback.classifier import StepClassifier
+from src.coach_feedback.schema import TranscriptChunk
+
+
+def test_scores_to_matrix_and_vote():
+    m = scoring.scores_to_matrix([{3: 0.9, 7: 0.1}, {}, {7: 0.8}, {7: 0.6, 3: 0.5}])
+    assert m.shape == (4, 12) and m.dtype == np.float32
+    assert m[0, 2] == np.float32(0.9)
+    assert scoring.primary_step(m, method="vote") == 7  # empty row carries no vote
+    assert scoring.primary_step(m[:0], method="vote") == scoring.DEFAULT_STEP
+
+
+def test_duration_weighting_and_softmax_and_secondary():
+    m = scoring.scores_to_matrix([{3: 0.9}, {7: 0.8}, {7: 0.7}])
+    w = np.array([10.0, 1.0, 1.0], dtype=np.float32)
+    assert scoring.primary_step(m, method="duration", weights=w) == 3
+    assert scoring.primary_step(m, method="softmax") == 7
+    assert scoring.secondary_steps(m, 7, k=2) == [3]
+
+
+def test_primary_steps_batch_matches_per_session():
+    rng = np.random.default_rng(1)
+    mats = [rng.random((n, 12), dtype=np.float32) for n in (3, 5, 1)]
+    mats.append(np.zeros((2, 12), dtype=np.float32))
+    index = np.concatenate([np.full(len(m), i) for i, m in enumerate(mats)])
+    batch = scoring.primary_steps_batch(np.concatenate(mats), index, len(mats))
+    assert batch.tolist() == [scoring.primary_step(m, method="vote") for m in mats]
+
+
+def test_heuristic_score_matrix():
+    clf = StepClassifier({1: {"cues": ["지난"]}, 7: {"cues": ["plan"]}})
+    chunks = [
+        TranscriptChunk(id="a", speaker="teacher", text="지난 시간 plan"),
+        TranscriptChunk(id="b", speaker="teacher", text="학생들이 좋아했어요"),
+        TranscriptChunk(id="c", speaker="teacher", text="hello"),
+    ]
+    m = clf.score_matrix(chunks)
+    assert m[0, 0] == m[0, 6] == np.float32(0.6)
+    assert m[1, 10] == np.float32(0.6) and not m[2].any()
@@ -0,0 +1,83 @@
+import asyncio
+from src.coach_feedback import metrics
+from src.coach_feedback.pipeline import voice_feedback as vf
+from src.coach_feedback.pipeline import voice_feedback_cloud as vfc
+from src.coach_feedback.pipeline import persistence
+
+SEGS = [
+    {"start": 0.0, "end": 1.0, "text": "지난 시간에 학생들이 더 참여했어요."},
+    {"start": 1.0, "end": 2.0, "text": ""},
+    {"start": 2.0, "end": 3.0, "text": "let's plan the next lesson"},
+]
+
+
+def _fake_iter_segments(audio_path, *a, **k):
+    yield from SEGS
+
+
+def test_local_pipeline_emits_chunks_while_decoding(monkeypatch):
+    monkeypatch.setattr(vf, "iter_segments", _fake_iter_segments)
+    metrics.reset()
+    seen = []
+    fb = vf.run_pipeline_on_audio("x.wav", on_chunk=lambda ch: seen.append(ch.id))
+    assert seen == ["seg1", "seg3"]
+    assert fb.praise
+    snap = metrics.snapshot()
+    assert snap["timings"]["transcript.time_to_first_chunk_s"]["count"] == 1
+    assert snap["counters"]["transcript.chunks"] == 2
+
+
+def test_each_local_run_gets_its_own_session(monkeypatch):
+    monkeypatch.setattr(vf, "iter_segments", _fake_iter_segments)
+    published = []
+    monkeypatch.setattr(vf, "_maybe_publish_asyncapi", lambda sid, *a, **k: published.append(sid))
+    vf.run_pipeline_on_audio("x.wav")
+    first = set(published)
+    published.clear()
+    vf.run_pipeline_on_audio("x.wav")
+    assert len(first) == 1 and len(set(published)) == 1 and first != set(published)
+
+
+def test_async_chunk_iterator(monkeypatch):
+    monkeypatch.setattr(vf, "iter_segments", _fake_iter_segments)
+
+    async def collect():
+        return [ch.id async for ch in vf.aiter_transcript_chunks("x.wav")]
+
+    assert asyncio.run(collect()) == ["seg1", "seg3"]
+
+
+def test_cloud_pipeline_classifies_per_chunk(monkeypatch):
+    monkeypatch.setattr(vf, "iter_segments", _fake_iter_segments)
+    classified = []
+
+    def fake_classify(text):
+        classified.append(text)
+        return {3: 0.9, 11: 0.1}
+
+    monkeypatch.setattr(vfc, "classify_chunk_parallel_scores_concurrent", fake_classify)
+    monkeypatch.setattr(
+        vfc, "generate_feedback_cloud", lambda t, s, language="ko", **k: {"praise": "ok"}
+    )
+    monkeypatch.setattr(persistence, "upload_file", lambda *a, **k: None)
+    monkeypatch.setattr(persistence, "upload_json", lambda *a, **k: None)
+    monkeypatch.setattr(persistence, "put_feedback", lambda *a, **k: None)
+    out = vfc.run_cloud_pipeline("x.wav")
+    assert out["step_focus"] == 3 and len(classified) == 2
+    assert [c["id"] for c in out["transcript"]] == ["seg1", "seg3"]
+
+
+def test_cloud_pipeline_batches_decoded_chunks(monkeypatch):
+    monkeypatch.setattr(vf, "iter_segments", lambda *a, **k: iter(SEGS * 3))
+    calls = []
+
+    def fake_score_chunks(texts, mode):
+        calls.append(len(texts))
+        return [{7: 0.9} for _ in texts]
+
+    monkeypatch.setattr(vfc, "CLASSIFY_BATCH_CHUNKS", 4)
+    monkeypatch.setattr(vfc, "score_chunks", fake_score_chunks)
+    monkeypatch.setattr(vfc, "generate_feedback_cloud", lambda t, s, **k: {"praise": "ok"})
+    monkeypatch.setattr(vfc, "persist_session", lambda sid, a, step, transcript, *r: step)
+    assert vfc.run_cloud_pipeline("x.wav", classify_mode="batched", early_exit=False) == 7
+    assert calls == [4, 2]
@@ -0,0 +1,81 @@
+import os
+from types import SimpleNamespace
+from src.coach_feedback.audio import transcribe, transcript_cache
+
+
+class FakeModel:
+    def __init__(self):
+        self.calls = 0
+
+    def transcribe(self, audio_path, vad_filter=True, language=None):
+        self.calls += 1
+        segs = [SimpleNamespace(start=0.0, end=1.5, text=" hello ")]
+        return iter(segs), None
+
+
+def test_cache_hit_skips_decoding(tmp_path, monkeypatch):
+    model = FakeModel()
+    monkeypatch.setattr(transcribe, "get_model", lambda *a, **k: model)
+    monkeypatch.setattr(transcript_cache, "CACHE", transcript_cache.TranscriptCache(str(tmp_path)))
+    monkeypatch.setattr(transcript_cache, "CACHE_ENABLE", True)
+    audio = tmp_path / "a.wav"
+    audio.write_bytes(b"RIFF" + b"\0" * 64)
+    first = transcribe.transcribe_audio(str(audio))
+    second = transcribe.transcribe_audio(str(audio))
+    assert first == second == ("hello", [{"start": 0.0, "end": 1.5, "text": "hello"}])
+    assert model.calls == 1
+    transcribe.transcribe_audio(str(audio), model_size="base")
+    assert model.calls == 2
+    st = transcript_cache.CACHE.stats()
+    assert st["hits"] == 1 and st["misses"] == 2
+
+
+def test_windowed_and_sequential_decodes_do_not_share_entries(tmp_path, monkeypatch):
+    model, windowed = FakeModel(), []
+
+    def iter_long_segments(path, **kwargs):
+        windowed.append(kwargs["workers"])
+        yield {"start": 0.0, "end": 1.5, "text": "hello (windowed)"}
+
+    monkeypatch.setattr(transcribe, "get_model", lambda *a, **k: model)
+    monkeypatch.setattr(transcribe.long_audio, "iter_long_segments", iter_long_segments)
+    monkeypatch.setattr(transcript_cache, "CACHE", transcript_cache.TranscriptCache(str(tmp_path)))
+    monkeypatch.setattr(transcript_cache, "CACHE_ENABLE", True)
+    audio = tmp_path / "a.wav"
+    audio.write_bytes(b"RIFF" + b"\0" * 64)
+    assert transcribe.transcribe_audio(str(audio), workers=1)[0] == "hello"
+    assert transcribe.transcribe_audio(str(audio), workers=2)[0] == "hello (windowed)"
+    monkeypatch.setattr(transcribe.long_audio, "WINDOW_S", 120.0)
+    transcribe.transcribe_audio(str(audio), workers=2)
+    assert model.calls == 1 and windowed == [2, 2]
+    assert transcribe.transcribe_audio(str(audio), workers=1)[0] == "hello"  # still cached
+    assert transcript_cache.CACHE.stats()["hits"] == 1
+
+
+def test_cache_evicts_least_recent(tmp_path):
+    cache = transcript_cache.TranscriptCache(str(tmp_path), max_mb=0.0015)  # ~1.5 KB
+    segs = [{"start": 0.0, "end": 1.0, "text": "x" * 600}]
+    cache.put("aa01", segs)
+    os.utime(cache._path("aa01"), (1, 1))
+    cache.put("bb02", segs)
+    cache.put("cc03", segs)
+    assert cache.get("aa01") is None
+    assert cache.get("cc03") == segs
+    assert cache.stats()["evictions"] >= 1
+
+
+def test_eviction_uses_index_not_directory_walks(tmp_path, monkeypatch):
+    warm = transcript_cache.TranscriptCache(str(tmp_path))
+    segs = [{"start": 0.0, "end": 1.0, "text": "x" * 600}]
+    warm.put("aa01", segs)
+    walks = []
+    real_walk = os.walk
+    monkeypatch.setattr(
+        transcript_cache.os, "walk", lambda root: walks.append(root) or real_walk(root)
+    )
+    cache = transcript_cache.TranscriptCache(str(tmp_path), max_mb=0.0015)
+    for key in ("bb02", "cc03", "dd04"):
+        cache.put(key, segs)
+    assert walks == [str(tmp_path)]  # one scan to pick up the existing entry
+    assert cache.get("aa01") is None and cache.get("dd04") == segs
+    assert cache.total <= cache.max_bytes and cache.stats()["evictions"] == 2